@@ -1,21 +1,34 @@
 import os
 import uuid
 import logging
-import boto3
 from datetime import datetime
-from flask import Flask, request, jsonify, abort
+from contextlib import nullcontext
+from dotenv import load_dotenv
+
+# Loaded once, before project modules read their settings at import time
+load_dotenv()
+
+from flask import Flask, Blueprint, request, jsonify, abort
 from flask_cors import CORS
 from dateutil.relativedelta import relativedelta
-from dotenv import load_dotenv
+from sqlalchemy import select, text
+from sqlalchemy.engine import make_url
 
 from models import (db, MappingIssueTask, MappingTaskSession, MappingQuoteTask, MappingUserTask,
-                    Item, SLD, Node, NodeClass, Edge, EdgeClass, IssueClass,
+                    Item, SLD, Node, Edge,
                     Photo, Task, Form, FormSubmission, IRPhoto, IRSession,
                     Issue, Quote, Company, User)
+from models.serializers import (NODE, EDGE, PHOTO, IR_PHOTO, IR_SESSION, ISSUE, QUOTE, TASK, FORM,
+                                ISSUE_TASK, TASK_SESSION, QUOTE_TASK, USER_TASK)
 
 from routes import register_routes
-
-load_dotenv()
+from services import (outbox, reports, reconcile, db_pool, migrate, plan_check, replicas, metrics, query_budget,
+                      json_provider, pagination, catalogs, visibility, purge, partitions, idempotency, mappings)
+from services.s3 import get_s3_client
+from services.replicas import replica_read
+from services.query_budget import max_queries
+from services.json_provider import native_json, native_json_requested
+from services.idempotency import idempotent
 
 # ─── Configure logging ───────────────────────────────────────────
 logging.basicConfig(
@@ -24,24 +37,66 @@ logging.basicConfig(
 )
 logger = logging.getLogger("table-and-detail")
 
-# ─── Flask & DB setup ─────────────────────────────────────────
-app = Flask(__name__)
+# Routes defined in this module; registered by create_app()
+core_bp = Blueprint('core', __name__)
 
-# Configure CORS for cross-origin requests
-CORS(app, origins="*", allow_headers=["Content-Type", "Authorization"])
 
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
-    'DATABASE_URL'
-)
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-register_routes(app)
+def masked_database_uri(uri):
+    """The database URI with its password hidden, for logging"""
+    if not uri:
+        return uri
+    try:
+        return make_url(uri).render_as_string(hide_password=True)
+    except Exception:
+        return '<unparseable database URI>'
 
-logger.info("Starting Flask app on port 5000, connecting to DB %s", app.config['SQLALCHEMY_DATABASE_URI'])
+
+# ─── Flask & DB setup ─────────────────────────────────────────
+def create_app(config=None):
+    """Build the Flask app
+
+    config overrides settings read from the environment (e.g. a test
+    database URI). AWS clients are not created here; services.aws builds
+    them on first use.
+    """
+    app = Flask(__name__)
+
+    # Configure CORS for cross-origin requests
+    CORS(app, origins="*", allow_headers=["Content-Type", "Authorization", idempotency.HEADER],
+         expose_headers=[pagination.NEXT_CURSOR_HEADER, idempotency.REPLAYED_HEADER])
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
+        'DATABASE_URL'
+    )
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if config:
+        app.config.update(config)
+
+    # First, so its timer wraps every other request hook
+    metrics.init_app(app)
+    query_budget.init_app(app)
+    json_provider.init_app(app)
+    db_pool.init_app(app)
+    replicas.init_app(app)
+    db.init_app(app)
+    visibility.init_app(app)
+    idempotency.init_app(app)
+    app.register_blueprint(core_bp)
+    register_routes(app)
+    outbox.init_app(app)
+    reports.init_app(app)
+    reconcile.init_app(app)
+    purge.init_app(app)
+    partitions.init_app(app)
+    migrate.init_app(app)
+    plan_check.init_app(app)
+
+    logger.info("Created Flask app, connecting to DB %s", masked_database_uri(app.config['SQLALCHEMY_DATABASE_URI']))
+    return app
 
 # ─── Health Check  ────────────────────────────────────────────
 
-@app.route('/health', methods=['GET'])
+@core_bp.route('/health', methods=['GET'])
 def health_check():
     logger.debug("Health check invoked")
     return jsonify({
@@ -49,9 +104,33 @@ def health_check():
         'uptime': datetime.utcnow().isoformat()
     }), 200
 
+@core_bp.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: the database answers and the pool is not exhausted"""
+    try:
+        db.session.execute(text('SELECT 1'))
+        database = 'ok'
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Readiness check failed: %s", str(e))
+        database = str(e)
+
+    ready = database == 'ok'
+    response = {
+        'status': 'ready' if ready else 'unavailable',
+        'database': database,
+        'pool': db_pool.pool_status(db.engine)
+    }
+    if replicas.replica_binds():
+        response['replica_pools'] = {
+            bind_key: db_pool.pool_status(db.engines[bind_key]) for bind_key in replicas.replica_binds()
+        }
+    return jsonify(response), 200 if ready else 503
+
 # ─── Quotes ────────────────────────────────────────────
 
-@app.route('/quote/create', methods=['POST'])
+@core_bp.route('/quote/create', methods=['POST'])
+@idempotent
 def create_quote():
     """Create a new quote"""
     try:
@@ -83,7 +162,7 @@ def create_quote():
             'error': str(e)
         }), 400
 
-@app.route('/quote/update/<uuid:quote_id>', methods=['PUT'])
+@core_bp.route('/quote/update/<uuid:quote_id>', methods=['PUT'])
 def update_quote(quote_id):
     """Update an existing quote"""
     try:
@@ -133,15 +212,14 @@ def update_quote(quote_id):
 
 # ─── Issues ────────────────────────────────────────────
 
-@app.route('/issue_classes', methods=['GET'])
+@core_bp.route('/issue_classes', methods=['GET'])
+@replica_read
 def get_issue_classes():
     logger.info("READ ISSUE CLASSES")
-    issue_classes = IssueClass.query.all()
-    result = [issue_class.to_dict() for issue_class in issue_classes]
-    logger.info("READ succeeded: %s", result)
-    return jsonify(result), 200
+    return catalogs.catalog_response('issue_classes')
 
-@app.route('/issue/create', methods=['POST'])
+@core_bp.route('/issue/create', methods=['POST'])
+@idempotent
 def create_issue():
     """Create a new issue"""
     try:
@@ -179,7 +257,7 @@ def create_issue():
             'error': str(e)
         }), 400
 
-@app.route('/issue/update/<uuid:issue_id>', methods=['PUT'])
+@core_bp.route('/issue/update/<uuid:issue_id>', methods=['PUT'])
 def update_issue(issue_id):
     """Update an existing issue"""
     try:
@@ -230,16 +308,36 @@ def update_issue(issue_id):
         return jsonify({'error': str(e)}), 400
 
 # ─── IR Photos / Sessions ────────────────────────────────────────────
-@app.route('/ir_photos/<uuid:sld_id>')
+@core_bp.route('/ir_photos/<uuid:sld_id>')
+@replica_read
+@max_queries(1)
 def get_ir_photos(sld_id):
     logger.info("READ IR_PHOTOS FOR SLD: %s", sld_id)
-    tasks = IRPhoto.query.filter_by(sld_id=sld_id).all()
-    ir_photo_dicts = [t.to_dict() for t in tasks]
-    result = ir_photo_dicts
+    try:
+        page = pagination.requested_page(request.args)
+        since = partitions.requested_since(request.args)
+    except (pagination.PaginationError, partitions.WindowError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    # since limits the read to the partitions of that window
+    criteria = [IRPhoto.sld_id == sld_id]
+    if since:
+        criteria.append(IRPhoto.date_created >= since)
+
+    cursor = None
+    if page:
+        try:
+            rows, cursor = pagination.fetch_page(IR_PHOTO.select().where(*criteria), [IRPhoto.id], page)
+        except pagination.PaginationError as e:
+            return jsonify({'error': str(e)}), 400
+        result = IR_PHOTO.dump(rows)
+    else:
+        result = IR_PHOTO.all(*criteria)
     logger.info("READ succeeded: %s", result)
-    return jsonify(result), 200
+    return pagination.with_next_cursor(jsonify(result), cursor), 200
 
-@app.route('/ir_photo/create', methods=['POST'])
+@core_bp.route('/ir_photo/create', methods=['POST'])
+@idempotent
 def create_ir_photo():
     try:
         data = request.get_json()
@@ -278,7 +376,8 @@ def create_ir_photo():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/ir_session/create', methods=['POST'])
+@core_bp.route('/ir_session/create', methods=['POST'])
+@idempotent
 def create_ir_session():
     try:
         data = request.get_json()
@@ -321,7 +420,7 @@ def create_ir_session():
         logger.exception("Error creating IR session")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/ir_session/update/<uuid:ir_session_id>', methods=['PUT'])
+@core_bp.route('/ir_session/update/<uuid:ir_session_id>', methods=['PUT'])
 def update_ir_session(ir_session_id):
     data = request.get_json() or {}
     logger.info("UPDATE /ir_session/update/%s with payload: %s", ir_session_id, data)
@@ -363,7 +462,7 @@ def update_ir_session(ir_session_id):
     return jsonify(result), 200
 
 # IR Photo methods
-@app.route('/ir_photo/update/<uuid:photo_id>', methods=['PUT'])
+@core_bp.route('/ir_photo/update/<uuid:photo_id>', methods=['PUT'])
 def update_ir_photo(photo_id):
     data = request.get_json() or {}
     logger.info("UPDATE /ir_photo/update/%s with payload: %s", photo_id, data)
@@ -410,28 +509,65 @@ def update_ir_photo(photo_id):
     return jsonify(result), 200
 
 # ─── Task and Form Endpoiints ───────────────────────────────────────────
-@app.route('/forms', methods=['GET'])
+@core_bp.route('/forms', methods=['GET'])
+@replica_read
+@native_json
 def get_all_forms():
     logger.info("READ ALL FORMS")
-    forms = Form.query.all()
-    result = [form.to_dict() for form in forms]
+    native = native_json_requested()
+    try:
+        page = pagination.requested_page(request.args)
+    except pagination.PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if not page:
+        return catalogs.catalog_response('forms', native=native)
+
+    forms = FORM.native() if native else FORM
+    try:
+        rows, cursor = pagination.fetch_page(forms.select(), [Form.id], page)
+    except pagination.PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    result = forms.dump(rows)
     logger.info("READ succeeded")
-    return jsonify(result), 200
+    return pagination.with_next_cursor(jsonify(result), cursor), 200
 
-@app.route('/tasks/<uuid:sld_id>', methods=['GET'])
+@core_bp.route('/tasks/<uuid:sld_id>', methods=['GET'])
+@replica_read
+@max_queries(1)
+@native_json
 def get_tasks(sld_id):
     logger.info("READ TASKS FOR SLD: %s", sld_id)
-    tasks = Task.query.filter_by(sld_id=sld_id).all()
-    task_dicts = [t.to_dict() for t in tasks]
+    tasks = TASK.native() if native_json_requested() else TASK
+    try:
+        page = pagination.requested_page(request.args)
+        since = partitions.requested_since(request.args)
+    except (pagination.PaginationError, partitions.WindowError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    # since limits the read to the partitions of that window
+    criteria = [Task.sld_id == sld_id]
+    if since:
+        criteria.append(Task.created_at >= since)
+
+    cursor = None
+    if page:
+        try:
+            rows, cursor = pagination.fetch_page(tasks.select().where(*criteria), [Task.id], page)
+        except pagination.PaginationError as e:
+            return jsonify({'error': str(e)}), 400
+        task_dicts = tasks.dump(rows)
+    else:
+        task_dicts = tasks.all(*criteria)
     # this used to be a multi-key payload, leaving it as such to avoid too much refactoring in mobile codebase
     result = {
         "user_tasks":       task_dicts 
     }
     logger.info("READ succeeded: %s", result)
-    return jsonify(result), 200
+    return pagination.with_next_cursor(jsonify(result), cursor), 200
 
 # Task methods
-@app.route('/task/update/<uuid:task_id>', methods=['PUT'])
+@core_bp.route('/task/update/<uuid:task_id>', methods=['PUT'])
 def update_task(task_id):
     data = request.get_json() or {}
     logger.info("UPDATE /task/update/%s with payload: %s", task_id, data)
@@ -465,43 +601,60 @@ def update_task(task_id):
     if data.get('completed') and not was_completed and task.recurring:
         if task.due_date and task.interval:
             next_due = task.due_date + relativedelta(months=task.interval)
-            new_task = Task(
-                title            = task.title,
-                task_description = task.task_description,
-                completed        = False,
-                node_id          = task.node_id,
-                form_id          = task.form_id,
-                sld_id           = task.sld_id,
-                is_deleted       = False,
-                submission       = {},                  # start fresh
-                submitted_at     = None,                # not yet submitted
-                due_date         = next_due,
-                created_at       = datetime.utcnow(),
-                task_type        = task.task_type,
-                recurring        = task.recurring,
-                interval         = task.interval,
-                procedure_id     = task.procedure_id,
-                shortcut_id      = task.shortcut_id
-            )
-            db.session.add(new_task)
-            db.session.flush()  # Add this to ensure the new task is persisted
-            
-            # Explicitly set submitted_at to None after adding to session
-            new_task.submitted_at = None
-            
-            logger.info(
-                "Scheduled next recurring task %s for %s with submitted_at=%s",
-                new_task.id, next_due, new_task.submitted_at
-            )
-
-    # Commit both the update and (if created) the new task
+            # Created by the outbox worker, atomically with this update
+            outbox.enqueue('task.spawn_recurrence', {
+                'task_id': str(task.id),
+                'due_date': next_due.isoformat()
+            })
+            logger.info("Queued next recurring task for %s due %s", task.id, next_due)
+
+    # Commit both the update and (if queued) the recurrence job
     db.session.commit()
 
     result = task.to_dict()
     logger.info("UPDATE succeeded: %s", result)
     return jsonify(result), 200
 
-@app.route('/task/create', methods=['POST'])
+@outbox.handler('task.spawn_recurrence')
+def spawn_recurring_task(payload):
+    """Create the next occurrence of a completed recurring task"""
+    task = Task.query.get(uuid.UUID(payload['task_id']))
+    if not task:
+        logger.warning("Recurring task %s no longer exists", payload['task_id'])
+        return None
+
+    new_task = Task(
+        title            = task.title,
+        task_description = task.task_description,
+        completed        = False,
+        node_id          = task.node_id,
+        form_id          = task.form_id,
+        sld_id           = task.sld_id,
+        is_deleted       = False,
+        submission       = {},                  # start fresh
+        submitted_at     = None,                # not yet submitted
+        due_date         = datetime.fromisoformat(payload['due_date']),
+        created_at       = datetime.utcnow(),
+        task_type        = task.task_type,
+        recurring        = task.recurring,
+        interval         = task.interval,
+        procedure_id     = task.procedure_id,
+        shortcut_id      = task.shortcut_id
+    )
+    db.session.add(new_task)
+    db.session.flush()  # Add this to ensure the new task is persisted
+
+    # Explicitly set submitted_at to None after adding to session
+    new_task.submitted_at = None
+
+    logger.info(
+        "Scheduled next recurring task %s for %s with submitted_at=%s",
+        new_task.id, new_task.due_date, new_task.submitted_at
+    )
+    return {'task_id': str(new_task.id)}
+
+@core_bp.route('/task/create', methods=['POST'])
+@idempotent
 def create_task():
     data = request.get_json() or {}
     logger.info("CREATE /task/create with payload: %s", data)
@@ -533,7 +686,7 @@ def create_task():
 # ─── Node, Edge, and SLD Endpoints ────────────────────────────────────────────
 
 # Create
-@app.route('/items', methods=['POST'])
+@core_bp.route('/items', methods=['POST'])
 def create_item():
     data = request.get_json() or {}
     logger.info("CREATE /items with payload: %s", data)
@@ -569,121 +722,162 @@ def create_item():
     return jsonify(result), 201
 
 # Read all
-@app.route('/items', methods=['GET'])
+@core_bp.route('/items', methods=['GET'])
+@replica_read
 def list_items():
     logger.info("READ ALL /items")
-    items = Item.query.order_by(Item.timestamp).all()
+    try:
+        page = pagination.requested_page(request.args)
+    except pagination.PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    cursor = None
+    if page:
+        try:
+            items, cursor = pagination.fetch_page(select(Item), [Item.timestamp, Item.id], page, scalars=True)
+        except pagination.PaginationError as e:
+            return jsonify({'error': str(e)}), 400
+    else:
+        items = Item.query.order_by(Item.timestamp).all()
     result = [i.to_dict() for i in items]
     logger.debug("READ ALL result count: %d", len(result))
-    return jsonify(result), 200
+    return pagination.with_next_cursor(jsonify(result), cursor), 200
 
 # Read all nodes and edges
-@app.route('/slddep/<uuid:sld_id>', methods=['GET'])
+@core_bp.route('/slddep/<uuid:sld_id>', methods=['GET'])
+@replica_read
+@max_queries(6)
 def get_sld_dep(sld_id):
     logger.info("READ SLD: %s", sld_id)
     sld = SLD.query.get_or_404(sld_id)
-    nodes = Node.query.filter_by(sld_id=sld_id).all()
-    edges = Edge.query.filter_by(sld_id=sld_id).all()
-    photos = Photo.query.filter_by(sld_id=sld_id).all()
-    ir_photos = IRPhoto.query.filter_by(sld_id=sld_id).all()
-    ir_sessions = IRSession.query.filter_by(sld_id=sld_id).all()
     result = {
         "id": sld.to_dict().get("id"),
         "name": sld.to_dict().get("name"),
-        "nodes": [node.to_dict() for node in nodes],
-        "edges": [edge.to_dict() for edge in edges],
-        "photos": [photo.to_dict() for photo in photos],
-        "ir_photos": [ir_photo.to_dict() for ir_photo in ir_photos],
-        "ir_sessions": [ir_session.to_dict() for ir_session in ir_sessions]
+        "nodes": NODE.all(Node.sld_id == sld_id),
+        "edges": EDGE.all(Edge.sld_id == sld_id),
+        "photos": PHOTO.all(Photo.sld_id == sld_id),
+        "ir_photos": IR_PHOTO.all(IRPhoto.sld_id == sld_id),
+        "ir_sessions": IR_SESSION.all(IRSession.sld_id == sld_id)
     }
     logger.info("READ succeeded: %s", result)
     return jsonify(result), 200
 
 # Updated get_sld route
-@app.route('/sld/<uuid:sld_id>', methods=['GET'])
+@core_bp.route('/sld/<uuid:sld_id>', methods=['GET'])
+@replica_read
+@max_queries(14)
+@native_json
 def get_sld(sld_id):
+    """One SLD with everything drawn on it
+
+    With ?include_deleted=ids the live rows come with a "tombstones" section
+    listing the ids of deleted entities and the keys of deleted mappings, so
+    a syncing client can drop them without downloading their contents.
+    """
     logger.info("READ SLD: %s", sld_id)
+    native = native_json_requested()
+    tombstones_requested = visibility.current_mode() == visibility.IDS
+    quotes = QUOTE.native() if native else QUOTE
+    tasks = TASK.native() if native else TASK
     sld = SLD.query.get_or_404(sld_id)
-    nodes = Node.query.filter_by(sld_id=sld_id).all()
-    edges = Edge.query.filter_by(sld_id=sld_id).all()
-    photos = Photo.query.filter_by(sld_id=sld_id).all()
-    ir_photos = IRPhoto.query.filter_by(sld_id=sld_id).all()
-    ir_sessions = IRSession.query.filter_by(sld_id=sld_id).all()
-    issues = Issue.query.filter_by(sld_id=sld_id).all()
-    quotes = Quote.query.filter_by(sld_id=sld_id).all()
-    tasks = Task.query.filter_by(sld_id=sld_id).all()
-    logger.info("Found %d tasks for SLD %s", len(tasks), sld_id)
-
-    task_dicts = []
-    for task in tasks:
-        logger.info("  ↳ processing Task.id=%s (sld_id=%s)", task.id, task.sld_id)
-        try:
-            d = task.to_dict()
-            logger.info("      → to_dict succeeded: %s", { 'id': d['id'], 'submitted_at': d['submitted_at'] })
-        except Exception as e:
-            logger.error("      → to_dict FAILED for Task.id=%s: %s", task.id, e)
-            d = None
-        if d:
-            task_dicts.append(d)
-    
-    # Get IDs for filtering mappings
-    issue_ids = [issue.id for issue in issues]
-    quote_ids = [quote.id for quote in quotes]
-    task_ids = [task.id for task in tasks]
-    session_ids = [session.id for session in ir_sessions]
-    
-    # Get mappings that involve entities from this SLD
-    issue_task_mappings = MappingIssueTask.query.filter(
-        (MappingIssueTask.issue_id.in_(issue_ids)) | 
-        (MappingIssueTask.task_id.in_(task_ids))
-    ).all() if issue_ids or task_ids else []
-    
-    task_session_mappings = MappingTaskSession.query.filter(
-        (MappingTaskSession.task_id.in_(task_ids)) | 
-        (MappingTaskSession.session_id.in_(session_ids))
-    ).all() if task_ids or session_ids else []
-    
-    quote_task_mappings = MappingQuoteTask.query.filter(
-        (MappingQuoteTask.quote_id.in_(quote_ids)) | 
-        (MappingQuoteTask.task_id.in_(task_ids))
-    ).all() if quote_ids or task_ids else []
+    ir_session_rows = IR_SESSION.fetch(IRSession.sld_id == sld_id)
+    issue_rows = ISSUE.fetch(Issue.sld_id == sld_id)
+    quote_rows = quotes.fetch(Quote.sld_id == sld_id)
+    task_rows = tasks.fetch(Task.sld_id == sld_id)
+    logger.info("Found %d tasks for SLD %s", len(task_rows), sld_id)
+
+    # Get IDs for filtering mappings (id is the first column of every row)
+    issue_ids = [row[0] for row in issue_rows]
+    quote_ids = [row[0] for row in quote_rows]
+    task_ids = [row[0] for row in task_rows]
+    session_ids = [row[0] for row in ir_session_rows]
     
-    user_task_mappings = MappingUserTask.query.filter(
-        MappingUserTask.task_id.in_(task_ids)
-    ).all() if task_ids else []
+    # Get mappings that involve entities from this SLD; with tombstones the
+    # deleted ones are read in the same queries and split off below
+    with visibility.including_deleted() if tombstones_requested else nullcontext():
+        issue_task_mappings = ISSUE_TASK.all(
+            (MappingIssueTask.issue_id.in_(issue_ids)) | 
+            (MappingIssueTask.task_id.in_(task_ids))
+        ) if issue_ids or task_ids else []
+        
+        task_session_mappings = TASK_SESSION.all(
+            (MappingTaskSession.task_id.in_(task_ids)) | 
+            (MappingTaskSession.session_id.in_(session_ids))
+        ) if task_ids or session_ids else []
+        
+        quote_task_mappings = QUOTE_TASK.all(
+            (MappingQuoteTask.quote_id.in_(quote_ids)) | 
+            (MappingQuoteTask.task_id.in_(task_ids))
+        ) if quote_ids or task_ids else []
+        
+        user_task_mappings = USER_TASK.all(
+            MappingUserTask.task_id.in_(task_ids)
+        ) if task_ids else []
     
     result = {
         "id": sld.to_dict().get("id"),
         "name": sld.to_dict().get("name"),
-        "nodes": [node.to_dict() for node in nodes],
-        "edges": [edge.to_dict() for edge in edges],
-        "photos": [photo.to_dict() for photo in photos],
-        "ir_photos": [ir_photo.to_dict() for ir_photo in ir_photos],
-        "ir_sessions": [ir_session.to_dict() for ir_session in ir_sessions],
-        "issues": [issue.to_dict() for issue in issues],
-        "quotes": [quote.to_dict() for quote in quotes],
-        "tasks": task_dicts,
+        "nodes": NODE.all(Node.sld_id == sld_id),
+        "edges": EDGE.all(Edge.sld_id == sld_id),
+        "photos": PHOTO.all(Photo.sld_id == sld_id),
+        "ir_photos": IR_PHOTO.all(IRPhoto.sld_id == sld_id),
+        "ir_sessions": IR_SESSION.dump(ir_session_rows),
+        "issues": ISSUE.dump(issue_rows),
+        "quotes": quotes.dump(quote_rows),
+        "tasks": tasks.dump(task_rows),
         "mappings": {
-            "issue_task": [mapping.to_dict() for mapping in issue_task_mappings],
-            "task_session": [mapping.to_dict() for mapping in task_session_mappings],
-            "quote_task": [mapping.to_dict() for mapping in quote_task_mappings],
-            "user_task": [mapping.to_dict() for mapping in user_task_mappings]
+            "issue_task": issue_task_mappings,
+            "task_session": task_session_mappings,
+            "quote_task": quote_task_mappings,
+            "user_task": user_task_mappings
         }
     }
+    if tombstones_requested:
+        result["tombstones"] = sld_tombstones(sld_id, result["mappings"])
     logger.info("READ succeeded: %s", result)
     return jsonify(result), 200
 
+
+SLD_TOMBSTONE_TABLES = ('nodes', 'edges', 'photos', 'ir_photos', 'issues', 'quotes', 'tasks')
+
+
+def sld_tombstones(sld_id, mappings):
+    """Ids of the SLD's deleted entities, and its deleted mappings moved out of mappings"""
+    deleted = text(' UNION ALL '.join(
+        f"SELECT '{table}' AS kind, id FROM {table} WHERE sld_id = :sld_id AND is_deleted IS TRUE"
+        for table in SLD_TOMBSTONE_TABLES
+    ))
+    tombstones = {table: [] for table in SLD_TOMBSTONE_TABLES}
+    for kind, entity_id in db.session.execute(deleted, {'sld_id': sld_id}):
+        tombstones[kind].append(str(entity_id))
+
+    tombstones['mappings'] = {}
+    for kind, rows in mappings.items():
+        mappings[kind] = [row for row in rows if not row['is_deleted']]
+        tombstones['mappings'][kind] = [
+            {key: value for key, value in row.items() if key != 'is_deleted'}
+            for row in rows if row['is_deleted']
+        ]
+    return tombstones
+
 # Read all node classes
-@app.route('/node_classes', methods=['GET'])
+@core_bp.route('/node_classes', methods=['GET'])
+@replica_read
 def get_node_classes():
     logger.info("READ NODE CLASSES")
-    node_classes = NodeClass.query.all()
-    result = [node_class.to_dict() for node_class in node_classes]
-    logger.info("READ succeeded: %s", result)
-    return jsonify(result), 200
+    return catalogs.catalog_response('node_classes')
+
+# All reference catalogs in one conditional request
+@core_bp.route('/catalogs', methods=['GET'])
+@replica_read
+@native_json
+def get_catalogs():
+    logger.info("READ CATALOGS")
+    return catalogs.all_catalogs_response(native=native_json_requested())
 
 # Read one
-@app.route('/items/<uuid:item_id>', methods=['GET'])
+@core_bp.route('/items/<uuid:item_id>', methods=['GET'])
+@replica_read
 def get_item(item_id):
     logger.info("READ /items/%s", item_id)
     item = Item.query.get_or_404(item_id)
@@ -692,7 +886,7 @@ def get_item(item_id):
     return jsonify(result), 200
 
 # Node methods
-@app.route('/node/update/<uuid:node_id>', methods=['PUT'])
+@core_bp.route('/node/update/<uuid:node_id>', methods=['PUT'])
 def update_node(node_id):
     data = request.get_json() or {}
     logger.info("UPDATE /node/update/%s with payload: %s", node_id, data)
@@ -732,7 +926,8 @@ def update_node(node_id):
     logger.info("UPDATE succeeded: %s", result)
     return jsonify(result), 200
 
-@app.route('/node/create', methods=['POST'])
+@core_bp.route('/node/create', methods=['POST'])
+@idempotent
 def create_node():
     data = request.get_json() or {}
     logger.info("CREATE /node/create with payload: %s", data)
@@ -769,15 +964,14 @@ def create_node():
 # Edge methods
 
 # Read all edge classes
-@app.route('/edge_classes', methods=['GET'])
+@core_bp.route('/edge_classes', methods=['GET'])
+@replica_read
 def get_edge_classes():
     logger.info("READ EDGE CLASSES")
-    edge_classes = EdgeClass.query.all()
-    result = [edge_class.to_dict() for edge_class in edge_classes]
-    logger.info("READ succeeded: %s", result)
-    return jsonify(result), 200
+    return catalogs.catalog_response('edge_classes')
 
-@app.route('/edge/create', methods=['POST'])
+@core_bp.route('/edge/create', methods=['POST'])
+@idempotent
 def create_edge():
     data = request.get_json() or {}
     logger.info("CREATE /edge/create with payload: %s", data)
@@ -802,7 +996,7 @@ def create_edge():
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
-@app.route('/edge/update/<uuid:edge_id>', methods=['PUT'])
+@core_bp.route('/edge/update/<uuid:edge_id>', methods=['PUT'])
 def update_edge(edge_id):
     data = request.get_json() or {}
     logger.info("UPDATE /edge/update/%s with payload: %s", edge_id, data)
@@ -827,7 +1021,8 @@ def update_edge(edge_id):
     return jsonify(result), 200
 
 # Photo methods
-@app.route('/photo/create', methods=['POST'])
+@core_bp.route('/photo/create', methods=['POST'])
+@idempotent
 def create_photo():
     data = request.get_json() or {}
     logger.info("CREATE /photo/create with payload: %s", data)
@@ -856,7 +1051,7 @@ def create_photo():
         return jsonify({"error": str(e)}), 500
     
 # Update photo 
-@app.route('/photo/update/<uuid:photo_id>', methods=['PUT'])
+@core_bp.route('/photo/update/<uuid:photo_id>', methods=['PUT'])
 def update_photo(photo_id):
     data = request.get_json() or {}
     logger.info("UPDATE /photo/update/%s with payload: %s", photo_id, data)
@@ -873,7 +1068,7 @@ def update_photo(photo_id):
     return jsonify(result), 200
 
 # Update item
-@app.route('/items/<uuid:item_id>', methods=['PUT'])
+@core_bp.route('/items/<uuid:item_id>', methods=['PUT'])
 def update_item(item_id):
     data = request.get_json() or {}
     logger.info("UPDATE /items/%s with payload: %s", item_id, data)
@@ -898,7 +1093,7 @@ def update_item(item_id):
     return jsonify(result), 200
 
 # Delete
-@app.route('/items/<uuid:item_id>', methods=['DELETE'])
+@core_bp.route('/items/<uuid:item_id>', methods=['DELETE'])
 def delete_item(item_id):
     logger.info("DELETE /items/%s", item_id)
     item = Item.query.get_or_404(item_id)
@@ -910,7 +1105,8 @@ def delete_item(item_id):
 # MAPPING ROUTES
 
 # Issue-Task Mapping Routes
-@app.route('/mapping/issue-task/create', methods=['POST'])
+@core_bp.route('/mapping/issue-task/create', methods=['POST'])
+@idempotent
 def create_issue_task_mapping():
     """Create a new issue-task mapping"""
     try:
@@ -967,7 +1163,7 @@ def create_issue_task_mapping():
             'error': str(e)
         }), 400
 
-@app.route('/mapping/issue-task/update/<uuid:issue_id>/<uuid:task_id>', methods=['PUT'])
+@core_bp.route('/mapping/issue-task/update/<uuid:issue_id>/<uuid:task_id>', methods=['PUT'])
 def update_issue_task_mapping(issue_id, task_id):
     """Update an issue-task mapping (mainly for soft delete)"""
     try:
@@ -1004,7 +1200,8 @@ def update_issue_task_mapping(issue_id, task_id):
         }), 400
 
 # Task-Session Mapping Routes
-@app.route('/mapping/task-session/create', methods=['POST'])
+@core_bp.route('/mapping/task-session/create', methods=['POST'])
+@idempotent
 def create_task_session_mapping():
     """Create a new task-session mapping"""
     try:
@@ -1061,7 +1258,7 @@ def create_task_session_mapping():
             'error': str(e)
         }), 400
 
-@app.route('/mapping/task-session/update/<uuid:task_id>/<uuid:session_id>', methods=['PUT'])
+@core_bp.route('/mapping/task-session/update/<uuid:task_id>/<uuid:session_id>', methods=['PUT'])
 def update_task_session_mapping(task_id, session_id):
     """Update a task-session mapping (mainly for soft delete)"""
     try:
@@ -1098,7 +1295,8 @@ def update_task_session_mapping(task_id, session_id):
         }), 400
 
 # Quote-Task Mapping Routes
-@app.route('/mapping/quote-task/create', methods=['POST'])
+@core_bp.route('/mapping/quote-task/create', methods=['POST'])
+@idempotent
 def create_quote_task_mapping():
     """Create a new quote-task mapping"""
     try:
@@ -1155,7 +1353,7 @@ def create_quote_task_mapping():
             'error': str(e)
         }), 400
 
-@app.route('/mapping/quote-task/update/<uuid:quote_id>/<uuid:task_id>', methods=['PUT'])
+@core_bp.route('/mapping/quote-task/update/<uuid:quote_id>/<uuid:task_id>', methods=['PUT'])
 def update_quote_task_mapping(quote_id, task_id):
     """Update a quote-task mapping (mainly for soft delete)"""
     try:
@@ -1191,25 +1389,20 @@ def update_quote_task_mapping(quote_id, task_id):
             'error': str(e)
         }), 400
 
-@app.route('/mapping/user-task/create', methods=['POST'])
+@core_bp.route('/mapping/user-task/create', methods=['POST'])
+@idempotent
 def create_user_task_mapping():
     data = request.json
     
     try:
-        mapping = MappingUserTask(
-            id=uuid.uuid4(),  # Generate a new UUID for the id
-            user_id=uuid.UUID(data['user_id']),
-            task_id=uuid.UUID(data['task_id']),
-            mapping_type=data.get('mapping_type', 'assignee'),
-            is_deleted=False
-        )
-        
-        db.session.add(mapping)
+        # Upserted, so a repeated or previously deleted pair links the existing row
+        rows = mappings.parse_pairs('user-task', [data])
+        mapping_id = mappings.upsert('user-task', rows, returning=[MappingUserTask.id])[0].id
         db.session.commit()
         
         return jsonify({
             "success": True,
-            "id": str(mapping.id),
+            "id": str(mapping_id),
             "message": "User-Task mapping created"
         }), 201
         
@@ -1221,7 +1414,7 @@ def create_user_task_mapping():
             "error": str(e)
         }), 400
 
-@app.route('/mapping/user-task/update/<uuid:user_id>/<uuid:task_id>', methods=['PUT'])
+@core_bp.route('/mapping/user-task/update/<uuid:user_id>/<uuid:task_id>', methods=['PUT'])
 def update_user_task_mapping(user_id, task_id):
     """Update a user-task mapping (mainly for soft delete)"""
     try:
@@ -1259,8 +1452,33 @@ def update_user_task_mapping(user_id, task_id):
             'error': str(e)
         }), 400
 
+@core_bp.route('/mapping/<kind>/bulk', methods=['POST'])
+@idempotent
+def link_mappings(kind):
+    """Link many pairs of one mapping kind in a single statement.
+
+    Expects {"mappings": [{"task_id": ..., "session_id": ...}, ...]} (up to
+    1000 pairs, keyed like the kind's create route). New pairs are created
+    and soft-deleted ones restored; pairs that are already linked are left
+    as they are. Returns every pair of the request.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        rows = mappings.parse_pairs(kind, data.get('mappings'))
+    except mappings.MappingError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    try:
+        linked = mappings.link(kind, rows)
+        db.session.commit()
+        return jsonify({'success': True, 'data': linked, 'count': len(linked)}), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to link {kind} mappings: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 # ─── Utility Routes ───────────────────────────────────────────
-@app.route('/get_presigned_url', methods=['POST'])
+@core_bp.route('/get_presigned_url', methods=['POST'])
 def get_presigned_url():
     """Generate a presigned PUT URL for S3 upload.
     
@@ -1268,7 +1486,8 @@ def get_presigned_url():
     - bucket: S3 bucket name
     - key: Object key/path in the bucket
     
-    Returns presigned URL valid for 1 hour.
+    Returns presigned URL valid for 1 hour. Use POST /presigned_urls to sign
+    many keys at once.
     """
     data = request.get_json() or {}
     logger.info("GET_PRESIGNED_URL with payload: %s", data)
@@ -1280,8 +1499,8 @@ def get_presigned_url():
         return jsonify({"error": "Both 'bucket' and 'key' are required"}), 400
     
     try:
-        # Create S3 client - will use EC2 instance role credentials
-        s3_client = boto3.client('s3', region_name='us-east-2')
+        # Shared S3 client - will use EC2 instance role credentials
+        s3_client = get_s3_client()
         
         # Generate presigned PUT URL
         presigned_url = s3_client.generate_presigned_url(
@@ -1305,8 +1524,11 @@ def get_presigned_url():
 
 
 # ─── Bootstrap & Run ───────────────────────────────────────────
+# Module-level instance for `gunicorn app:app` and `flask --app app`
+app = create_app()
+
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
-        logger.info("Database tables created/verified")
+        applied = migrate.upgrade(db.engine)
+        logger.info("Database schema migrated (applied: %s)", applied or 'none')
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,204 @@
+"""Generate synthetic sites into a local Postgres for load benchmarks.
+
+    DATABASE_URL=postgresql://localhost/pgz_bench \\
+        python benchmarks/generate_sld.py --slds 5 --nodes 400 --manifest bench_manifest.json
+
+Each SLD gets a tree of nodes with edges between them, photos and IR
+photos on the nodes, IR sessions, issues, quotes, tasks and the mapping
+rows that tie them together, all inserted with batched executemany. The
+manifest lists the generated ids for benchmarks/load_sld.py.
+"""
+import os
+import sys
+import json
+import uuid
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('OUTBOX_INPROCESS_WORKER', 'false')
+
+from app import create_app  # noqa: E402
+from models import (db, Company, User, SLD, Node, Edge, Photo, IRPhoto, IRSession, Issue, Quote,  # noqa: E402
+                    Task, MappingIssueTask, MappingTaskSession, MappingQuoteTask, MappingUserTask)
+from services import migrate  # noqa: E402
+
+BATCH_SIZE = 2000
+
+NODE_TYPES = ['switchgear', 'transformer', 'panel', 'breaker', 'disconnect', 'motor', 'ups']
+ISSUE_STATUSES = ['open', 'in_progress', 'resolved', 'deferred']
+TASK_TYPES = ['inspection', 'ir_scan', 'maintenance', 'repair']
+
+
+def insert(model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(model.__table__.insert(), rows[start:start + BATCH_SIZE])
+
+
+def ids(n):
+    return [uuid.uuid4() for _ in range(n)]
+
+
+def generate_sld(rng, company_id, user_ids, args, index):
+    now = datetime.now(timezone.utc)
+    sld_id = uuid.uuid4()
+    insert(SLD, [{'id': sld_id, 'name': f"Synthetic site {index}", 'company_id': company_id,
+                  'is_deleted': False, 'created_at': now}])
+
+    # Nodes form a tree: every node after the root hangs off an earlier one
+    node_ids = ids(args.nodes)
+    nodes = []
+    for i, node_id in enumerate(node_ids):
+        nodes.append({
+            'id': node_id, 'sld_id': sld_id,
+            'type': rng.choice(NODE_TYPES), 'label': f"EQ-{index}-{i:05d}",
+            'parent_id': node_ids[rng.randrange(i)] if i else None,
+            'x': rng.uniform(0, 5000), 'y': rng.uniform(0, 5000), 'width': 80, 'height': 80,
+            'is_deleted': rng.random() < args.deleted_fraction,
+            'location': f"Building {rng.randint(1, 5)}, Room {rng.randint(100, 450)}",
+            'core_attributes': [
+                {'name': 'voltage', 'value': rng.choice(['480V', '208V', '4160V'])},
+                {'name': 'amperage', 'value': f"{rng.choice([100, 225, 400, 800, 1200])}A"},
+                {'name': 'manufacturer', 'value': rng.choice(['Square D', 'Eaton', 'Siemens', 'ABB'])},
+            ],
+            'com': 1, 'qr_code': None
+        })
+    insert(Node, nodes)
+
+    edges = [
+        {'id': uuid.uuid4(), 'sld_id': sld_id, 'source': node['parent_id'], 'target': node['id'],
+         'is_deleted': False, 'core_attributes': {'conductor': rng.choice(['Cu', 'Al'])}}
+        for node in nodes if node['parent_id']
+    ]
+    insert(Edge, edges)
+
+    insert(Photo, [
+        {'id': uuid.uuid4(), 'sld_id': sld_id, 'entity_id': rng.choice(node_ids),
+         'url': f"s3://pgz-photos/{sld_id}/{uuid.uuid4()}.jpg", 'type': 'visual',
+         'upload_needed': False, 'filename': f"IMG_{i:05d}.jpg", 'is_deleted': False}
+        for i in range(args.nodes * args.photos_per_node)
+    ])
+
+    session_ids = ids(args.ir_sessions)
+    insert(IRSession, [
+        {'id': session_id, 'sld_id': sld_id, 'name': f"IR survey {i + 1}", 'photo_type': 'flir',
+         'active_visual_prefix': 'VIS_', 'active_ir_prefix': 'IR_',
+         'date_created': now - timedelta(days=30 * (args.ir_sessions - i)),
+         'date_closed': now - timedelta(days=30 * (args.ir_sessions - i) - 2), 'active': False}
+        for i, session_id in enumerate(session_ids)
+    ])
+
+    issue_ids = ids(args.issues)
+    insert(Issue, [
+        {'id': issue_id, 'sld_id': sld_id, 'node_id': rng.choice(node_ids),
+         'session_id': rng.choice(session_ids) if session_ids else None,
+         'title': f"Hot spot on phase {rng.choice('ABC')}", 'description': 'Synthetic issue',
+         'issue_type': 'thermal', 'issue_subtype': rng.choice(['connection', 'load', 'imbalance']),
+         'status': rng.choice(ISSUE_STATUSES), 'is_deleted': False,
+         'details': {'delta_t': round(rng.uniform(5, 80), 1)},
+         'created_date': now, 'modified_date': now}
+        for issue_id in issue_ids
+    ])
+
+    insert(IRPhoto, [
+        {'id': uuid.uuid4(), 'sld_id': sld_id, 'ir_session_id': session_id,
+         'node_id': rng.choice(node_ids), 'issue_id': rng.choice(issue_ids) if issue_ids and rng.random() < 0.2 else None,
+         'visual_photo_key': f"{sld_id}/{session_id}/VIS_{i:05d}.jpg",
+         'ir_photo_key': f"{sld_id}/{session_id}/IR_{i:05d}.jpg",
+         'date_created': now, 'is_deleted': False}
+        for session_id in session_ids
+        for i in range(args.ir_photos_per_session)
+    ])
+
+    quote_ids = ids(args.quotes)
+    insert(Quote, [
+        {'id': quote_id, 'sld_id': sld_id, 'title': f"Quote {i + 1}", 'status': 'draft',
+         'sow': 'Replace damaged lugs and re-torque connections.', 'tnm': '8 hours labour',
+         'description': 'Synthetic quote', 'is_deleted': False, 'created_date': now, 'modified_date': now}
+        for i, quote_id in enumerate(quote_ids)
+    ])
+
+    task_ids = ids(args.tasks)
+    insert(Task, [
+        {'id': task_id, 'sld_id': sld_id, 'node_id': rng.choice(node_ids),
+         'title': f"{rng.choice(TASK_TYPES).title()} {i + 1}", 'task_description': 'Synthetic task',
+         'completed': rng.random() < 0.5, 'is_deleted': False, 'task_type': rng.choice(TASK_TYPES),
+         'submission': {'answers': [{'q': n, 'a': rng.choice(['ok', 'fail', 'n/a'])} for n in range(10)]},
+         'submitted_at': now, 'created_at': now, 'due_date': now + timedelta(days=rng.randint(1, 365)),
+         'recurring': rng.random() < 0.3, 'interval': 12}
+        for i, task_id in enumerate(task_ids)
+    ])
+
+    if task_ids:
+        insert(MappingIssueTask, [
+            {'issue_id': issue_id, 'task_id': rng.choice(task_ids), 'is_deleted': False}
+            for issue_id in issue_ids
+        ])
+        insert(MappingQuoteTask, [
+            {'quote_id': quote_id, 'task_id': rng.choice(task_ids), 'is_deleted': False}
+            for quote_id in quote_ids
+        ])
+        insert(MappingTaskSession, [
+            {'id': uuid.uuid4(), 'task_id': task_id, 'session_id': rng.choice(session_ids), 'is_deleted': False}
+            for task_id in task_ids if session_ids and rng.random() < 0.5
+        ])
+        insert(MappingUserTask, [
+            {'id': uuid.uuid4(), 'user_id': rng.choice(user_ids), 'task_id': task_id,
+             'mapping_type': 'assignee', 'is_deleted': False}
+            for task_id in task_ids
+        ])
+
+    db.session.commit()
+    return {
+        'sld_id': str(sld_id),
+        'node_ids': [str(node_id) for node_id in node_ids[:args.manifest_sample]],
+        'task_ids': [str(task_id) for task_id in task_ids[:args.manifest_sample]],
+        'counts': {
+            'nodes': len(nodes), 'edges': len(edges), 'photos': args.nodes * args.photos_per_node,
+            'ir_sessions': len(session_ids), 'ir_photos': len(session_ids) * args.ir_photos_per_session,
+            'issues': len(issue_ids), 'quotes': len(quote_ids), 'tasks': len(task_ids)
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--slds', type=int, default=3)
+    parser.add_argument('--nodes', type=int, default=300)
+    parser.add_argument('--photos-per-node', type=int, default=2)
+    parser.add_argument('--ir-sessions', type=int, default=4)
+    parser.add_argument('--ir-photos-per-session', type=int, default=150)
+    parser.add_argument('--issues', type=int, default=120)
+    parser.add_argument('--quotes', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=250)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--deleted-fraction', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--manifest', default='bench_manifest.json')
+    parser.add_argument('--manifest-sample', type=int, default=200, help='Ids per SLD kept in the manifest')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    app = create_app()
+    with app.app_context():
+        migrate.upgrade(db.engine)
+
+        company_id = uuid.uuid4()
+        insert(Company, [{'id': company_id, 'name': f"Benchmark company {company_id.hex[:8]}",
+                          'is_deleted': False, 'active': True}])
+        user_ids = [f"bench-{company_id.hex[:8]}-{i}" for i in range(args.users)]
+        insert(User, [{'id': user_id, 'username': f"{user_id}@example.com", 'company_id': company_id,
+                       'is_deleted': False, 'active': True} for user_id in user_ids])
+        db.session.commit()
+
+        slds = [generate_sld(rng, company_id, user_ids, args, index) for index in range(args.slds)]
+
+    manifest = {'company_id': str(company_id), 'user_ids': user_ids, 'slds': slds}
+    with open(args.manifest, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Generated {len(slds)} SLDs for company {company_id}; manifest written to {args.manifest}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""Load benchmark for the SLD read and write paths.
+
+Drives a running server with the SLDs from benchmarks/generate_sld.py:
+
+    python benchmarks/load_sld.py --base-url http://localhost:5000 \\
+        --manifest bench_manifest.json --concurrency 16 --duration 60 --output results.json
+
+A weighted mix of GET /sld, GET /slddep, GET /tasks, PUT /node/update and
+POST /node/create runs for --duration seconds across --concurrency client
+threads. Results (per scenario p50/p95/p99, throughput, errors, plus the
+git commit and settings) are written as JSON. --compare prints the change
+against an earlier results file:
+
+    python benchmarks/load_sld.py ... --output after.json --compare before.json
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from slow_aws_load import percentile, ROOT
+
+DEFAULT_MIX = 'sld=40,slddep=15,tasks=25,node_update=15,node_create=5'
+
+
+def request(method, url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'} if data else {})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            size = len(response.read())
+            status = response.status
+    except urllib.error.HTTPError as e:
+        size = len(e.read())
+        status = e.code
+    except Exception:
+        size = 0
+        status = 0
+    return status, time.perf_counter() - started, size
+
+
+def build_scenarios(base_url, manifest, rng_lock, rng):
+    slds = manifest['slds']
+
+    def pick(key=None):
+        with rng_lock:
+            sld = rng.choice(slds)
+            return sld, rng.choice(sld[key]) if key else None
+
+    def sld():
+        site, _ = pick()
+        return request('GET', f"{base_url}/sld/{site['sld_id']}")
+
+    def slddep():
+        site, _ = pick()
+        return request('GET', f"{base_url}/slddep/{site['sld_id']}")
+
+    def tasks():
+        site, _ = pick()
+        return request('GET', f"{base_url}/tasks/{site['sld_id']}")
+
+    def node_update():
+        _, node_id = pick('node_ids')
+        with rng_lock:
+            body = {'x': rng.uniform(0, 5000), 'y': rng.uniform(0, 5000)}
+        return request('PUT', f"{base_url}/node/update/{node_id}", body)
+
+    def node_create():
+        site, parent_id = pick('node_ids')
+        return request('POST', f"{base_url}/node/create", {
+            'sld_id': site['sld_id'], 'parent_id': parent_id, 'type': 'panel',
+            'label': 'bench', 'core_attributes': [{'name': 'voltage', 'value': '208V'}]
+        })
+
+    return {'sld': sld, 'slddep': slddep, 'tasks': tasks,
+            'node_update': node_update, 'node_create': node_create}
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(args):
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+
+    rng = random.Random(args.seed)
+    rng_lock = threading.Lock()
+    scenarios = build_scenarios(args.base_url.rstrip('/'), manifest, rng_lock, rng)
+    weights = parse_mix(args.mix)
+    unknown = set(weights) - set(scenarios)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios in --mix: {', '.join(sorted(unknown))}")
+    names = list(weights)
+
+    samples = defaultdict(list)
+    samples_lock = threading.Lock()
+    deadline = time.monotonic() + args.warmup + args.duration
+    measure_from = time.monotonic() + args.warmup
+
+    def client():
+        while time.monotonic() < deadline:
+            with rng_lock:
+                name = rng.choices(names, weights=[weights[n] for n in names])[0]
+            status, latency, size = scenarios[name]()
+            if time.monotonic() >= measure_from:
+                with samples_lock:
+                    samples[name].append((status, latency, size))
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    results = {}
+    for name in names:
+        rows = samples.get(name, [])
+        latencies = [latency for _, latency, _ in rows]
+        results[name] = {
+            'requests': len(rows),
+            'errors': sum(1 for status, _, _ in rows if not 200 <= status < 300),
+            'throughput_rps': round(len(rows) / args.duration, 2),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if rows else None,
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2) if rows else None,
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if rows else None,
+            'mean_bytes': round(sum(size for _, _, size in rows) / len(rows)) if rows else None
+        }
+
+    total = sum(r['requests'] for r in results.values())
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'settings': {
+            'base_url': args.base_url, 'concurrency': args.concurrency, 'duration': args.duration,
+            'warmup': args.warmup, 'mix': weights, 'seed': args.seed,
+            'slds': len(manifest['slds'])
+        },
+        'total_throughput_rps': round(total / args.duration, 2),
+        'scenarios': results
+    }
+
+
+def compare(current, baseline):
+    """Print per-scenario changes against an earlier results file"""
+    print(f"{'scenario':<12} {'metric':<15} {'baseline':>10} {'current':>10} {'change':>9}")
+    for name, now in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        for metric in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+            old, new = before.get(metric), now.get(metric)
+            if not old or new is None:
+                continue
+            print(f"{name:<12} {metric:<15} {old:>10} {new:>10} {(new - old) / old * 100:>+8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--manifest', default='bench_manifest.json')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=5, help='Unmeasured seconds before measuring')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Scenario weights, e.g. ' + DEFAULT_MIX)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write results JSON here (default: stdout)')
+    parser.add_argument('--compare', help='Earlier results JSON to compare against')
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Microbenchmark: to_dict() + stdlib JSON vs compiled serializers + orjson.
+
+    python benchmarks/serialize_rows.py --rows 100000
+
+Builds synthetic rows for every model in models/serializers.py (no database
+needed), checks that each serializer returns exactly what the model's
+to_dict() does and that the orjson provider emits the same bytes as Flask's
+default one, then times both paths. The to_dict() side runs on transient
+objects, so it leaves out the ORM loading cost a real query adds.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from sqlalchemy import Boolean, DateTime, Float, Integer  # noqa: E402
+from sqlalchemy.dialects.postgresql import JSONB, UUID  # noqa: E402
+
+from models import serializers  # noqa: E402
+from services.json_provider import FastJSONProvider, orjson  # noqa: E402
+
+SERIALIZERS = [
+    serializers.NODE, serializers.EDGE, serializers.PHOTO, serializers.IR_PHOTO,
+    serializers.IR_SESSION, serializers.ISSUE, serializers.QUOTE, serializers.TASK, serializers.FORM,
+    serializers.ISSUE_TASK, serializers.TASK_SESSION, serializers.QUOTE_TASK, serializers.USER_TASK,
+]
+
+WORDS = ['panel', 'breaker', 'Square D', 'Eaton', 'Building 2, Room 114', 'hot spot', 'ok', 'n/a']
+
+
+def fake_value(rng, column, kind, non_ascii):
+    if kind != 'timestamp' and column.key != 'id' and rng.random() < 0.1:
+        return None
+    column_type = column.type
+    if isinstance(column_type, UUID):
+        return uuid.UUID(int=rng.getrandbits(128), version=4)
+    if isinstance(column_type, Boolean):
+        return rng.random() < 0.5
+    if isinstance(column_type, DateTime):
+        return datetime(2024, 1, 1) + timedelta(seconds=rng.randrange(60 * 60 * 24 * 900))
+    if isinstance(column_type, Float):
+        return rng.uniform(0, 5000)
+    if isinstance(column_type, Integer):
+        return rng.randrange(1000)
+    if isinstance(column_type, JSONB):
+        return {'answers': [{'q': n, 'a': rng.choice(WORDS)} for n in range(rng.randrange(6))],
+                'delta_t': round(rng.uniform(5, 80), 1)}
+    text = rng.choice(WORDS)
+    return text + ' – Zürich' if non_ascii and rng.random() < 0.05 else text
+
+
+def fake_rows(rng, serializer, count, non_ascii):
+    columns = [(column, kind) for column, (_, kind) in zip(serializer.columns, serializer.fields)]
+    return [tuple(fake_value(rng, column, kind, non_ascii) for column, kind in columns)
+            for _ in range(count)]
+
+
+def to_objects(serializer, rows):
+    names = [name for name, _ in serializer.fields]
+    return [serializer.model(**dict(zip(names, row))) for row in rows]
+
+
+def timed(f, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = f()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000, help='Rows per model')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement; the best is kept')
+    parser.add_argument('--non-ascii', action='store_true',
+                        help='Put non-ASCII text in some rows (exercises the stdlib fallback)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    app = Flask(__name__)
+    stdlib = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+    compact = {'separators': (',', ':')}
+    if orjson is None:
+        print("orjson is not installed; the provider falls back to the stdlib encoder")
+
+    print(f"{'model':<20} {'to_dict':>9} {'compiled':>9} {'json std':>9} {'json fast':>9} {'total x':>8}")
+    totals = [0.0, 0.0, 0.0, 0.0]
+    for serializer in SERIALIZERS:
+        rows = fake_rows(rng, serializer, args.rows, args.non_ascii)
+        objects = to_objects(serializer, rows)
+
+        to_dict_seconds, expected = timed(lambda: [o.to_dict() for o in objects], args.repeat)
+        compiled_seconds, actual = timed(lambda: serializer.dump(rows), args.repeat)
+        if actual != expected:
+            raise SystemExit(f"{serializer.model.__name__}: compiled output differs from to_dict()")
+
+        stdlib_seconds, stdlib_json = timed(lambda: stdlib.dumps(expected, **compact), args.repeat)
+        fast_seconds, fast_json = timed(lambda: fast.dumps(actual, **compact), args.repeat)
+        if stdlib_json != fast_json:
+            raise SystemExit(f"{serializer.model.__name__}: JSON differs from the default provider")
+
+        before, after = to_dict_seconds + stdlib_seconds, compiled_seconds + fast_seconds
+        totals = [t + s for t, s in zip(totals, (to_dict_seconds, compiled_seconds, stdlib_seconds, fast_seconds))]
+        print(f"{serializer.model.__name__:<20} {to_dict_seconds * 1000:>7.0f}ms {compiled_seconds * 1000:>7.0f}ms "
+              f"{stdlib_seconds * 1000:>7.0f}ms {fast_seconds * 1000:>7.0f}ms {before / after:>7.1f}x")
+
+    print(f"{'all models':<20} {totals[0] * 1000:>7.0f}ms {totals[1] * 1000:>7.0f}ms "
+          f"{totals[2] * 1000:>7.0f}ms {totals[3] * 1000:>7.0f}ms "
+          f"{(totals[0] + totals[2]) / (totals[1] + totals[3]):>7.1f}x")
+    print(json.dumps({'rows_per_model': args.rows, 'output_identical': True}))
+
+
+if __name__ == '__main__':
+    main()
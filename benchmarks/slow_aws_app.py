@@ -0,0 +1,44 @@
+"""The Flask app with its AWS clients replaced by fakes that just sleep.
+
+Served by gunicorn from benchmarks/slow_aws_load.py:
+
+    FAKE_AWS_LATENCY=0.2 gunicorn -c gunicorn.conf.py benchmarks.slow_aws_app:app
+"""
+import os
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+os.environ.setdefault('OUTBOX_INPROCESS_WORKER', 'false')
+
+from app import app  # noqa: E402
+from routes import auth_routes, device_routes  # noqa: E402
+
+LATENCY = float(os.getenv('FAKE_AWS_LATENCY', '0.2'))
+
+CANNED_RESPONSES = {
+    'initiate_auth': {
+        'AuthenticationResult': {
+            'AccessToken': 'access',
+            'IdToken': 'id',
+            'RefreshToken': 'refresh',
+            'ExpiresIn': 3600
+        }
+    },
+    'publish': {'MessageId': 'fake'}
+}
+
+
+class SlowFakeClient:
+    """Answers any API call after LATENCY seconds of blocking I/O"""
+
+    def __getattr__(self, operation):
+        def call(**kwargs):
+            time.sleep(LATENCY)
+            return CANNED_RESPONSES.get(operation, {})
+        return call
+
+
+# Patched at the accessor so the fakes also survive a preloaded fork
+_fake = SlowFakeClient()
+auth_routes.get_cognito_client = lambda: _fake
+device_routes.get_sns_client = lambda: _fake
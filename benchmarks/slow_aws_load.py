@@ -0,0 +1,118 @@
+"""Throughput of POST /auth/login when Cognito answers slowly.
+
+Starts gunicorn once per worker configuration with benchmarks.slow_aws_app
+(every AWS call sleeps FAKE_AWS_LATENCY seconds), fires requests from a
+pool of concurrent clients and prints requests/s and latency percentiles.
+
+    python benchmarks/slow_aws_load.py --latency 0.2 --concurrency 32 --requests 400
+
+Compare the sync and gthread rows: with sync workers throughput is capped
+at workers / latency; gthread raises that cap by the thread count.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import statistics
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGURATIONS = [
+    {'name': 'sync', 'GUNICORN_WORKER_CLASS': 'sync', 'GUNICORN_THREADS': '1'},
+    {'name': 'gthread', 'GUNICORN_WORKER_CLASS': 'gthread', 'GUNICORN_THREADS': '8'},
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except Exception:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+def login(base_url):
+    body = json.dumps({'email': 'load@example.com', 'password': 'secret'}).encode()
+    req = urllib.request.Request(f"{base_url}/auth/login", data=body,
+                                 headers={'Content-Type': 'application/json'})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=120) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - started
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run(config, args):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ,
+               GUNICORN_BIND=f"127.0.0.1:{port}",
+               GUNICORN_WORKERS=str(args.workers),
+               GUNICORN_WORKER_CLASS=config['GUNICORN_WORKER_CLASS'],
+               GUNICORN_THREADS=config['GUNICORN_THREADS'],
+               FAKE_AWS_LATENCY=str(args.latency))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'benchmarks.slow_aws_app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up(f"{base_url}/health")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(lambda _: login(base_url), range(args.requests)))
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = [latency for _, latency in results]
+    return {
+        'worker_class': config['name'],
+        'workers': args.workers,
+        'threads': int(config['GUNICORN_THREADS']),
+        'requests': len(results),
+        'errors': sum(1 for status, _ in results if status != 200),
+        'requests_per_second': round(len(results) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds each fake AWS call blocks')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=400)
+    args = parser.parse_args()
+
+    rows = [run(config, args) for config in CONFIGURATIONS]
+    print(json.dumps({'latency_seconds': args.latency, 'results': rows}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
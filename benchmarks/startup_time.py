@@ -0,0 +1,120 @@
+"""Cold start cost of the app: import time, client build time, gunicorn boot.
+
+    python benchmarks/startup_time.py --repeat 5 --workers 4
+
+Reports the median time to import app.py, the time to build the first AWS
+client in a fresh process, and for gunicorn with and without
+GUNICORN_PRELOAD the time until the first /health response plus the
+proportional memory (PSS) of the master and workers once they are up.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import statistics
+import urllib.request
+
+from slow_aws_load import free_port, wait_until_up, ROOT
+
+IMPORT_SNIPPET = """
+import time
+started = time.perf_counter()
+import app
+print(time.perf_counter() - started)
+"""
+
+CLIENT_SNIPPET = """
+import time
+import app
+from routes.auth_routes import get_cognito_client
+started = time.perf_counter()
+get_cognito_client()
+print(time.perf_counter() - started)
+"""
+
+
+def bench_env(**overrides):
+    env = dict(os.environ, **overrides)
+    env.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+    env.setdefault('OUTBOX_INPROCESS_WORKER', 'false')
+    return env
+
+
+def time_snippet(snippet, repeat):
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', snippet], cwd=ROOT, env=bench_env(),
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return round(statistics.median(samples) * 1000, 1)
+
+
+def pss_kib(pid):
+    """Proportional set size from /proc (Linux only); None when unavailable"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+def child_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def boot(preload, workers, settle):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = bench_env(GUNICORN_BIND=f"127.0.0.1:{port}",
+                    GUNICORN_WORKERS=str(workers),
+                    GUNICORN_PRELOAD='true' if preload else 'false')
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(f"{base_url}/health", timeout=120)
+        first_response = time.perf_counter() - started
+
+        # Let every worker finish booting and touch the code paths once
+        time.sleep(settle)
+        for _ in range(workers * 4):
+            urllib.request.urlopen(f"{base_url}/health", timeout=5).read()
+
+        pids = [server.pid] + child_pids(server.pid)
+        memory = [pss_kib(pid) for pid in pids]
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        'preload': preload,
+        'workers': workers,
+        'first_response_ms': round(first_response * 1000, 1),
+        'total_pss_mib': round(sum(memory) / 1024, 1) if None not in memory else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--settle', type=float, default=2.0, help='Seconds to wait for all workers')
+    args = parser.parse_args()
+
+    print(json.dumps({
+        'import_app_ms': time_snippet(IMPORT_SNIPPET, args.repeat),
+        'first_cognito_client_ms': time_snippet(CLIENT_SNIPPET, args.repeat),
+        'gunicorn': [boot(preload, args.workers, args.settle) for preload in (False, True)]
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
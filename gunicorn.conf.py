@@ -0,0 +1,70 @@
+"""Gunicorn settings, overridable through GUNICORN_* environment variables.
+
+The default gthread worker serves GUNICORN_THREADS requests concurrently per
+process, so a slow Cognito, SNS, Step Functions or S3 call holds one thread
+instead of a whole worker. Keep threads <= DB_POOL_SIZE + DB_MAX_OVERFLOW
+and <= AWS_MAX_POOL_CONNECTIONS. Set GUNICORN_WORKER_CLASS=sync to get the
+previous one-request-per-worker behaviour.
+
+With GUNICORN_PRELOAD=true the app is imported once in the master and the
+workers are forked from it. The master also parses the botocore models, and
+gc.freeze() keeps the garbage collector from touching (and so copying) the
+inherited objects, which keeps them shared between workers.
+"""
+import gc
+import os
+import glob
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false').lower() == 'true'
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG') or None
+
+PRELOAD_AWS_SERVICES = ['cognito-idp', 'sns', 'stepfunctions', 's3']
+
+
+def on_starting(server):
+    # Samples from a previous run would otherwise be aggregated into /metrics
+    multiproc_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(multiproc_dir, '*.db')):
+            os.remove(path)
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from services import aws
+    try:
+        aws.preload_service_models(PRELOAD_AWS_SERVICES)
+    except Exception as e:
+        server.log.warning("Could not preload AWS service models: %s", e)
+    gc.freeze()
+    server.log.info("Preloaded app; %d objects frozen for copy-on-write", gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    # Connections and clients must never be shared across processes
+    from app import app
+    from models.db import db
+    from services import aws
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    aws.reset_clients()
+
+
+def child_exit(server, worker):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,11 @@
+"""Create any tables declared in models that do not exist yet.
+
+Existing databases were set up with db.create_all(), so this only fills in
+missing tables. Later migrations must stay idempotent because a fresh
+database gets the current model definitions (indexes included) from here.
+"""
+from models.db import db
+
+
+def upgrade(connection):
+    db.metadata.create_all(bind=connection, checkfirst=True)
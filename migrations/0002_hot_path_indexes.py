@@ -0,0 +1,45 @@
+"""Index the sld_id, node/entity and mapping lookups used by the read routes.
+
+Built CONCURRENTLY so writes keep flowing on a live database. The partial
+indexes use `is_deleted IS NOT TRUE`, the predicate the soft-delete aware
+queries use (it also treats NULL as not deleted).
+"""
+from services.migrate import create_index_concurrently
+
+TRANSACTIONAL = False
+
+LIVE = 'is_deleted IS NOT TRUE'
+
+INDEXES = [
+    # /sld, /slddep, /tasks/<sld_id>, /ir_photos/<sld_id>
+    ('ix_nodes_sld_id', 'nodes', ['sld_id'], None),
+    ('ix_edges_sld_id', 'edges', ['sld_id'], None),
+    ('ix_photos_sld_id', 'photos', ['sld_id'], None),
+    ('ix_ir_photos_sld_id', 'ir_photos', ['sld_id'], None),
+    ('ix_ir_sessions_sld_id', 'ir_sessions', ['sld_id'], None),
+    ('ix_issues_sld_id', 'issues', ['sld_id'], None),
+    ('ix_quotes_sld_id', 'quotes', ['sld_id'], None),
+    ('ix_tasks_sld_id', 'tasks', ['sld_id'], None),
+
+    # /nodes/<node_id> (graph routes)
+    ('ix_photos_entity_id', 'photos', ['entity_id'], None),
+    ('ix_ir_photos_node_id', 'ir_photos', ['node_id'], None),
+    ('ix_issues_node_id', 'issues', ['node_id'], None),
+    ('ix_tasks_node_id', 'tasks', ['node_id'], None),
+
+    # Report generation reads only live rows of a session
+    ('ix_ir_photos_ir_session_id_live', 'ir_photos', ['ir_session_id'], LIVE),
+    ('ix_issues_session_id_live', 'issues', ['session_id'], LIVE),
+
+    # Mapping lookups; composite primary keys already cover their leading column
+    ('ix_mapping_issue_task_task_id', 'mapping_issue_task', ['task_id'], None),
+    ('ix_mapping_quote_task_task_id', 'mapping_quote_task', ['task_id'], None),
+    ('ix_mapping_task_session_task_id', 'mapping_task_session', ['task_id'], None),
+    ('ix_mapping_task_session_session_id', 'mapping_task_session', ['session_id'], None),
+    ('ix_mapping_user_task_task_id_user_id', 'mapping_user_task', ['task_id', 'user_id'], None),
+]
+
+
+def upgrade(connection):
+    for name, table, columns, where in INDEXES:
+        create_index_concurrently(connection, name, table, columns, where)
@@ -0,0 +1,37 @@
+"""Indexes for GET /nodes/search (services.node_search).
+
+* GIN (jsonb_path_ops) on nodes.core_attributes for containment filters;
+* node_attribute_number(attributes, name): the leading number of the named
+  attribute's value ("480V" -> 480), IMMUTABLE so it can be indexed, with
+  an expression index per attribute in node_search.INDEXED_ATTRIBUTES;
+* slds.company_id, to find a company's SLDs.
+"""
+from services.migrate import create_index_concurrently
+from services.node_search import INDEXED_ATTRIBUTES
+
+TRANSACTIONAL = False
+
+ATTRIBUTE_NUMBER_FUNCTION = r"""
+CREATE OR REPLACE FUNCTION node_attribute_number(attributes jsonb, attribute_name text)
+RETURNS double precision
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT substring(a ->> 'value' FROM '^\s*(-?\d+(?:\.\d+)?)')::double precision
+    FROM jsonb_array_elements(
+        CASE jsonb_typeof(attributes) WHEN 'array' THEN attributes ELSE '[]'::jsonb END
+    ) AS a
+    WHERE a ->> 'name' = attribute_name
+    LIMIT 1
+$$
+"""
+
+
+def upgrade(connection):
+    connection.exec_driver_sql(ATTRIBUTE_NUMBER_FUNCTION)
+
+    create_index_concurrently(connection, 'ix_slds_company_id', 'slds', ['company_id'])
+    create_index_concurrently(connection, 'ix_nodes_core_attributes', 'nodes',
+                              ['core_attributes jsonb_path_ops'], using='gin')
+    for name in INDEXED_ATTRIBUTES:
+        create_index_concurrently(connection, f"ix_nodes_attribute_{name}", 'nodes',
+                                  [f"(node_attribute_number(core_attributes, '{name}'))"])
@@ -0,0 +1,80 @@
+"""search_vector columns, triggers and indexes for GET /search (services.search).
+
+The columns are plain tsvector columns filled by BEFORE INSERT/UPDATE
+triggers rather than GENERATED columns, which would rewrite each table
+under an exclusive lock. Existing rows are backfilled in committed batches
+after the triggers exist, so rows written meanwhile are covered either way.
+Indexes are built CONCURRENTLY; pg_trgm provides the trigram indexes used
+for partial label and QR code matches.
+"""
+import logging
+
+from services.migrate import create_index_concurrently
+from services.search import SEARCH_VECTORS, SEARCH_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+TRANSACTIONAL = False
+
+BACKFILL_BATCH = 5000
+
+TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := {expression};
+    RETURN NEW;
+END
+$$
+"""
+
+TRIGGER = """
+CREATE TRIGGER {table}_search_vector
+BEFORE INSERT OR UPDATE OF {columns} ON {table}
+FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()
+"""
+
+BACKFILL = """
+UPDATE {table} AS t SET search_vector = {expression}
+FROM (SELECT id FROM {table} WHERE id > %(after)s ORDER BY id LIMIT %(batch)s) AS batch
+WHERE t.id = batch.id
+RETURNING t.id
+"""
+
+INDEXES = [
+    ('ix_nodes_search_vector', 'nodes', ['search_vector'], 'gin'),
+    ('ix_issues_search_vector', 'issues', ['search_vector'], 'gin'),
+    ('ix_tasks_search_vector', 'tasks', ['search_vector'], 'gin'),
+    ('ix_quotes_search_vector', 'quotes', ['search_vector'], 'gin'),
+    ('ix_nodes_label_trgm', 'nodes', ['label gin_trgm_ops'], 'gin'),
+    ('ix_nodes_qr_code_trgm', 'nodes', ['qr_code gin_trgm_ops'], 'gin'),
+]
+
+
+def backfill(connection, table):
+    expression = SEARCH_VECTORS[table].format(r='t.')
+    after = '00000000-0000-0000-0000-000000000000'
+    total = 0
+    while True:
+        ids = [row[0] for row in connection.exec_driver_sql(
+            BACKFILL.format(table=table, expression=expression), {'after': after, 'batch': BACKFILL_BATCH}
+        )]
+        if not ids:
+            break
+        after = str(max(ids))
+        total += len(ids)
+    logger.info("Backfilled search_vector for %d %s", total, table)
+
+
+def upgrade(connection):
+    connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    for table, expression in SEARCH_VECTORS.items():
+        connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector")
+        connection.exec_driver_sql(TRIGGER_FUNCTION.format(table=table, expression=expression.format(r='NEW.')))
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {table}_search_vector ON {table}")
+        connection.exec_driver_sql(TRIGGER.format(table=table, columns=', '.join(SEARCH_COLUMNS[table])))
+        backfill(connection, table)
+
+    for name, table, columns, using in INDEXES:
+        create_index_concurrently(connection, name, table, columns, using=using)
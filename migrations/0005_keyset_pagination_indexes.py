@@ -0,0 +1,28 @@
+"""Composite indexes matching the keyset pagination order of the list endpoints.
+
+Each index leads with the endpoint's filter and ends with its sort keys, so
+a page is one index range scan however deep the cursor is. The (sld_id, id)
+indexes replace the single-column sld_id ones from 0002, which they cover.
+"""
+from services.migrate import create_index_concurrently
+
+TRANSACTIONAL = False
+
+INDEXES = [
+    # /items
+    ('ix_items_timestamp_id', 'items', ['timestamp', 'id']),
+    # /users/?company_id=
+    ('ix_users_company_id_id', 'users', ['company_id', 'id']),
+    # /ir_photos/<sld_id>, /tasks/<sld_id>
+    ('ix_ir_photos_sld_id_id', 'ir_photos', ['sld_id', 'id']),
+    ('ix_tasks_sld_id_id', 'tasks', ['sld_id', 'id']),
+]
+
+SUPERSEDED = ['ix_ir_photos_sld_id', 'ix_tasks_sld_id']
+
+
+def upgrade(connection):
+    for name, table, columns in INDEXES:
+        create_index_concurrently(connection, name, table, columns)
+    for name in SUPERSEDED:
+        connection.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
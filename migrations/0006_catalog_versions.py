@@ -0,0 +1,38 @@
+"""catalog_versions and the triggers that bump it when a reference catalog changes.
+
+services.catalogs caches the serialized catalogs per worker and uses these
+versions to notice changes, including ones made outside the app (admin SQL,
+seed scripts). The statement-level triggers fire once per INSERT, UPDATE,
+DELETE or TRUNCATE, whatever the number of rows.
+"""
+from models import CatalogVersion
+from services.catalogs import CATALOG_TABLES
+
+BUMP_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO catalog_versions (name, version, updated_at) VALUES (TG_TABLE_NAME, 1, now())
+    ON CONFLICT (name) DO UPDATE SET version = catalog_versions.version + 1, updated_at = now();
+    RETURN NULL;
+END
+$$
+"""
+
+TRIGGER = """
+CREATE TRIGGER {table}_catalog_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()
+"""
+
+
+def upgrade(connection):
+    CatalogVersion.__table__.create(bind=connection, checkfirst=True)
+    connection.exec_driver_sql(BUMP_FUNCTION)
+    for table in CATALOG_TABLES:
+        connection.exec_driver_sql(
+            "INSERT INTO catalog_versions (name, version, updated_at) VALUES (%(name)s, 1, now()) "
+            "ON CONFLICT (name) DO NOTHING", {'name': table}
+        )
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {table}_catalog_version ON {table}")
+        connection.exec_driver_sql(TRIGGER.format(table=table))
@@ -0,0 +1,33 @@
+"""Partial indexes over live rows for the soft-delete filtered reads.
+
+GET requests now add `is_deleted IS NOT TRUE` to every soft-deletable
+table they read (services.visibility). These indexes carry that predicate,
+so live reads scan only live index entries however many tombstones a site
+has collected. The full indexes stay for ?include_deleted=true reads, the
+tombstone ids of GET /sld and the write paths.
+"""
+from services.migrate import create_index_concurrently
+
+TRANSACTIONAL = False
+
+LIVE = 'is_deleted IS NOT TRUE'
+
+INDEXES = [
+    # /sld, /slddep
+    ('ix_nodes_sld_id_live', 'nodes', ['sld_id']),
+    ('ix_edges_sld_id_live', 'edges', ['sld_id']),
+    ('ix_photos_sld_id_live', 'photos', ['sld_id']),
+    ('ix_issues_sld_id_live', 'issues', ['sld_id']),
+    ('ix_quotes_sld_id_live', 'quotes', ['sld_id']),
+    # /sld and the paged /ir_photos/<sld_id>, /tasks/<sld_id>
+    ('ix_ir_photos_sld_id_id_live', 'ir_photos', ['sld_id', 'id']),
+    ('ix_tasks_sld_id_id_live', 'tasks', ['sld_id', 'id']),
+    # /users/?company_id=, company scoped searches
+    ('ix_users_company_id_id_live', 'users', ['company_id', 'id']),
+    ('ix_slds_company_id_live', 'slds', ['company_id']),
+]
+
+
+def upgrade(connection):
+    for name, table, columns in INDEXES:
+        create_index_concurrently(connection, name, table, columns, LIVE)
@@ -0,0 +1,103 @@
+"""deleted_at, archive tables and indexes for the purge job (services.purge).
+
+deleted_at is set by a trigger whenever is_deleted turns true (and cleared
+when a row is restored), so it also covers writes made outside the app.
+Rows that were already deleted get the migration time, which starts their
+retention window now. The backfill walks each table in primary key order in
+committed batches.
+
+The <table>_archive tables copy the columns of their source table (no
+indexes or constraints) plus archived_at.
+"""
+import logging
+
+from models import db
+from services.migrate import create_index_concurrently
+from services.purge import PURGE_TABLES, ARCHIVE_TABLES
+
+logger = logging.getLogger(__name__)
+
+TRANSACTIONAL = False
+
+BACKFILL_BATCH = 5000
+
+TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION set_deleted_at() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF NEW.is_deleted IS TRUE THEN
+        IF TG_OP = 'INSERT' OR OLD.is_deleted IS NOT TRUE THEN
+            NEW.deleted_at := now();
+        END IF;
+    ELSE
+        NEW.deleted_at := NULL;
+    END IF;
+    RETURN NEW;
+END
+$$
+"""
+
+TRIGGER = """
+CREATE TRIGGER {table}_deleted_at
+BEFORE INSERT OR UPDATE OF is_deleted ON {table}
+FOR EACH ROW EXECUTE FUNCTION set_deleted_at()
+"""
+
+BACKFILL = """
+WITH batch AS (
+    SELECT {keys} FROM {table} {after} ORDER BY {keys} LIMIT %(batch)s
+), updated AS (
+    UPDATE {table} AS t SET deleted_at = now()
+    FROM batch
+    WHERE ({t_keys}) = ({batch_keys}) AND t.is_deleted IS TRUE AND t.deleted_at IS NULL
+    RETURNING 1
+)
+SELECT {keys}, (SELECT count(*) FROM updated) FROM batch ORDER BY {keys} DESC LIMIT 1
+"""
+
+INDEXES = [
+    # The purge scans: only deleted rows are indexed
+    *[(f"ix_{table}_deleted_at", table, ['deleted_at'], 'is_deleted IS TRUE') for table in PURGE_TABLES],
+    # Closed IR sessions and all of their photos, deleted or not
+    ('ix_ir_sessions_date_closed', 'ir_sessions', ['date_closed'], 'date_closed IS NOT NULL'),
+    ('ix_ir_photos_ir_session_id', 'ir_photos', ['ir_session_id'], None),
+]
+
+
+def backfill(connection, table):
+    keys = [column.name for column in db.Model.metadata.tables[table].primary_key.columns]
+    after = None
+    total = 0
+    while True:
+        params = {'batch': BACKFILL_BATCH}
+        where = ''
+        if after is not None:
+            params.update({f"k{index}": str(value) for index, value in enumerate(after)})
+            where = f"WHERE ({', '.join(keys)}) > ({', '.join(f'%(k{i})s' for i in range(len(keys)))})"
+        row = connection.exec_driver_sql(BACKFILL.format(
+            table=table, keys=', '.join(keys), after=where,
+            t_keys=', '.join(f"t.{key}" for key in keys), batch_keys=', '.join(f"batch.{key}" for key in keys)
+        ), params).first()
+        if row is None:
+            break
+        after = row[:-1]
+        total += row[-1]
+    logger.info("Backfilled deleted_at for %d %s", total, table)
+
+
+def upgrade(connection):
+    connection.exec_driver_sql(TRIGGER_FUNCTION)
+    for table in PURGE_TABLES:
+        connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS deleted_at timestamptz")
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {table}_deleted_at ON {table}")
+        connection.exec_driver_sql(TRIGGER.format(table=table))
+        backfill(connection, table)
+
+    for table in ARCHIVE_TABLES:
+        connection.exec_driver_sql(f"CREATE TABLE IF NOT EXISTS {table}_archive (LIKE {table})")
+        connection.exec_driver_sql(
+            f"ALTER TABLE {table}_archive ADD COLUMN IF NOT EXISTS archived_at timestamptz NOT NULL DEFAULT now()"
+        )
+
+    for name, table, columns, where in INDEXES:
+        create_index_concurrently(connection, name, table, columns, where)
@@ -0,0 +1,149 @@
+"""Partition ir_photos by date_created and tasks by created_at, by month.
+
+A table cannot be partitioned in place and copying either one would take
+too long on a live database, so each existing table becomes the first
+partition of a new parent:
+
+1. The table gets CHECK (key < B), B being the start of the month after
+   next, added NOT VALID and then validated without blocking writes, and a
+   unique (id, key) constraint built concurrently for the parent's primary
+   key.
+2. Its indexes are renamed <name>_legacy, and an empty parent is created
+   with the same columns, indexes (under the original names) and triggers,
+   plus a default partition.
+3. One short transaction swaps the names and attaches the old table as
+   <table>_legacy FOR VALUES FROM (MINVALUE) TO (B). The validated check
+   spares the attach a scan, and the renamed indexes are attached to the
+   parent's instead of being rebuilt.
+4. Monthly partitions from B on are created by services.partitions.
+
+Row triggers on partitioned tables need PostgreSQL 13. The primary key is
+now (id, key): ids stay unique because they are uuid4s, but the database
+can no longer enforce it across partitions.
+
+Each step checks what an interrupted run already did, so the migration
+can be re-run.
+"""
+import re
+import logging
+
+from sqlalchemy import text
+
+from services.migrate import create_index_concurrently
+from services.partitions import PARTITIONED_TABLES, ensure_partitions, is_partitioned
+
+logger = logging.getLogger(__name__)
+
+TRANSACTIONAL = False
+
+SWAP_LOCK_TIMEOUT_MS = 10000
+
+LEGACY_BOUND = "SELECT date_trunc('month', now() AT TIME ZONE 'utc') + interval '2 months'"
+
+CONSTRAINT_DEF = """
+SELECT pg_get_constraintdef(oid) FROM pg_constraint
+WHERE conrelid = to_regclass(:table) AND conname = :name
+"""
+
+INDEXES = """
+SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+WHERE x.indrelid = to_regclass(:table) AND NOT x.indisprimary AND i.relname <> :key_index
+ORDER BY i.relname
+"""
+
+PRIMARY_KEY_INDEX = """
+SELECT i.relname FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+WHERE x.indrelid = to_regclass(:table) AND x.indisprimary
+"""
+
+TRIGGERS = """
+SELECT tgname, pg_get_triggerdef(oid) FROM pg_trigger
+WHERE tgrelid = to_regclass(:table) AND NOT tgisinternal
+ORDER BY tgname
+"""
+
+
+def _on_table(definition, table, new_table):
+    """definition (of an index or trigger) rewritten to apply to new_table"""
+    return re.sub(rf" ON ((?:\w+\.)?){table} ", rf" ON \g<1>{new_table} ", definition, count=1)
+
+
+def legacy_bound(connection, table, key):
+    """B: the bound check of an earlier run, or a new one added NOT VALID"""
+    name = f"{table}_legacy_bound"
+    definition = connection.execute(text(CONSTRAINT_DEF), {'table': table, 'name': name}).scalar()
+    if definition:
+        return re.search(r"'([^']+)'", definition).group(1)
+
+    bound = f"{connection.execute(text(LEGACY_BOUND)).scalar():%Y-%m-%d}"
+    connection.exec_driver_sql(f"ALTER TABLE {table} ADD CONSTRAINT {name} CHECK ({key} < '{bound}') NOT VALID")
+    return bound
+
+
+def prepare_legacy(connection, table, key):
+    """Step 1: the bound check and the (id, key) unique constraint"""
+    bound = legacy_bound(connection, table, key)
+    connection.exec_driver_sql(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_legacy_bound")
+
+    key_index = f"{table}_id_{key}_key"
+    create_index_concurrently(connection, key_index, table, ['id', key], unique=True)
+    exists = connection.execute(text(CONSTRAINT_DEF), {'table': table, 'name': key_index}).scalar()
+    if not exists:
+        connection.exec_driver_sql(f"ALTER TABLE {table} ADD CONSTRAINT {key_index} UNIQUE USING INDEX {key_index}")
+    return bound, key_index
+
+
+def create_parent(connection, table, key, key_index):
+    """Step 2: the empty partitioned parent, mirroring the table's indexes and triggers"""
+    parent = f"{table}_partitioned"
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {parent} CASCADE")
+    connection.exec_driver_sql(
+        f"CREATE TABLE {parent} (LIKE {table} INCLUDING DEFAULTS, PRIMARY KEY (id, {key})) "
+        f"PARTITION BY RANGE ({key})"
+    )
+    connection.exec_driver_sql(f"CREATE TABLE {table}_default PARTITION OF {parent} DEFAULT")
+
+    for name, definition in connection.execute(text(INDEXES), {'table': table, 'key_index': key_index}).all():
+        original = name[:-len('_legacy')] if name.endswith('_legacy') else name
+        if name == original:
+            connection.exec_driver_sql(f"ALTER INDEX {name} RENAME TO {name}_legacy")
+        definition = definition.replace(f"INDEX {name} ON", f"INDEX {original} ON", 1)
+        connection.exec_driver_sql(_on_table(definition, table, parent))
+
+    triggers = connection.execute(text(TRIGGERS), {'table': table}).all()
+    for name, definition in triggers:
+        connection.exec_driver_sql(_on_table(definition, table, parent))
+    return [name for name, _ in triggers]
+
+
+def swap(connection, table, bound, triggers):
+    """Step 3: make the parent the table and attach the old table to it"""
+    parent = f"{table}_partitioned"
+    legacy = f"{table}_legacy"
+    with connection.engine.begin() as transaction:
+        transaction.exec_driver_sql(f"SET LOCAL lock_timeout = {SWAP_LOCK_TIMEOUT_MS}")
+        transaction.exec_driver_sql(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        primary_key = transaction.execute(text(PRIMARY_KEY_INDEX), {'table': table}).scalar()
+        transaction.exec_driver_sql(f"ALTER TABLE {table} RENAME TO {legacy}")
+        transaction.exec_driver_sql(f"ALTER INDEX {primary_key} RENAME TO {legacy}_pkey")
+        # The parent's triggers are cloned onto the partition when it is attached
+        for name in triggers:
+            transaction.exec_driver_sql(f"DROP TRIGGER {name} ON {legacy}")
+        transaction.exec_driver_sql(f"ALTER TABLE {parent} RENAME TO {table}")
+        transaction.exec_driver_sql(f"ALTER INDEX {parent}_pkey RENAME TO {table}_pkey")
+        transaction.exec_driver_sql(
+            f"ALTER TABLE {table} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO ('{bound}')"
+        )
+
+
+def upgrade(connection):
+    for table, key in PARTITIONED_TABLES.items():
+        if is_partitioned(connection, table):
+            logger.info("%s is already partitioned", table)
+            continue
+        bound, key_index = prepare_legacy(connection, table, key)
+        triggers = create_parent(connection, table, key, key_index)
+        swap(connection, table, bound, triggers)
+        logger.info("Partitioned %s by %s; existing rows are in %s_legacy", table, key, table)
+
+    ensure_partitions(connection)
@@ -0,0 +1,6 @@
+"""idempotency_keys, the stored outcomes of Idempotency-Key requests (services.idempotency)."""
+from models import IdempotencyKey
+
+
+def upgrade(connection):
+    IdempotencyKey.__table__.create(bind=connection, checkfirst=True)
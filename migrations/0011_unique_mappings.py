@@ -0,0 +1,36 @@
+"""Unique (task_id, session_id) and (task_id, user_id) for the mapping upserts (services.mappings).
+
+INSERT ... ON CONFLICT needs a unique index to conflict on. The composite
+primary keys of mapping_issue_task and mapping_quote_task already are one;
+mapping_task_session and mapping_user_task had none and collected
+duplicates. Duplicates are removed first, keeping a live row over a
+deleted one. The unique indexes are then built concurrently and replace
+the plain task_id indexes they cover. If rows written between the two
+steps make the build fail, re-running the migration deduplicates again.
+"""
+from services.migrate import create_index_concurrently
+
+TRANSACTIONAL = False
+
+DEDUPE = """
+DELETE FROM {table} AS t USING (
+    SELECT ctid, row_number() OVER (PARTITION BY {keys} ORDER BY is_deleted IS TRUE, id) AS n
+    FROM {table}
+) AS ranked
+WHERE t.ctid = ranked.ctid AND ranked.n > 1
+"""
+
+UNIQUE = [
+    ('uq_mapping_task_session_task_id_session_id', 'mapping_task_session', ['task_id', 'session_id']),
+    ('uq_mapping_user_task_task_id_user_id', 'mapping_user_task', ['task_id', 'user_id']),
+]
+
+SUPERSEDED = ['ix_mapping_task_session_task_id', 'ix_mapping_user_task_task_id_user_id']
+
+
+def upgrade(connection):
+    for name, table, columns in UNIQUE:
+        connection.exec_driver_sql(DEDUPE.format(table=table, keys=', '.join(columns)))
+        create_index_concurrently(connection, name, table, columns, unique=True)
+    for name in SUPERSEDED:
+        connection.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
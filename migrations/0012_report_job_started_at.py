@@ -0,0 +1,9 @@
+"""report_jobs.started_at, the time the current execution of a report job was queued.
+
+Report backends use it to fail executions that never started or never
+finished. Existing jobs fall back to created_at.
+"""
+
+
+def upgrade(connection):
+    connection.exec_driver_sql("ALTER TABLE report_jobs ADD COLUMN IF NOT EXISTS started_at timestamptz")
@@ -0,0 +1,9 @@
+"""report_jobs.device_endpoints, the devices notified when a report job succeeds.
+
+Devices that join a running job are recorded here so they are notified
+too, not only the device that started it (services.reports.notify).
+"""
+
+
+def upgrade(connection):
+    connection.exec_driver_sql("ALTER TABLE report_jobs ADD COLUMN IF NOT EXISTS device_endpoints jsonb")
@@ -0,0 +1 @@
+"""Numbered schema migrations, applied in order by services.migrate."""
@@ -0,0 +1,20 @@
+from datetime import datetime, timezone
+from .db import db
+
+class CatalogVersion(db.Model):
+    __tablename__ = 'catalog_versions'
+    name = db.Column(
+        db.String,
+        primary_key=True
+    )
+    # Bumped by a trigger on every change to the catalog table (migration 0006)
+    version = db.Column(
+        db.BigInteger,
+        nullable=False,
+        default=1
+    )
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
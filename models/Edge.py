@@ -4,6 +4,11 @@ from .db import db
 
 class Edge(db.Model):
     __tablename__ = 'edges'
+    __table_args__ = (
+        db.Index('ix_edges_sld_id', 'sld_id'),
+        db.Index('ix_edges_sld_id_live', 'sld_id', postgresql_where=db.text('is_deleted IS NOT TRUE')),
+        db.Index('ix_edges_deleted_at', 'deleted_at', postgresql_where=db.text('is_deleted IS TRUE')),
+    )
     id = db.Column(
         UUID(as_uuid=True),
         primary_key=True,
@@ -13,6 +18,8 @@ class Edge(db.Model):
     target = db.Column(UUID(as_uuid=True))
     sld_id = db.Column(UUID(as_uuid=True))
     is_deleted = db.Column(db.Boolean)
+    # Set by a trigger when is_deleted turns true (migration 0008)
+    deleted_at = db.Column(db.DateTime(timezone=True))
     core_attributes = db.Column(JSONB)
     edge_class = db.Column(UUID(as_uuid=True))
 
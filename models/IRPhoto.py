@@ -5,6 +5,16 @@ from .db import db
 
 class IRPhoto(db.Model):
     __tablename__ = 'ir_photos'
+    # Range partitioned by month on date_created (migration 0009, services.partitions);
+    # the table's primary key is (id, date_created)
+    __table_args__ = (
+        db.Index('ix_ir_photos_sld_id_id', 'sld_id', 'id'),
+        db.Index('ix_ir_photos_sld_id_id_live', 'sld_id', 'id', postgresql_where=db.text('is_deleted IS NOT TRUE')),
+        db.Index('ix_ir_photos_node_id', 'node_id'),
+        db.Index('ix_ir_photos_ir_session_id', 'ir_session_id'),
+        db.Index('ix_ir_photos_ir_session_id_live', 'ir_session_id', postgresql_where=db.text('is_deleted IS NOT TRUE')),
+        db.Index('ix_ir_photos_deleted_at', 'deleted_at', postgresql_where=db.text('is_deleted IS TRUE')),
+    )
     id = db.Column(
         UUID(as_uuid=True),
         primary_key=True,
@@ -30,6 +40,8 @@ class IRPhoto(db.Model):
         UUID(as_uuid=True)
     )
     is_deleted = db.Column(db.Boolean)
+    # Set by a trigger when is_deleted turns true (migration 0008)
+    deleted_at = db.Column(db.DateTime(timezone=True))
 
     def to_dict(self):
         ts = (
@@ -5,6 +5,10 @@ from .db import db
 
 class IRSession(db.Model):
     __tablename__ = 'ir_sessions'
+    __table_args__ = (
+        db.Index('ix_ir_sessions_sld_id', 'sld_id'),
+        db.Index('ix_ir_sessions_date_closed', 'date_closed', postgresql_where=db.text('date_closed IS NOT NULL')),
+    )
     id = db.Column(
         UUID(as_uuid=True),
         primary_key=True,
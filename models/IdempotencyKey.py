@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+from .db import db
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.Index('ix_idempotency_keys_created_at', 'created_at'),
+    )
+    key = db.Column(
+        db.String(255),
+        primary_key=True
+    )
+    endpoint = db.Column(
+        db.String(100),
+        primary_key=True
+    )
+    # sha256 of the request body, to refuse a key reused for a different request
+    request_hash = db.Column(
+        db.String(64),
+        nullable=False
+    )
+    # Null while the first request is still running
+    status_code = db.Column(db.SmallInteger)
+    response_body = db.Column(db.LargeBinary)
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
@@ -1,10 +1,18 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from .db import db
 
 class Issue(db.Model):
     __tablename__ = 'issues'
+    __table_args__ = (
+        db.Index('ix_issues_sld_id', 'sld_id'),
+        db.Index('ix_issues_sld_id_live', 'sld_id', postgresql_where=db.text('is_deleted IS NOT TRUE')),
+        db.Index('ix_issues_node_id', 'node_id'),
+        db.Index('ix_issues_session_id_live', 'session_id', postgresql_where=db.text('is_deleted IS NOT TRUE')),
+        db.Index('ix_issues_search_vector', 'search_vector', postgresql_using='gin'),
+        db.Index('ix_issues_deleted_at', 'deleted_at', postgresql_where=db.text('is_deleted IS TRUE')),
+    )
     
     id = db.Column(
         UUID(as_uuid=True),
@@ -30,6 +38,8 @@ class Issue(db.Model):
         db.Boolean,
         default=False
     )
+    # Set by a trigger when is_deleted turns true (migration 0008)
+    deleted_at = db.Column(db.DateTime(timezone=True))
     session_id = db.Column(
         UUID(as_uuid=True)
     )
@@ -45,6 +55,8 @@ class Issue(db.Model):
         default=datetime.utcnow,
         onupdate=datetime.utcnow
     )
+    # Maintained by a trigger (migration 0004); deferred so ORM loads skip it
+    search_vector = db.deferred(db.Column(TSVECTOR))
 
     def to_dict(self):
         created_ts = (
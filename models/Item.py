@@ -5,6 +5,9 @@ from .db import db
 
 class Item(db.Model):
     __tablename__ = 'items'
+    __table_args__ = (
+        db.Index('ix_items_timestamp_id', 'timestamp', 'id'),
+    )
     id = db.Column(
         UUID(as_uuid=True),
         primary_key=True,
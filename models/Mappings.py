@@ -4,6 +4,10 @@ from .db import db
 
 class MappingIssueTask(db.Model):
     __tablename__ = 'mapping_issue_task'
+    __table_args__ = (
+        db.Index('ix_mapping_issue_task_task_id', 'task_id'),
+        db.Index('ix_mapping_issue_task_deleted_at', 'deleted_at', postgresql_where=db.text('is_deleted IS TRUE')),
+    )
     
     issue_id = db.Column(
         UUID(as_uuid=True),
@@ -14,6 +18,8 @@ class MappingIssueTask(db.Model):
         primary_key=True
     )
     is_deleted = db.Column(db.Boolean)
+    # Set by a trigger when is_deleted turns true (migration 0008)
+    deleted_at = db.Column(db.DateTime(timezone=True))
     
     def to_dict(self):
         return {
@@ -24,6 +30,11 @@ class MappingIssueTask(db.Model):
 
 class MappingTaskSession(db.Model):
     __tablename__ = 'mapping_task_session'
+    __table_args__ = (
+        db.Index('uq_mapping_task_session_task_id_session_id', 'task_id', 'session_id', unique=True),
+        db.Index('ix_mapping_task_session_session_id', 'session_id'),
+        db.Index('ix_mapping_task_session_deleted_at', 'deleted_at', postgresql_where=db.text('is_deleted IS TRUE')),
+    )
 
     # New standalone primary key
     id = db.Column(
@@ -43,6 +54,8 @@ class MappingTaskSession(db.Model):
     )
 
     is_deleted = db.Column(db.Boolean, default=False, nullable=False)
+    # Set by a trigger when is_deleted turns true (migration 0008)
+    deleted_at = db.Column(db.DateTime(timezone=True))
 
     def to_dict(self):
         return {
@@ -54,6 +67,10 @@ class MappingTaskSession(db.Model):
 
 class MappingQuoteTask(db.Model):
     __tablename__ = 'mapping_quote_task'
+    __table_args__ = (
+        db.Index('ix_mapping_quote_task_task_id', 'task_id'),
+        db.Index('ix_mapping_quote_task_deleted_at', 'deleted_at', postgresql_where=db.text('is_deleted IS TRUE')),
+    )
     
     quote_id = db.Column(
         UUID(as_uuid=True),
@@ -64,6 +81,8 @@ class MappingQuoteTask(db.Model):
         primary_key=True
     )
     is_deleted = db.Column(db.Boolean)
+    # Set by a trigger when is_deleted turns true (migration 0008)
+    deleted_at = db.Column(db.DateTime(timezone=True))
     
     def to_dict(self):
         return {
@@ -74,12 +93,18 @@ class MappingQuoteTask(db.Model):
 
 class MappingUserTask(db.Model):
     __tablename__ = 'mapping_user_task'
+    __table_args__ = (
+        db.Index('uq_mapping_user_task_task_id_user_id', 'task_id', 'user_id', unique=True),
+        db.Index('ix_mapping_user_task_deleted_at', 'deleted_at', postgresql_where=db.text('is_deleted IS TRUE')),
+    )
     
     id = db.Column(UUID(as_uuid=True), primary_key=True)
     user_id = db.Column(UUID(as_uuid=True), nullable=False)
     task_id = db.Column(UUID(as_uuid=True), nullable=False)
     mapping_type = db.Column(db.String, nullable=True)
     is_deleted = db.Column(db.Boolean)
+    # Set by a trigger when is_deleted turns true (migration 0008)
+    deleted_at = db.Column(db.DateTime(timezone=True))
     
     def to_dict(self):
         return {
@@ -1,9 +1,18 @@
 import uuid
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from .db import db
 
 class Node(db.Model):
     __tablename__ = 'nodes'
+    __table_args__ = (
+        db.Index('ix_nodes_sld_id', 'sld_id'),
+        db.Index('ix_nodes_sld_id_live', 'sld_id', postgresql_where=db.text('is_deleted IS NOT TRUE')),
+        # Attribute search; the per-attribute expression indexes are in migration 0003
+        db.Index('ix_nodes_core_attributes', 'core_attributes',
+                 postgresql_using='gin', postgresql_ops={'core_attributes': 'jsonb_path_ops'}),
+        db.Index('ix_nodes_search_vector', 'search_vector', postgresql_using='gin'),
+        db.Index('ix_nodes_deleted_at', 'deleted_at', postgresql_where=db.text('is_deleted IS TRUE')),
+    )
     id = db.Column(
         UUID(as_uuid=True),
         primary_key=True,
@@ -22,6 +31,8 @@ class Node(db.Model):
     width = db.Column(db.Float)
     height = db.Column(db.Float)
     is_deleted = db.Column(db.Boolean)
+    # Set by a trigger when is_deleted turns true (migration 0008)
+    deleted_at = db.Column(db.DateTime(timezone=True))
     location = db.Column(db.String)
     node_class = db.Column(
         UUID(as_uuid=True)
@@ -29,6 +40,8 @@ class Node(db.Model):
     core_attributes = db.Column(JSONB)
     com = db.Column(db.Integer)
     qr_code = db.Column(db.String)
+    # Maintained by a trigger (migration 0004); deferred so ORM loads skip it
+    search_vector = db.deferred(db.Column(TSVECTOR))
 
     def to_dict(self):
         return {
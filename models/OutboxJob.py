@@ -0,0 +1,67 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from .db import db
+
+class OutboxJob(db.Model):
+    __tablename__ = 'outbox_jobs'
+    __table_args__ = (
+        db.Index('ix_outbox_jobs_claimable', 'status', 'available_at'),
+    )
+
+    id = db.Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4
+    )
+    kind = db.Column(
+        db.String,
+        nullable=False
+    )
+    payload = db.Column(
+        JSONB,
+        nullable=False,
+        default=dict
+    )
+    # pending -> running -> done, or failed once attempts are exhausted
+    status = db.Column(
+        db.String(20),
+        nullable=False,
+        default='pending'
+    )
+    attempts = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0
+    )
+    available_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
+    locked_until = db.Column(db.DateTime(timezone=True))
+    result = db.Column(JSONB)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
+    completed_at = db.Column(db.DateTime(timezone=True))
+
+    def to_dict(self):
+        def format_dt(dt):
+            return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ') if dt else None
+
+        return {
+            'id': str(self.id),
+            'kind': self.kind,
+            'payload': self.payload,
+            'status': self.status,
+            'attempts': self.attempts,
+            'available_at': format_dt(self.available_at),
+            'result': self.result,
+            'last_error': self.last_error,
+            'created_at': format_dt(self.created_at),
+            'completed_at': format_dt(self.completed_at)
+        }
@@ -4,6 +4,12 @@ from .db import db
 
 class Photo(db.Model):
     __tablename__ = 'photos'
+    __table_args__ = (
+        db.Index('ix_photos_sld_id', 'sld_id'),
+        db.Index('ix_photos_sld_id_live', 'sld_id', postgresql_where=db.text('is_deleted IS NOT TRUE')),
+        db.Index('ix_photos_entity_id', 'entity_id'),
+        db.Index('ix_photos_deleted_at', 'deleted_at', postgresql_where=db.text('is_deleted IS TRUE')),
+    )
     id = db.Column(
         UUID(as_uuid=True),
         primary_key=True,
@@ -17,6 +23,8 @@ class Photo(db.Model):
     local_filepath = db.Column(db.String)
     filename = db.Column(db.String)
     is_deleted = db.Column(db.Boolean)
+    # Set by a trigger when is_deleted turns true (migration 0008)
+    deleted_at = db.Column(db.DateTime(timezone=True))
 
     def to_dict(self):
         return {
@@ -1,12 +1,18 @@
 import uuid
 import json
-from sqlalchemy.dialects.postgresql import UUID, JSONB 
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from datetime import datetime, timezone
 from dateutil.relativedelta import relativedelta
 from .db import db
 
 class Quote(db.Model):
     __tablename__ = 'quotes'
+    __table_args__ = (
+        db.Index('ix_quotes_sld_id', 'sld_id'),
+        db.Index('ix_quotes_sld_id_live', 'sld_id', postgresql_where=db.text('is_deleted IS NOT TRUE')),
+        db.Index('ix_quotes_search_vector', 'search_vector', postgresql_using='gin'),
+        db.Index('ix_quotes_deleted_at', 'deleted_at', postgresql_where=db.text('is_deleted IS TRUE')),
+    )
     
     id = db.Column(
         UUID(as_uuid=True),
@@ -36,6 +42,10 @@ class Quote(db.Model):
         db.Boolean,
         default=False
     )
+    # Set by a trigger when is_deleted turns true (migration 0008)
+    deleted_at = db.Column(db.DateTime(timezone=True))
+    # Maintained by a trigger (migration 0004); deferred so ORM loads skip it
+    search_vector = db.deferred(db.Column(TSVECTOR))
 
     def to_dict(self):
         created_ts = (
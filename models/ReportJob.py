@@ -0,0 +1,82 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from .db import db
+
+class ReportJob(db.Model):
+    __tablename__ = 'report_jobs'
+    __table_args__ = (
+        db.UniqueConstraint(
+            'ir_session_id', 'report_type', 'content_version',
+            name='uq_report_jobs_session_type_version'
+        ),
+    )
+
+    id = db.Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4
+    )
+    ir_session_id = db.Column(
+        UUID(as_uuid=True),
+        nullable=False
+    )
+    report_type = db.Column(
+        db.String,
+        nullable=False
+    )
+    # Fingerprint of the session's photos and issues when the report was requested
+    content_version = db.Column(
+        db.String(64),
+        nullable=False
+    )
+    # queued -> running -> succeeded | failed
+    status = db.Column(
+        db.String(20),
+        nullable=False,
+        default='queued'
+    )
+    execution_arn = db.Column(db.String(500))
+    output = db.Column(JSONB)
+    error = db.Column(db.Text)
+    # Devices to notify when the current run succeeds (services.reports.notify)
+    device_endpoints = db.Column(JSONB)
+    request_count = db.Column(
+        db.Integer,
+        nullable=False,
+        default=1
+    )
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc)
+    )
+    # When the current execution was queued; a failed job restarts with a new one
+    started_at = db.Column(db.DateTime(timezone=True))
+    last_polled_at = db.Column(db.DateTime(timezone=True))
+    completed_at = db.Column(db.DateTime(timezone=True))
+
+    def to_dict(self):
+        def format_dt(dt):
+            return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ') if dt else None
+
+        return {
+            'id': str(self.id),
+            'ir_session_id': str(self.ir_session_id),
+            'type': self.report_type,
+            'content_version': self.content_version,
+            'status': self.status,
+            'execution_arn': self.execution_arn,
+            'output': self.output,
+            'error': self.error,
+            'request_count': self.request_count,
+            'created_at': format_dt(self.created_at),
+            'updated_at': format_dt(self.updated_at),
+            'started_at': format_dt(self.started_at),
+            'completed_at': format_dt(self.completed_at)
+        }
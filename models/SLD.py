@@ -5,6 +5,10 @@ from .db import db
 
 class SLD(db.Model):
     __tablename__ = 'slds'
+    __table_args__ = (
+        db.Index('ix_slds_company_id', 'company_id'),
+        db.Index('ix_slds_company_id_live', 'company_id', postgresql_where=db.text('is_deleted IS NOT TRUE')),
+    )
     id = db.Column(
         UUID(as_uuid=True),
         primary_key=True,
@@ -1,11 +1,20 @@
 import uuid
 import json
 from datetime import datetime, timezone
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from .db import db
 
 class Task(db.Model):
     __tablename__ = 'tasks'
+    # Range partitioned by month on created_at (migration 0009, services.partitions);
+    # the table's primary key is (id, created_at)
+    __table_args__ = (
+        db.Index('ix_tasks_sld_id_id', 'sld_id', 'id'),
+        db.Index('ix_tasks_sld_id_id_live', 'sld_id', 'id', postgresql_where=db.text('is_deleted IS NOT TRUE')),
+        db.Index('ix_tasks_node_id', 'node_id'),
+        db.Index('ix_tasks_search_vector', 'search_vector', postgresql_using='gin'),
+        db.Index('ix_tasks_deleted_at', 'deleted_at', postgresql_where=db.text('is_deleted IS TRUE')),
+    )
     id = db.Column(
         UUID(as_uuid=True),
         primary_key=True,
@@ -24,6 +33,8 @@ class Task(db.Model):
         UUID(as_uuid=True)
     )
     is_deleted = db.Column(db.Boolean)
+    # Set by a trigger when is_deleted turns true (migration 0008)
+    deleted_at = db.Column(db.DateTime(timezone=True))
     submission = db.Column(JSONB)
     submitted_at = db.Column(
         db.DateTime,
@@ -49,6 +60,8 @@ class Task(db.Model):
     shortcut_id = db.Column(
         UUID(as_uuid=True)
     )
+    # Maintained by a trigger (migration 0004); deferred so ORM loads skip it
+    search_vector = db.deferred(db.Column(TSVECTOR))
 
     def to_dict(self):
         def fmt_dt(dt):
@@ -5,6 +5,10 @@ from .db import db
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_company_id_id', 'company_id', 'id'),
+        db.Index('ix_users_company_id_id_live', 'company_id', 'id', postgresql_where=db.text('is_deleted IS NOT TRUE')),
+    )
     id = db.Column(
         db.String,
         primary_key=True,
@@ -18,6 +18,10 @@ from .Quote import Quote
 from .Device import Device
 from .Company import Company
 from .User import User
+from .OutboxJob import OutboxJob
+from .ReportJob import ReportJob
+from .CatalogVersion import CatalogVersion
+from .IdempotencyKey import IdempotencyKey
 
 __all__ = [
     "db",
@@ -42,5 +46,9 @@ __all__ = [
     "Quote",
     "Device",
     "Company",
-    "User"
+    "User",
+    "OutboxJob",
+    "ReportJob",
+    "CatalogVersion",
+    "IdempotencyKey"
 ]
\ No newline at end of file
@@ -1,3 +1,19 @@
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 
-db = SQLAlchemy()
\ No newline at end of file
+
+class RoutingSession(Session):
+    """Session that reads from a replica bind when the request allows it
+
+    services.replicas sets info['replica_bind'] for read-only requests.
+    Flushes always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica_bind')
+        if replica and bind is None and not self._flushing:
+            return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
\ No newline at end of file
@@ -0,0 +1,323 @@
+"""Compiled serializers: SELECT rows straight to the dicts to_dict() builds.
+
+to_dict() loads a full ORM object per row and rebuilds its dict attribute by
+attribute. A Serializer selects only the columns a model's to_dict() reads
+and turns each raw row tuple into the same dict with a function generated
+once per model, so per row there is no ORM identity map, no attribute
+instrumentation and no per-field dispatch:
+
+    rows = NODE.fetch(Node.sld_id == sld_id)
+    nodes = NODE.dump(rows)       # == [node.to_dict() for node in ...]
+
+Field kinds mirror the expressions used in the models' to_dict():
+
+    raw                value as loaded
+    str                str(v)                  (also for NULL, as to_dict does)
+    str_or_none        str(v) if v else None
+    false_if_none      v if v is not None else False
+    timestamp          v.replace(tzinfo=utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    timestamp_or_none  the same, None when v is falsy
+    json               json.dumps(v)
+
+serializer.native() is the variant for clients that ask for native JSON
+(services.json_provider.native_json_requested): the json fields are emitted
+as JSON values instead of strings holding JSON. JSONB columns are selected
+as text; values of NATIVE_JSON_PASSTHROUGH_BYTES or more are wrapped in
+RawJSON and embedded by the JSON provider as they came from Postgres,
+smaller ones are decoded. Text columns are decoded when they hold a JSON
+object or array and otherwise stay strings.
+
+Keep each field list in step with the model's to_dict(); the output must
+stay identical to it (benchmarks/serialize_rows.py checks both).
+"""
+import os
+import json
+from datetime import timezone
+
+from sqlalchemy import Text, cast, select
+from sqlalchemy.dialects.postgresql import JSONB
+
+from .db import db
+from .Mappings import MappingIssueTask, MappingTaskSession, MappingQuoteTask, MappingUserTask
+from .Node import Node
+from .Edge import Edge
+from .Photo import Photo
+from .IRPhoto import IRPhoto
+from .IRSession import IRSession
+from .Issue import Issue
+from .Quote import Quote
+from .Task import Task
+from .Form import Form
+
+PASSTHROUGH_BYTES = int(os.getenv('NATIVE_JSON_PASSTHROUGH_BYTES', '2048'))
+
+_EXPRESSIONS = {
+    'raw': '{v}',
+    'str': '_str({v})',
+    'str_or_none': '_str({v}) if {v} else None',
+    'false_if_none': '{v} if {v} is not None else False',
+    'timestamp': '_timestamp({v})',
+    'timestamp_or_none': '_timestamp({v}) if {v} else None',
+    'json': '_dumps({v})',
+    'jsonb_text': '_jsonb_text({v})',
+    'json_text': '_json_text({v})',
+}
+
+# Kinds whose column is selected as text rather than as its own type
+_TEXT_KINDS = {'jsonb_text'}
+
+
+class RawJSON:
+    """JSON text embedded in a response as is (see services.json_provider)"""
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+    def __eq__(self, other):
+        return isinstance(other, RawJSON) and other.text == self.text
+
+    def __repr__(self):
+        return f"RawJSON({self.text[:40]!r})"
+
+
+def _timestamp(dt):
+    """dt.replace(tzinfo=utc).strftime('%Y-%m-%dT%H:%M:%SZ'), without strftime"""
+    if dt.year < 1000:
+        # strftime does not zero-pad these years; keep its output exactly
+        return dt.replace(tzinfo=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    return '%04d-%02d-%02dT%02d:%02d:%02dZ' % (
+        dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second
+    )
+
+
+def _jsonb_text(text):
+    if text is None:
+        return None
+    if len(text) >= PASSTHROUGH_BYTES:
+        return RawJSON(text)
+    return json.loads(text)
+
+
+def _json_text(text):
+    if text and text.lstrip()[:1] in ('{', '['):
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    return text
+
+
+_NAMESPACE = {
+    '_str': str, '_dumps': json.dumps, '_timestamp': _timestamp,
+    '_jsonb_text': _jsonb_text, '_json_text': _json_text,
+}
+
+
+def _compile(model_name, fields):
+    """Generate def serialize(row) -> dict for a list of (column, kind)"""
+    variables = [f"c{i}" for i in range(len(fields))]
+    items = ',\n        '.join(
+        f"{name!r}: {_EXPRESSIONS[kind].format(v=variable)}"
+        for (name, kind), variable in zip(fields, variables)
+    )
+    source = (
+        f"def serialize_{model_name}(row):\n"
+        f"    {', '.join(variables)}, = row\n"
+        f"    return {{\n        {items}\n    }}\n"
+    )
+    namespace = dict(_NAMESPACE)
+    exec(compile(source, f"<serializer {model_name}>", 'exec'), namespace)
+    return namespace[f"serialize_{model_name}"]
+
+
+class Serializer:
+    def __init__(self, model, fields):
+        unknown = {kind for _, kind in fields} - set(_EXPRESSIONS)
+        if unknown:
+            raise ValueError(f"Unknown field kinds for {model.__name__}: {', '.join(sorted(unknown))}")
+        self.model = model
+        self.fields = fields
+        self.columns = [
+            cast(getattr(model, name), Text).label(name) if kind in _TEXT_KINDS else getattr(model, name)
+            for name, kind in fields
+        ]
+        self.serialize = _compile(model.__name__, fields)
+        self._native = None
+
+    def select(self):
+        return select(*self.columns)
+
+    def fetch(self, *criteria):
+        """Row tuples matching criteria, columns in field order"""
+        return db.session.execute(self.select().where(*criteria)).all()
+
+    def dump(self, rows):
+        return list(map(self.serialize, rows))
+
+    def all(self, *criteria):
+        return self.dump(self.fetch(*criteria))
+
+    def native(self):
+        """This serializer with its json fields emitted as native JSON values"""
+        if self._native is None:
+            fields = [
+                (name, self._native_kind(name) if kind == 'json' else kind)
+                for name, kind in self.fields
+            ]
+            self._native = self if fields == self.fields else Serializer(self.model, fields)
+        return self._native
+
+    def _native_kind(self, name):
+        column_type = getattr(self.model, name).type
+        return 'jsonb_text' if isinstance(column_type, JSONB) else 'json_text'
+
+
+NODE = Serializer(Node, [
+    ('id', 'str'),
+    ('type', 'raw'),
+    ('label', 'raw'),
+    ('sld_id', 'str'),
+    ('parent_id', 'str_or_none'),
+    ('x', 'raw'),
+    ('y', 'raw'),
+    ('width', 'raw'),
+    ('height', 'raw'),
+    ('is_deleted', 'raw'),
+    ('location', 'raw'),
+    ('node_class', 'str_or_none'),
+    ('core_attributes', 'raw'),
+    ('com', 'raw'),
+    ('qr_code', 'raw'),
+])
+
+EDGE = Serializer(Edge, [
+    ('id', 'str'),
+    ('source', 'str'),
+    ('target', 'str'),
+    ('sld_id', 'str'),
+    ('is_deleted', 'raw'),
+    ('core_attributes', 'raw'),
+    ('edge_class', 'raw'),
+])
+
+PHOTO = Serializer(Photo, [
+    ('id', 'str'),
+    ('entity_id', 'str'),
+    ('url', 'raw'),
+    ('type', 'raw'),
+    ('sld_id', 'str'),
+    ('upload_needed', 'raw'),
+    ('local_filepath', 'raw'),
+    ('filename', 'raw'),
+    ('is_deleted', 'raw'),
+])
+
+IR_PHOTO = Serializer(IRPhoto, [
+    ('id', 'str'),
+    ('ir_session_id', 'str_or_none'),
+    ('visual_photo_key', 'raw'),
+    ('ir_photo_key', 'raw'),
+    ('date_created', 'timestamp'),
+    ('node_id', 'str_or_none'),
+    ('sld_id', 'str_or_none'),
+    ('issue_id', 'str_or_none'),
+    ('is_deleted', 'false_if_none'),
+])
+
+IR_SESSION = Serializer(IRSession, [
+    ('id', 'str'),
+    ('name', 'raw'),
+    ('photo_type', 'raw'),
+    ('active_visual_prefix', 'raw'),
+    ('active_ir_prefix', 'raw'),
+    ('date_created', 'timestamp_or_none'),
+    ('date_closed', 'timestamp_or_none'),
+    ('sld_id', 'str'),
+    ('active', 'raw'),
+])
+
+ISSUE = Serializer(Issue, [
+    ('id', 'str'),
+    ('title', 'raw'),
+    ('description', 'raw'),
+    ('created_date', 'timestamp_or_none'),
+    ('node_id', 'str_or_none'),
+    ('issue_class', 'str'),
+    ('issue_type', 'raw'),
+    ('issue_subtype', 'raw'),
+    ('is_deleted', 'false_if_none'),
+    ('session_id', 'str_or_none'),
+    ('sld_id', 'str_or_none'),
+    ('details', 'raw'),
+    ('status', 'raw'),
+    ('proposed_resolution', 'raw'),
+    ('modified_date', 'timestamp_or_none'),
+])
+
+QUOTE = Serializer(Quote, [
+    ('id', 'str'),
+    ('created_date', 'timestamp_or_none'),
+    ('modified_date', 'timestamp_or_none'),
+    ('title', 'raw'),
+    ('sow', 'json'),
+    ('tnm', 'json'),
+    ('sld_id', 'str_or_none'),
+    ('description', 'raw'),
+    ('status', 'raw'),
+    ('is_deleted', 'false_if_none'),
+])
+
+TASK = Serializer(Task, [
+    ('id', 'str'),
+    ('title', 'raw'),
+    ('task_description', 'raw'),
+    ('completed', 'raw'),
+    ('node_id', 'str_or_none'),
+    ('form_id', 'str_or_none'),
+    ('sld_id', 'str_or_none'),
+    ('is_deleted', 'raw'),
+    ('submission', 'json'),
+    ('submitted_at', 'timestamp_or_none'),
+    ('created_at', 'timestamp_or_none'),
+    ('due_date', 'timestamp_or_none'),
+    ('task_type', 'raw'),
+    ('recurring', 'raw'),
+    ('interval', 'raw'),
+    ('procedure_id', 'str_or_none'),
+    ('shortcut_id', 'str_or_none'),
+])
+
+FORM = Serializer(Form, [
+    ('id', 'str'),
+    ('schema', 'json'),
+    ('title', 'str'),
+    ('is_global', 'raw'),
+    ('is_deleted', 'raw'),
+])
+
+ISSUE_TASK = Serializer(MappingIssueTask, [
+    ('issue_id', 'str'),
+    ('task_id', 'str'),
+    ('is_deleted', 'raw'),
+])
+
+TASK_SESSION = Serializer(MappingTaskSession, [
+    ('id', 'str'),
+    ('task_id', 'str'),
+    ('session_id', 'str'),
+    ('is_deleted', 'raw'),
+])
+
+QUOTE_TASK = Serializer(MappingQuoteTask, [
+    ('quote_id', 'str'),
+    ('task_id', 'str'),
+    ('is_deleted', 'raw'),
+])
+
+USER_TASK = Serializer(MappingUserTask, [
+    ('user_id', 'str'),
+    ('task_id', 'str'),
+    ('mapping_type', 'raw'),
+    ('is_deleted', 'raw'),
+])
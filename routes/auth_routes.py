@@ -1,7 +1,6 @@
 import os
 import json
 import logging
-import boto3
 import hashlib
 import hmac
 import base64
@@ -10,11 +9,9 @@ from functools import wraps
 from jose import jwt, JWTError
 from botocore.exceptions import ClientError
 import urllib.request
-from dotenv import load_dotenv
 from models.User import User
 from models.db import db
-
-load_dotenv()
+from services.aws import get_client
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +21,11 @@ COGNITO_USER_POOL_ID = os.getenv('COGNITO_USER_POOL_ID', 'us-east-2_zdUPoPij8')
 COGNITO_CLIENT_ID = os.getenv('COGNITO_CLIENT_ID', '1spmv6ngivgbe7ldi3j1ksaoph')
 COGNITO_CLIENT_SECRET = os.getenv('COGNITO_CLIENT_SECRET')  # Add this to your .env file
 
-# Initialize Cognito client
-cognito_client = boto3.client('cognito-idp', region_name=COGNITO_REGION)
+
+def get_cognito_client():
+    """Shared Cognito client, built on first use (see services.aws)"""
+    return get_client('cognito-idp', region_name=COGNITO_REGION)
+
 
 # JWT Configuration
 COGNITO_JWKS_URL = f'https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}/.well-known/jwks.json'
@@ -202,7 +202,7 @@ def register():
             logger.info("SECRET_HASH added to sign_up parameters")
         
         logger.info("Calling Cognito sign_up...")
-        response = cognito_client.sign_up(**sign_up_params)
+        response = get_cognito_client().sign_up(**sign_up_params)
         logger.info(f"Cognito sign_up successful - UserSub: {response.get('UserSub')}, UserConfirmed: {response.get('UserConfirmed')}")
         
         # Create user record in database
@@ -295,7 +295,7 @@ def confirm_registration():
         if secret_hash:
             confirm_params['SecretHash'] = secret_hash
         
-        response = cognito_client.confirm_sign_up(**confirm_params)
+        response = get_cognito_client().confirm_sign_up(**confirm_params)
         
         return jsonify({'message': 'Email confirmed successfully'}), 200
         
@@ -330,7 +330,7 @@ def login():
         if secret_hash:
             auth_params['SECRET_HASH'] = secret_hash
         
-        response = cognito_client.initiate_auth(
+        response = get_cognito_client().initiate_auth(
             ClientId=COGNITO_CLIENT_ID,
             AuthFlow='USER_PASSWORD_AUTH',
             AuthParameters=auth_params
@@ -379,7 +379,7 @@ def refresh_token():
         
         # For refresh token, we don't have the username, so we can't calculate SECRET_HASH
         # Cognito doesn't require SECRET_HASH for REFRESH_TOKEN_AUTH flow
-        response = cognito_client.initiate_auth(
+        response = get_cognito_client().initiate_auth(
             ClientId=COGNITO_CLIENT_ID,
             AuthFlow='REFRESH_TOKEN_AUTH',
             AuthParameters={
@@ -411,7 +411,7 @@ def logout():
         auth_header = request.headers.get('Authorization')
         token = auth_header.split()[1]
         
-        cognito_client.global_sign_out(
+        get_cognito_client().global_sign_out(
             AccessToken=token
         )
         
@@ -447,7 +447,7 @@ def forgot_password():
         if secret_hash:
             forgot_params['SecretHash'] = secret_hash
         
-        response = cognito_client.forgot_password(**forgot_params)
+        response = get_cognito_client().forgot_password(**forgot_params)
         
         return jsonify({
             'message': 'Password reset code sent',
@@ -502,7 +502,7 @@ def respond_to_challenge():
             if secret_hash:
                 challenge_responses['SECRET_HASH'] = secret_hash
             
-            response = cognito_client.respond_to_auth_challenge(
+            response = get_cognito_client().respond_to_auth_challenge(
                 ClientId=COGNITO_CLIENT_ID,
                 ChallengeName='NEW_PASSWORD_REQUIRED',
                 Session=session,
@@ -581,7 +581,7 @@ def reset_password():
         if secret_hash:
             confirm_params['SecretHash'] = secret_hash
         
-        response = cognito_client.confirm_forgot_password(**confirm_params)
+        response = get_cognito_client().confirm_forgot_password(**confirm_params)
         
         return jsonify({'message': 'Password reset successfully'}), 200
         
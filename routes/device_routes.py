@@ -6,15 +6,17 @@ from flask import Blueprint, request, jsonify
 from models.Device import Device
 from models.db import db
 from datetime import datetime, timezone
-import boto3
 from botocore.exceptions import ClientError
+from services import outbox
+from services.aws import get_client
 
 logger = logging.getLogger(__name__)
 
 device_bp = Blueprint('device', __name__, url_prefix='/device')
 
-# Initialize SNS client
-sns_client = boto3.client('sns', region_name='us-east-2')
+def get_sns_client():
+    """Shared SNS client, built on first use (see services.aws)"""
+    return get_client('sns', region_name='us-east-2')
 
 APNS_SANDBOX_ARN = "arn:aws:sns:us-east-2:637423518604:app/APNS_SANDBOX/SwiftDataTutorial"
 APNS_PRODUCTION_ARN = "arn:aws:sns:us-east-2:637423518604:app/APNS/SwiftDataTutorial"
@@ -27,7 +29,7 @@ def create_sns_endpoint(device_token, user_id, environment='production'):
     
     try:
         # Try to create a new endpoint
-        response = sns_client.create_platform_endpoint(
+        response = get_sns_client().create_platform_endpoint(
             PlatformApplicationArn=platform_arn,
             Token=device_token,
             CustomUserData=json.dumps({
@@ -40,7 +42,7 @@ def create_sns_endpoint(device_token, user_id, environment='production'):
         logger.info(f"Created new SNS endpoint: {endpoint_arn}")
         
         # Enable the endpoint (in case it was disabled)
-        sns_client.set_endpoint_attributes(
+        get_sns_client().set_endpoint_attributes(
             EndpointArn=endpoint_arn,
             Attributes={'Enabled': 'true'}
         )
@@ -63,7 +65,7 @@ def create_sns_endpoint(device_token, user_id, environment='production'):
                     
                     # Update the endpoint with new token (in case it changed)
                     try:
-                        sns_client.set_endpoint_attributes(
+                        get_sns_client().set_endpoint_attributes(
                             EndpointArn=endpoint_arn,
                             Attributes={
                                 'Token': device_token,
@@ -79,9 +81,92 @@ def create_sns_endpoint(device_token, user_id, environment='production'):
         raise e
 
 
+def endpoint_is_current(device, device_token, environment):
+    """Check whether the stored SNS endpoint already matches this registration"""
+    return bool(
+        device is not None
+        and device.is_active
+        and device.endpoint_arn
+        and device.device_token == device_token
+        and device.environment == environment
+    )
+
+
+@outbox.handler('sns.sync_endpoint')
+def sync_sns_endpoint(payload):
+    """Create or refresh the SNS endpoint for a registration and store its ARN"""
+    user_id = uuid.UUID(payload['user_id'])
+    device_id = payload['device_id']
+    device_token = payload['device_token']
+    environment = payload['environment']
+
+    endpoint_arn = create_sns_endpoint(
+        device_token=device_token,
+        user_id=user_id,
+        environment=environment
+    )
+
+    device = Device.query.filter_by(
+        user_id=user_id,
+        device_id=device_id
+    ).first()
+
+    # A newer registration may have replaced the token while SNS was working
+    if (not device or device.device_token != device_token
+            or device.environment != environment):
+        logger.info(f"Discarding stale SNS endpoint {endpoint_arn} for device {device_id}")
+        return {'endpoint_arn': endpoint_arn, 'stored': False}
+
+    device.endpoint_arn = endpoint_arn
+    logger.info(f"Stored SNS endpoint {endpoint_arn} for device {device_id}")
+    return {'endpoint_arn': endpoint_arn, 'stored': True}
+
+
+@outbox.handler('sns.set_endpoint_enabled')
+def set_sns_endpoint_enabled(payload):
+    """Enable or disable an SNS platform endpoint"""
+    get_sns_client().set_endpoint_attributes(
+        EndpointArn=payload['endpoint_arn'],
+        Attributes={'Enabled': 'true' if payload['enabled'] else 'false'}
+    )
+    logger.info(f"Set SNS endpoint {payload['endpoint_arn']} enabled={payload['enabled']}")
+
+
+@outbox.handler('sns.publish')
+def publish_sns_message(payload):
+    """Publish a push message to one device endpoint"""
+    try:
+        response = get_sns_client().publish(
+            TargetArn=payload['endpoint_arn'],
+            Message=json.dumps(payload['message']),
+            MessageStructure='json'
+        )
+    except ClientError as e:
+        # If endpoint is disabled or deleted, mark device as inactive instead of retrying
+        error_code = e.response.get('Error', {}).get('Code', '')
+        if error_code not in ['EndpointDisabled', 'InvalidParameter']:
+            raise
+        logger.error(f"Failed to send to {payload['endpoint_arn']}: {str(e)}")
+        if payload.get('user_id'):
+            device = dict(user_id=uuid.UUID(payload['user_id']), device_id=payload['device_id'])
+        else:
+            # Report notifications only know the endpoint
+            device = dict(endpoint_arn=payload['endpoint_arn'])
+        Device.query.filter_by(**device).update({'is_active': False})
+        return {'error': error_code}
+
+    logger.info(f"✅ Sent notification to {payload['endpoint_arn']}: MessageId={response['MessageId']}")
+    return {'message_id': response['MessageId']}
+
+
 @device_bp.route('/register', methods=['POST'])
 def register_device():
-    """Register or update a device token (upsert operation)"""
+    """Register or update a device token (upsert operation)
+
+    SNS is only contacted when the token, environment or active state changed;
+    that work is queued on the outbox and the endpoint ARN is filled in once
+    it completes.
+    """
     try:
         data = request.get_json()
         logger.info("POST /device/register with payload: %s", data)
@@ -92,35 +177,27 @@ def register_device():
         device_token = data['device_token']
         environment = data.get('environment', 'production')
         
-        # Create or update SNS endpoint
-        try:
-            endpoint_arn = create_sns_endpoint(
-                device_token=device_token,
-                user_id=user_id,
-                environment=environment
-            )
-        except Exception as sns_error:
-            logger.error(f"Failed to create SNS endpoint: {sns_error}")
-            endpoint_arn = None  # Continue without SNS if it fails
-        
         # Check if device exists
         device = Device.query.filter_by(
             user_id=user_id, 
             device_id=device_id
         ).first()
         
+        needs_sync = not endpoint_is_current(device, device_token, environment)
+        
         if device:
             # Update existing device
             device.device_token = device_token
             device.platform = data.get('platform', device.platform)
             device.environment = environment
-            device.endpoint_arn = endpoint_arn  # Update with SNS endpoint
+            if needs_sync:
+                device.endpoint_arn = None  # Filled in by sync_sns_endpoint
             device.device_name = data.get('device_name', device.device_name)
             device.is_active = True  # Reactivate if it was inactive
             device.updated_at = datetime.now(timezone.utc)
             
             action = 'updated'
-            logger.info(f"Updated device {device_id} with endpoint {endpoint_arn}")
+            logger.info(f"Updated device {device_id} (endpoint sync needed: {needs_sync})")
         else:
             # Create new device
             device = Device(
@@ -129,19 +206,28 @@ def register_device():
                 device_token=device_token,
                 platform=data.get('platform', 'ios'),
                 environment=environment,
-                endpoint_arn=endpoint_arn,  # Store SNS endpoint
+                endpoint_arn=None,  # Filled in by sync_sns_endpoint
                 device_name=data.get('device_name'),
                 is_active=True
             )
             db.session.add(device)
             action = 'created'
-            logger.info(f"Created device {device_id} with endpoint {endpoint_arn}")
+            logger.info(f"Created device {device_id}")
+        
+        if needs_sync:
+            outbox.enqueue('sns.sync_endpoint', {
+                'user_id': str(user_id),
+                'device_id': device_id,
+                'device_token': device_token,
+                'environment': environment
+            })
         
         db.session.commit()
         
         return jsonify({
             'success': True,
             'action': action,
+            'endpoint_status': 'pending' if needs_sync else 'current',
             'data': device.to_dict()
         }), 200
         
@@ -173,14 +259,10 @@ def unregister_device(user_id, device_id):
         
         # Disable the SNS endpoint if it exists
         if device.endpoint_arn:
-            try:
-                sns_client.set_endpoint_attributes(
-                    EndpointArn=device.endpoint_arn,
-                    Attributes={'Enabled': 'false'}
-                )
-                logger.info(f"Disabled SNS endpoint: {device.endpoint_arn}")
-            except Exception as e:
-                logger.error(f"Failed to disable SNS endpoint: {e}")
+            outbox.enqueue('sns.set_endpoint_enabled', {
+                'endpoint_arn': device.endpoint_arn,
+                'enabled': False
+            })
         
         # Soft delete (mark as inactive)
         device.is_active = False
@@ -219,7 +301,7 @@ def send_test_notification(user_id):
                 'error': 'No active devices found for user'
             }), 404
         
-        success_count = 0
+        queued_count = 0
         failures = []
         
         for device in devices:
@@ -227,59 +309,47 @@ def send_test_notification(user_id):
                 failures.append(f"Device {device.device_id} has no endpoint ARN")
                 continue
             
-            try:
-                # Prepare message for both APNS and APNS_SANDBOX
-                apns_message = json.dumps({
-                    "aps": {
-                        "alert": {
-                            "title": "Test Notification 🧪",
-                            "body": f"Hello! This is a test for {device.device_name or device.device_id}"
-                        },
-                        "sound": "default",
-                        "badge": 1
+            # Prepare message for both APNS and APNS_SANDBOX
+            apns_message = json.dumps({
+                "aps": {
+                    "alert": {
+                        "title": "Test Notification 🧪",
+                        "body": f"Hello! This is a test for {device.device_name or device.device_id}"
                     },
-                    "customData": {
-                        "test": True,
-                        "timestamp": datetime.now(timezone.utc).isoformat()
-                    }
-                })
-                
-                # Send test notification
-                message = {
+                    "sound": "default",
+                    "badge": 1
+                },
+                "customData": {
+                    "test": True,
+                    "timestamp": datetime.now(timezone.utc).isoformat()
+                }
+            })
+            
+            # Sent by the outbox worker after this request commits
+            outbox.enqueue('sns.publish', {
+                'user_id': str(device.user_id),
+                'device_id': device.device_id,
+                'endpoint_arn': device.endpoint_arn,
+                'message': {
                     "default": "Test notification from your IR app",
                     "APNS": apns_message,
                     "APNS_SANDBOX": apns_message
                 }
-                
-                response = sns_client.publish(
-                    TargetArn=device.endpoint_arn,
-                    Message=json.dumps(message),
-                    MessageStructure='json'
-                )
-                
-                success_count += 1
-                logger.info(f"✅ Sent notification to {device.device_name}: MessageId={response['MessageId']}")
-                
-            except ClientError as e:
-                error_msg = f"Failed to send to {device.device_name or device.device_id}: {str(e)}"
-                failures.append(error_msg)
-                logger.error(error_msg)
-                
-                # If endpoint is disabled or deleted, mark device as inactive
-                error_code = e.response.get('Error', {}).get('Code', '')
-                if error_code in ['EndpointDisabled', 'InvalidParameter']:
-                    device.is_active = False
-                    db.session.commit()
+            })
+            queued_count += 1
+        
+        db.session.commit()
         
         return jsonify({
             'success': True,
-            'message': f'Sent notifications to {success_count}/{len(devices)} devices',
-            'successes': success_count,
+            'message': f'Queued notifications to {queued_count}/{len(devices)} devices',
+            'queued': queued_count,
             'total_devices': len(devices),
             'failures': failures if failures else None
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         logger.error("Error sending test notification: %s", str(e))
         return jsonify({
             'success': False,
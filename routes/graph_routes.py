@@ -1,11 +1,15 @@
 from flask import Blueprint, jsonify
 from models import Node, Edge, Photo, IRPhoto, Issue, Task
 from models.db import db
+from services.replicas import replica_read
+from services.query_budget import max_queries
 from uuid import UUID
 
 graph_bp = Blueprint('graph', __name__, url_prefix='/api/graph')
 
 @graph_bp.route('/nodes/<node_id>', methods=['GET'])
+@replica_read
+@max_queries(5)
 def get_node_by_id(node_id):
     try:
         node_uuid = UUID(node_id)
@@ -35,6 +39,8 @@ def get_node_by_id(node_id):
         return jsonify({'error': str(e)}), 500
 
 @graph_bp.route('/edges/<edge_id>', methods=['GET'])
+@replica_read
+@max_queries(1)
 def get_edge_by_id(edge_id):
     try:
         edge_uuid = UUID(edge_id)
@@ -1,31 +1,129 @@
 import uuid
-import json
+import hashlib
 import logging
+from datetime import datetime, timezone
 from flask import Blueprint, request, jsonify
-from models.Device import Device
+from sqlalchemy.exc import IntegrityError
+from models import Device, IRSession, IRPhoto, Issue, ReportJob
 from models.db import db
-from datetime import datetime, timezone
-import boto3
-from botocore.exceptions import ClientError
+from services.reports import get_report_backend, backend_for_job
 
 logger = logging.getLogger(__name__)
 
 reporting_bp = Blueprint('reporting', __name__, url_prefix='/reporting')
 
-# Step Function ARN
-STEP_FUNCTION_ARN = "arn:aws:states:us-east-2:637423518604:stateMachine:pgz-reporting-step-function"
+def session_content_version(ir_session_id):
+    """Fingerprint everything a session report is built from
+
+    Returns None when the session does not exist. Any change to the session,
+    its IR photos or its issues yields a new version.
+    """
+    session = IRSession.query.get(ir_session_id)
+    if not session:
+        return None
+
+    photos = (
+        db.session.query(
+            IRPhoto.id, IRPhoto.visual_photo_key, IRPhoto.ir_photo_key,
+            IRPhoto.node_id, IRPhoto.issue_id, IRPhoto.is_deleted
+        )
+        .filter(IRPhoto.ir_session_id == ir_session_id)
+        .order_by(IRPhoto.id)
+        .all()
+    )
+    issues = (
+        db.session.query(Issue.id, Issue.modified_date, Issue.is_deleted)
+        .filter(Issue.session_id == ir_session_id)
+        .order_by(Issue.id)
+        .all()
+    )
+
+    digest = hashlib.sha256()
+    digest.update(repr(sorted(session.to_dict().items())).encode())
+    for row in photos:
+        digest.update(repr(tuple(row)).encode())
+    digest.update(b'|')
+    for row in issues:
+        digest.update(repr(tuple(row)).encode())
+    return digest.hexdigest()
+
+
+def request_report(ir_session_id, report_type, device_endpoints):
+    """Join, reuse or start the report for this session version
+
+    Returns (job, outcome) where outcome is 'started', 'coalesced' or 'cached',
+    or (None, None) when the session does not exist. device_endpoints get a
+    push when a started or joined job succeeds; a cached result is returned
+    at once with no push.
+    """
+    content_version = session_content_version(ir_session_id)
+    if content_version is None:
+        return None, None
+
+    key = dict(
+        ir_session_id=ir_session_id,
+        report_type=report_type,
+        content_version=content_version
+    )
+    job = ReportJob.query.filter_by(**key).with_for_update().first()
+
+    if job is None:
+        try:
+            with db.session.begin_nested():
+                job = ReportJob(**key)
+                db.session.add(job)
+        except IntegrityError:
+            # Another request created it first; join that one
+            job = ReportJob.query.filter_by(**key).with_for_update().first()
+
+    if job.execution_arn and job.status in ('queued', 'running'):
+        job.request_count += 1
+        backend = backend_for_job(job)
+        if backend:
+            backend.join(job, device_endpoints)
+        return job, 'coalesced'
+    if job.status == 'succeeded':
+        # The output is in the response; no push is sent
+        job.request_count += 1
+        return job, 'cached'
 
-def get_stepfunctions_client():
-    """Get or create Step Functions client - lazy initialization to avoid debug mode issues"""
-    if not hasattr(get_stepfunctions_client, '_client'):
-        get_stepfunctions_client._client = boto3.client('stepfunctions', region_name='us-east-2')
-    return get_stepfunctions_client._client
+    # New, or a previous attempt failed: start a fresh execution
+    job.status = 'queued'
+    job.error = None
+    job.output = None
+    job.completed_at = None
+    job.device_endpoints = None
+    job.started_at = datetime.now(timezone.utc)
+    get_report_backend().start(job, device_endpoints)
+    return job, 'started'
+
+
+def refresh_report_status(job):
+    """Bring an unfinished job up to date with the backend running it"""
+    if job.status not in ('queued', 'running'):
+        return
+    backend = backend_for_job(job)
+    if backend:
+        backend.refresh(job)
+
+
+def report_response(job, outcome):
+    return jsonify({
+        'success': True,
+        'execution_arn': job.execution_arn,
+        'report_job_id': str(job.id),
+        'status': job.status,
+        'status_url': f"/reporting/status/{job.id}",
+        'coalesced': outcome == 'coalesced',
+        'cached': outcome == 'cached',
+        'output': job.output
+    }), 200
 
 
 @reporting_bp.route('/generate', methods=['POST'])
 def generate_report():
     """
-    Start report generation via Step Function
+    Start report generation via the configured report backend
     
     Expected payload from iOS:
     {
@@ -34,6 +132,11 @@ def generate_report():
         "user_id": "8aea6063-f7b6-4187-8025-2fbbc8f29a35",
         "device_id": "1E32EB25-371A-472B-82BB-845FA56F1AA3"
     }
+
+    The device gets a push when the report succeeds, whether this request
+    started it or joined one already running (coalesced). A cached report
+    comes back in the response's output and sends no push, so the client
+    reads it from there (or polls status_url).
     """
     try:
         data = request.get_json()
@@ -52,9 +155,18 @@ def generate_report():
                 'error': 'Missing required fields: ir_session_id, user_id, device_id'
             }), 400
         
+        try:
+            ir_session_id = uuid.UUID(str(ir_session_id))
+            user_id = uuid.UUID(str(user_id))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid ir_session_id or user_id format'
+            }), 400
+        
         # Get the specific device that's requesting the report
         device = Device.query.filter_by(
-            user_id=uuid.UUID(user_id),
+            user_id=user_id,
             device_id=device_id,
             is_active=True
         ).first()
@@ -71,33 +183,26 @@ def generate_report():
                 'error': 'Device has no push notification endpoint'
             }), 400
         
-        # Prepare the Step Function input
-        step_function_input = {
-            "ir_session_id": ir_session_id,
-            "type": report_type,
-            "device_endpoints": [
-                {
-                    "endpoint_arn": device.endpoint_arn,
-                    "device_name": device.device_name or device_id
-                }
-            ]
-        }
-        
-        # Start the Step Function execution
-        response = get_stepfunctions_client().start_execution(
-            stateMachineArn=STEP_FUNCTION_ARN,
-            input=json.dumps(step_function_input)
-        )
-        
-        execution_arn = response['executionArn']
-        logger.info(f"Started Step Function execution: {execution_arn}")
+        # Start the report once this request commits,
+        # unless an identical report is already running or finished
+        job, outcome = request_report(ir_session_id, report_type, [
+            {
+                "endpoint_arn": device.endpoint_arn,
+                "device_name": device.device_name or device_id
+            }
+        ])
+        if job is None:
+            return jsonify({
+                'success': False,
+                'error': 'IR session not found'
+            }), 404
+        db.session.commit()
+        logger.info(f"Report job {job.id} {outcome}: {job.execution_arn}")
         
-        return jsonify({
-            'success': True,
-            'execution_arn': execution_arn
-        }), 200
+        return report_response(job, outcome)
         
     except Exception as e:
+        db.session.rollback()
         logger.error("Error starting report generation: %s", str(e))
         return jsonify({
             'success': False,
@@ -107,7 +212,7 @@ def generate_report():
 @reporting_bp.route('/generate_simple', methods=['POST'])
 def generate_report_simple():
     """
-    Start report generation via Step Function
+    Start report generation via the configured report backend
     
     Expected payload from frontend:
     {
@@ -130,30 +235,58 @@ def generate_report_simple():
                 'error': 'Missing required fields: ir_session_id, user_id, device_id'
             }), 400
         
-        # Prepare the Step Function input
-        step_function_input = {
-            "ir_session_id": ir_session_id,
-            "type": report_type,
-            "device_endpoints": []
-        }
-        
-        # Start the Step Function execution
-        response = get_stepfunctions_client().start_execution(
-            stateMachineArn=STEP_FUNCTION_ARN,
-            input=json.dumps(step_function_input)
-        )
+        try:
+            ir_session_id = uuid.UUID(str(ir_session_id))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid ir_session_id format'
+            }), 400
         
-        execution_arn = response['executionArn']
-        logger.info(f"Started Step Function execution: {execution_arn}")
+        # Start the report once this request commits,
+        # unless an identical report is already running or finished
+        job, outcome = request_report(ir_session_id, report_type, [])
+        if job is None:
+            return jsonify({
+                'success': False,
+                'error': 'IR session not found'
+            }), 404
+        db.session.commit()
+        logger.info(f"Report job {job.id} {outcome}: {job.execution_arn}")
+        
+        return report_response(job, outcome)
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error starting report generation: %s", str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@reporting_bp.route('/status/<uuid:report_job_id>', methods=['GET'])
+def get_report_status(report_job_id):
+    """Return the state of a report job, refreshing it from its backend"""
+    try:
+        job = ReportJob.query.get(report_job_id)
+        if not job:
+            return jsonify({
+                'success': False,
+                'error': 'Report job not found'
+            }), 404
+        
+        refresh_report_status(job)
+        db.session.commit()
         
         return jsonify({
             'success': True,
-            'execution_arn': execution_arn
+            'data': job.to_dict()
         }), 200
         
     except Exception as e:
-        logger.error("Error starting report generation: %s", str(e))
+        db.session.rollback()
+        logger.error("Error reading report status: %s", str(e))
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
@@ -0,0 +1,110 @@
+import logging
+from uuid import UUID
+from flask import Blueprint, request, jsonify
+from models import Node, SLD, User
+from models.db import db
+from models.serializers import NODE
+from routes.auth_routes import require_auth
+from services import node_search, search, pagination
+from services.replicas import replica_read
+from services.query_budget import max_queries
+
+logger = logging.getLogger(__name__)
+
+search_bp = Blueprint('search', __name__)
+
+
+@search_bp.route('/nodes/search', methods=['GET'])
+@replica_read
+@max_queries(1)
+def search_nodes():
+    """Find a company's nodes by their core attributes
+
+    Query parameters:
+    - company: company id (required); every live SLD of the company is searched
+    - attr.<name>[__gt|__gte|__lt|__lte|__exists]=<value>: see services.node_search
+    - sld_id, type: optional exact filters
+    - limit (default 100, at most 500) and cursor (next_cursor of the previous page)
+
+    Nodes come back ordered by id; next_cursor is null on the last page.
+    """
+    try:
+        company_id = UUID(request.args.get('company', ''))
+    except ValueError:
+        return jsonify({'error': "'company' must be a company id"}), 400
+
+    try:
+        criteria = node_search.attribute_criteria(request.args)
+        limit = node_search.page_limit(request.args)
+        cursor = node_search.page_cursor(request.args)
+    except (node_search.SearchError, pagination.PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    if request.args.get('sld_id'):
+        try:
+            criteria.append(Node.sld_id == UUID(request.args['sld_id']))
+        except ValueError:
+            return jsonify({'error': "'sld_id' must be an SLD id"}), 400
+
+    if request.args.get('type'):
+        criteria.append(Node.type == request.args['type'])
+    if cursor is not None:
+        criteria.append(Node.id > cursor)
+
+    logger.info("SEARCH NODES for company %s: %s", company_id, request.query_string.decode(errors='replace'))
+    statement = (
+        NODE.select()
+        .join(SLD, SLD.id == Node.sld_id)
+        .where(SLD.company_id == company_id, SLD.is_deleted.isnot(True), Node.is_deleted.isnot(True), *criteria)
+        .order_by(Node.id)
+        .limit(limit + 1)
+    )
+    try:
+        rows = db.session.execute(statement).all()
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Node search failed: %s", str(e))
+        return jsonify({'error': str(e)}), 500
+
+    page = rows[:limit]
+    return jsonify({
+        'nodes': NODE.dump(page),
+        'next_cursor': str(page[-1][0]) if len(rows) > limit else None
+    }), 200
+
+
+@search_bp.route('/search', methods=['GET'])
+@require_auth
+@replica_read
+@max_queries(2)
+def search_company():
+    """Full-text search over the caller's company: nodes, issues, tasks and quotes
+
+    Query parameters:
+    - q: search terms (web search syntax: "quoted phrases", -excluded, or)
+    - types: comma separated subset of node,issue,task,quote (default all)
+    - limit (default 20, at most 100) and cursor (next_cursor of the previous page)
+
+    Hits are ranked best first across all types.
+    """
+    user = User.query.get(request.cognito_user.get('sub'))
+    if not user or user.is_deleted:
+        return jsonify({'error': 'No user record for this account'}), 403
+
+    types = request.args.get('types')
+    kinds = [kind.strip() for kind in types.split(',') if kind.strip()] if types else search.KINDS
+    try:
+        page = pagination.requested_page(request.args, search.DEFAULT_LIMIT, search.MAX_LIMIT)
+        hits, next_cursor = search.search(user.company_id, request.args.get('q', ''), kinds,
+                                          page.limit if page else search.DEFAULT_LIMIT,
+                                          page.cursor if page else None)
+    except (search.SearchError, pagination.PaginationError) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Search failed: %s", str(e))
+        return jsonify({'error': str(e)}), 500
+
+    logger.info("SEARCH company %s for %r: %d hits", user.company_id, request.args.get('q'), len(hits))
+    return jsonify({'results': hits, 'next_cursor': next_cursor}), 200
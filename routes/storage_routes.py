@@ -0,0 +1,274 @@
+import uuid
+import logging
+from flask import Blueprint, request, jsonify
+from botocore.exceptions import ClientError
+from services.s3 import get_s3_client
+from services.reconcile import reconcile_uploads, count_keys, HTTP_MAX_KEYS
+
+logger = logging.getLogger(__name__)
+
+storage_bp = Blueprint('storage', __name__)
+
+# Upper bounds for a single request
+MAX_PRESIGN_ITEMS = 1000
+MAX_MULTIPART_PARTS = 10000
+MAX_EXPIRES_IN = 7 * 24 * 3600
+
+PRESIGN_OPERATIONS = {
+    'PUT': 'put_object',
+    'GET': 'get_object'
+}
+
+
+def get_expires_in(data):
+    expires_in = int(data.get('expires_in', 3600))
+    if expires_in < 1:
+        raise ValueError(expires_in)
+    return min(expires_in, MAX_EXPIRES_IN)
+
+
+@storage_bp.route('/presigned_urls', methods=['POST'])
+def get_presigned_urls():
+    """Generate presigned URLs for many objects in one request
+
+    Expects JSON payload with:
+    - items: list of {"bucket", "key", "method": "PUT" | "GET", "content_type" (optional)}
+    - expires_in: seconds the URLs stay valid (optional, default 1 hour)
+
+    Signing happens locally with the shared client, so there is no S3 round
+    trip per item. Items that cannot be signed are reported in 'errors'.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    items = data.get('items') or []
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "'items' must be a non-empty list"}), 400
+    if len(items) > MAX_PRESIGN_ITEMS:
+        return jsonify({"error": f"At most {MAX_PRESIGN_ITEMS} items per request"}), 400
+    if not all(isinstance(item, dict) for item in items):
+        return jsonify({"error": "Each item must be an object"}), 400
+    logger.info("POST /presigned_urls for %d items", len(items))
+
+    try:
+        expires_in = get_expires_in(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "'expires_in' must be a positive integer"}), 400
+
+    s3_client = get_s3_client()
+    urls = []
+    errors = []
+    for index, item in enumerate(items):
+        bucket = item.get('bucket')
+        key = item.get('key')
+        method = (item.get('method') or 'PUT').upper()
+
+        if not bucket or not key or method not in PRESIGN_OPERATIONS:
+            errors.append({
+                'index': index,
+                'error': "Each item needs 'bucket', 'key' and a method of PUT or GET"
+            })
+            continue
+
+        params = {'Bucket': bucket, 'Key': key}
+        if method == 'PUT' and item.get('content_type'):
+            params['ContentType'] = item['content_type']
+
+        try:
+            url = s3_client.generate_presigned_url(
+                PRESIGN_OPERATIONS[method],
+                Params=params,
+                ExpiresIn=expires_in
+            )
+        except Exception as e:
+            errors.append({'index': index, 'error': str(e)})
+            continue
+
+        urls.append({
+            'bucket': bucket,
+            'key': key,
+            'method': method,
+            'url': url
+        })
+
+    return jsonify({
+        'urls': urls,
+        'errors': errors if errors else None,
+        'expires_in': expires_in
+    }), 200
+
+
+@storage_bp.route('/presigned_urls/multipart', methods=['POST'])
+def create_multipart_upload():
+    """Start a multipart upload and presign a PUT URL for every part
+
+    Expects JSON payload with:
+    - bucket, key: target object
+    - part_count: number of parts the client will upload (each >= 5 MiB except the last)
+    - content_type (optional), expires_in (optional)
+    """
+    data = request.get_json() or {}
+    logger.info("POST /presigned_urls/multipart with payload: %s", data)
+
+    bucket = data.get('bucket')
+    key = data.get('key')
+    try:
+        part_count = int(data.get('part_count', 0))
+        expires_in = get_expires_in(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "'part_count' must be an integer and 'expires_in' a positive integer"}), 400
+
+    if not bucket or not key:
+        return jsonify({"error": "Both 'bucket' and 'key' are required"}), 400
+    if not 1 <= part_count <= MAX_MULTIPART_PARTS:
+        return jsonify({"error": f"'part_count' must be between 1 and {MAX_MULTIPART_PARTS}"}), 400
+
+    try:
+        s3_client = get_s3_client()
+        params = {'Bucket': bucket, 'Key': key}
+        if data.get('content_type'):
+            params['ContentType'] = data['content_type']
+        upload_id = s3_client.create_multipart_upload(**params)['UploadId']
+
+        parts = [
+            {
+                'part_number': part_number,
+                'url': s3_client.generate_presigned_url(
+                    'upload_part',
+                    Params={
+                        'Bucket': bucket,
+                        'Key': key,
+                        'UploadId': upload_id,
+                        'PartNumber': part_number
+                    },
+                    ExpiresIn=expires_in
+                )
+            }
+            for part_number in range(1, part_count + 1)
+        ]
+
+        logger.info("Started multipart upload %s for bucket=%s, key=%s", upload_id, bucket, key)
+        return jsonify({
+            'bucket': bucket,
+            'key': key,
+            'upload_id': upload_id,
+            'parts': parts,
+            'expires_in': expires_in
+        }), 200
+
+    except Exception as e:
+        logger.exception("Error starting multipart upload")
+        return jsonify({"error": str(e)}), 500
+
+
+@storage_bp.route('/presigned_urls/multipart/complete', methods=['POST'])
+def complete_multipart_upload():
+    """Assemble an uploaded multipart object
+
+    Expects JSON payload with bucket, key, upload_id and
+    parts: list of {"part_number", "etag"} as returned by each part PUT.
+    """
+    data = request.get_json() or {}
+    logger.info("POST /presigned_urls/multipart/complete for upload %s", data.get('upload_id'))
+
+    bucket = data.get('bucket')
+    key = data.get('key')
+    upload_id = data.get('upload_id')
+    parts = data.get('parts') or []
+
+    if not bucket or not key or not upload_id or not parts:
+        return jsonify({"error": "'bucket', 'key', 'upload_id' and 'parts' are required"}), 400
+
+    try:
+        response = get_s3_client().complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                'Parts': sorted(
+                    ({'PartNumber': int(p['part_number']), 'ETag': p['etag']} for p in parts),
+                    key=lambda p: p['PartNumber']
+                )
+            }
+        )
+        return jsonify({
+            'bucket': bucket,
+            'key': key,
+            'etag': response.get('ETag')
+        }), 200
+
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Each part needs 'part_number' and 'etag'"}), 400
+    except ClientError as e:
+        logger.error("Error completing multipart upload %s: %s", upload_id, str(e))
+        return jsonify({"error": e.response['Error']['Message']}), 400
+    except Exception as e:
+        logger.exception("Error completing multipart upload")
+        return jsonify({"error": str(e)}), 500
+
+
+@storage_bp.route('/presigned_urls/multipart/abort', methods=['POST'])
+def abort_multipart_upload():
+    """Discard a multipart upload and its already uploaded parts"""
+    data = request.get_json() or {}
+    logger.info("POST /presigned_urls/multipart/abort for upload %s", data.get('upload_id'))
+
+    bucket = data.get('bucket')
+    key = data.get('key')
+    upload_id = data.get('upload_id')
+
+    if not bucket or not key or not upload_id:
+        return jsonify({"error": "'bucket', 'key' and 'upload_id' are required"}), 400
+
+    try:
+        get_s3_client().abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        return jsonify({'success': True}), 200
+
+    except ClientError as e:
+        logger.error("Error aborting multipart upload %s: %s", upload_id, str(e))
+        return jsonify({"error": e.response['Error']['Message']}), 400
+    except Exception as e:
+        logger.exception("Error aborting multipart upload")
+        return jsonify({"error": str(e)}), 500
+
+
+@storage_bp.route('/uploads/reconcile', methods=['POST'])
+def reconcile_photo_uploads():
+    """Check an SLD's or company's photo keys against S3
+
+    Expects JSON payload with sld_id or company_id, and optionally dry_run.
+    Flips Photo.upload_needed to match S3 and reports missing objects.
+    Runs inside the request, so scopes with more than RECONCILE_HTTP_MAX_KEYS
+    keys are refused with a 400; run `flask reconcile-uploads` for those.
+    """
+    data = request.get_json() or {}
+    logger.info("POST /uploads/reconcile with payload: %s", data)
+
+    try:
+        sld_id = uuid.UUID(data['sld_id']) if data.get('sld_id') else None
+        company_id = uuid.UUID(data['company_id']) if data.get('company_id') else None
+    except ValueError:
+        return jsonify({"error": "Invalid sld_id or company_id format"}), 400
+
+    if not sld_id and not company_id:
+        return jsonify({"error": "Either 'sld_id' or 'company_id' is required"}), 400
+
+    try:
+        keys = count_keys(sld_id=sld_id, company_id=company_id)
+        if keys > HTTP_MAX_KEYS:
+            return jsonify({
+                "error": f"{keys} keys to check, more than {HTTP_MAX_KEYS} per request; "
+                         "use `flask reconcile-uploads` or reconcile one SLD at a time"
+            }), 400
+
+        result = reconcile_uploads(
+            sld_id=sld_id,
+            company_id=company_id,
+            dry_run=bool(data.get('dry_run', False))
+        )
+        return jsonify(result), 200
+
+    except Exception as e:
+        logger.exception("Error reconciling uploads")
+        return jsonify({"error": str(e)}), 500
@@ -1,16 +1,43 @@
+from uuid import UUID
 from flask import Blueprint, request, jsonify
+from sqlalchemy import select
 from models.User import User
 from models.SLD import SLD
 from models.db import db
+from services import pagination
+from services.replicas import replica_read
 
 user_bp = Blueprint('user', __name__, url_prefix='/users')
 
 @user_bp.route('/', methods=['GET'])
+@replica_read
 def get_all_users():
-    users = User.query.all()
-    return jsonify([u.to_dict() for u in users]), 200
+    """Users, optionally of one company (?company_id=); pages with ?limit=&cursor="""
+    statement = select(User)
+    if request.args.get('company_id'):
+        try:
+            company_id = UUID(request.args['company_id'])
+        except ValueError:
+            return jsonify({'error': "'company_id' must be a company id"}), 400
+        statement = statement.where(User.company_id == company_id)
+
+    try:
+        page = pagination.requested_page(request.args)
+    except pagination.PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    cursor = None
+    if page:
+        try:
+            users, cursor = pagination.fetch_page(statement, [User.id], page, scalars=True)
+        except pagination.PaginationError as e:
+            return jsonify({'error': str(e)}), 400
+    else:
+        users = db.session.execute(statement).scalars().all()
+    return pagination.with_next_cursor(jsonify([u.to_dict() for u in users]), cursor), 200
 
 @user_bp.route('/<uuid:user_id>/slds', methods=['GET'])
+@replica_read
 def get_slds_by_user_company(user_id):
     user = User.query.get_or_404(user_id)
 
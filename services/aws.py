@@ -0,0 +1,68 @@
+"""Shared, thread-safe boto3 clients.
+
+boto3 clients are safe to share between threads once built, but building
+them through the default session is not, so creation is serialised here and
+each (service, region, endpoint) gets one client per process. The HTTP
+connection pool of every client is sized for the gunicorn thread count
+(AWS_MAX_POOL_CONNECTIONS), otherwise threads queue for botocore's default
+of 10 connections.
+
+Clients are never built at import time, so importing the app stays cheap.
+"""
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '32'))
+DEFAULT_REGION = os.getenv('AWS_REGION', 'us-east-2')
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(service_name, region_name=None, endpoint_url=None, config=None):
+    """Return the process-wide client for a service, creating it on first use"""
+    region_name = region_name or DEFAULT_REGION
+    key = (service_name, region_name, endpoint_url)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            base = Config(max_pool_connections=MAX_POOL_CONNECTIONS)
+            client = boto3.client(
+                service_name,
+                region_name=region_name,
+                endpoint_url=endpoint_url,
+                config=base.merge(config) if config else base
+            )
+            _clients[key] = client
+    return client
+
+
+def set_client(service_name, client, region_name=None, endpoint_url=None):
+    """Install a client for a service (fakes in benchmarks and local runs)"""
+    with _clients_lock:
+        _clients[(service_name, region_name or DEFAULT_REGION, endpoint_url)] = client
+
+
+def preload_service_models(service_names, region_name=None):
+    """Parse the botocore models for these services without keeping clients
+
+    Called in the gunicorn master when preloading: the parsed models stay in
+    the default session's loader cache and are shared copy-on-write with the
+    workers, which then build their own clients (and connections) cheaply.
+    """
+    for service_name in service_names:
+        boto3.client(service_name, region_name=region_name or DEFAULT_REGION)
+
+
+def reset_clients():
+    """Forget clients inherited across a fork; each process builds its own"""
+    global _clients_lock
+    _clients.clear()
+    _clients_lock = threading.Lock()
@@ -0,0 +1,116 @@
+"""Per-worker cache of the reference catalogs: node, edge and issue classes and forms.
+
+The catalogs change rarely but are fetched on every app launch. Each worker
+keeps the serialized response bytes per catalog together with the
+catalog's version from catalog_versions, which triggers bump on any change
+to the table (migration 0006). A request reads the versions (at most once
+every CATALOG_VERSION_TTL_SECONDS per worker) and re-serializes only when
+they moved.
+
+Responses carry a strong ETag (a hash of the body) and CATALOG_CACHE_CONTROL,
+and a matching If-None-Match gets 304 Not Modified without a body. GET
+/catalogs returns all four in one response, so a client can revalidate
+everything with one conditional request.
+
+Forms are soft-deletable, so entries are kept per visibility: the default
+live catalogs and the ?include_deleted=true ones are cached side by side.
+"""
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import namedtuple
+
+from flask import current_app, jsonify, request
+
+from models import db, NodeClass, EdgeClass, IssueClass, CatalogVersion
+from models.serializers import FORM
+from services import visibility
+
+logger = logging.getLogger(__name__)
+
+CATALOG_TABLES = ('node_classes', 'edge_classes', 'issue_classes', 'forms')
+
+CACHE_CONTROL = os.getenv('CATALOG_CACHE_CONTROL', 'public, max-age=86400')
+VERSION_TTL = float(os.getenv('CATALOG_VERSION_TTL_SECONDS', '2'))
+
+_Entry = namedtuple('_Entry', 'version body etag')
+
+_entries = {}
+_versions = {'checked_at': None, 'values': None}
+_versions_lock = threading.Lock()
+
+
+def _build(name, native):
+    if name == 'node_classes':
+        return [node_class.to_dict() for node_class in NodeClass.query.all()]
+    if name == 'edge_classes':
+        return [edge_class.to_dict() for edge_class in EdgeClass.query.all()]
+    if name == 'issue_classes':
+        return [issue_class.to_dict() for issue_class in IssueClass.query.all()]
+    return (FORM.native() if native else FORM).all()
+
+
+def current_versions():
+    """{table: version}, re-read at most every VERSION_TTL seconds; None if unavailable"""
+    now = time.monotonic()
+    with _versions_lock:
+        checked_at = _versions['checked_at']
+        if checked_at is not None and now - checked_at < VERSION_TTL:
+            return _versions['values']
+
+    try:
+        values = dict(db.session.query(CatalogVersion.name, CatalogVersion.version).all())
+    except Exception as e:
+        db.session.rollback()
+        logger.warning("Could not read catalog versions, serving catalogs uncached: %s", e)
+        values = None
+
+    with _versions_lock:
+        _versions['checked_at'] = now
+        _versions['values'] = values
+    return values
+
+
+def _with_deleted():
+    return visibility.current_mode() == visibility.ALL
+
+
+def _respond(key, tables, build):
+    versions = current_versions()
+    version = tuple(versions.get(table) for table in tables) if versions is not None else None
+
+    entry = _entries.get(key)
+    if entry is None or version is None or entry.version != version:
+        body = jsonify(build()).get_data()
+        entry = _Entry(version, body, hashlib.sha256(body).hexdigest()[:32])
+        if version is not None:
+            _entries[key] = entry
+        logger.info("Serialized catalog %s (version %s, %d bytes)", key, version, len(body))
+
+    response = current_app.response_class(entry.body, mimetype=current_app.json.mimetype)
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response.make_conditional(request)
+
+
+def catalog_response(name, native=False):
+    """The response for one catalog, from the cache when its version has not moved"""
+    return _respond((name, native, _with_deleted()), (name,), lambda: _build(name, native))
+
+
+def all_catalogs_response(native=False):
+    """All catalogs as {name: rows}, cached and versioned like catalog_response()"""
+    return _respond(
+        ('catalogs', native, _with_deleted()), CATALOG_TABLES,
+        lambda: {name: _build(name, native) for name in CATALOG_TABLES}
+    )
+
+
+def clear():
+    """Drop the cached catalogs and versions of this worker"""
+    _entries.clear()
+    with _versions_lock:
+        _versions['checked_at'] = None
+        _versions['values'] = None
@@ -0,0 +1,136 @@
+"""Database connection pool configuration and statistics.
+
+Engine options come from the environment so pool sizing can be tuned per
+deployment (number of gunicorn workers x pool size must stay under the RDS
+connection limit). Pre-ping and recycle drop connections that died in an RDS
+failover before a request gets to use them.
+
+The pool class records how long each checkout waited for a connection, which
+is what tells pool exhaustion apart from slow queries.
+"""
+import os
+import time
+import threading
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+# A checkout waiting longer than this counts as having queued for a connection
+SLOW_CHECKOUT_SECONDS = float(os.getenv('DB_POOL_SLOW_CHECKOUT_MS', '10')) / 1000
+
+
+def _env_bool(name, default):
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes')
+
+
+def _new_stats():
+    return {
+        'checkouts': 0,
+        'slow_checkouts': 0,
+        'timeouts': 0,
+        'total_wait_seconds': 0.0,
+        'max_wait_seconds': 0.0
+    }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout
+
+    Each engine's pool keeps its own stats, so the primary and every replica
+    are reported apart. They are handed on when the engine is disposed and
+    the pool recreated.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats_lock = threading.Lock()
+        self.stats = _new_stats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats_lock = self.stats_lock
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            with self.stats_lock:
+                self.stats['timeouts'] += 1
+            raise
+        waited = time.perf_counter() - started
+        with self.stats_lock:
+            stats = self.stats
+            stats['checkouts'] += 1
+            stats['total_wait_seconds'] += waited
+            if waited > stats['max_wait_seconds']:
+                stats['max_wait_seconds'] = waited
+            if waited >= SLOW_CHECKOUT_SECONDS:
+                stats['slow_checkouts'] += 1
+        return connection
+
+
+def engine_options(database_uri):
+    """Build SQLALCHEMY_ENGINE_OPTIONS from DB_POOL_* / DB_STATEMENT_TIMEOUT_MS
+
+    SQLite stand-ins (tests, local replica setups) keep the pool SQLAlchemy
+    picks for them: an in-memory database needs its single shared connection.
+    """
+    if database_uri and make_url(database_uri).get_backend_name() == 'sqlite':
+        return {}
+
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', 'true'),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    }
+
+    statement_timeout = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '0'))
+    if statement_timeout and (database_uri or '').startswith('postgres'):
+        options['connect_args'] = {'options': f"-c statement_timeout={statement_timeout}"}
+
+    return options
+
+
+def pool_status(engine):
+    """Current occupancy and checkout statistics of one engine's pool in this process"""
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool.stats_lock:
+            stats = dict(pool.stats)
+    else:
+        stats = _new_stats()
+
+    checkouts = stats['checkouts']
+    status = {
+        'class': type(pool).__name__,
+        'checkouts': checkouts,
+        'slow_checkouts': stats['slow_checkouts'],
+        'timeouts': stats['timeouts'],
+        'avg_wait_ms': round(stats['total_wait_seconds'] / checkouts * 1000, 3) if checkouts else 0.0,
+        'max_wait_ms': round(stats['max_wait_seconds'] * 1000, 3)
+    }
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout()
+        )
+    return status
+
+
+def init_app(app):
+    """Apply pool options from the environment; call before db.init_app"""
+    app.config.setdefault(
+        'SQLALCHEMY_ENGINE_OPTIONS',
+        engine_options(app.config.get('SQLALCHEMY_DATABASE_URI'))
+    )
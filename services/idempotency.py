@@ -0,0 +1,162 @@
+"""Idempotency-Key support for the create routes.
+
+Mobile clients retry creates on flaky connections. A view marked
+``@idempotent`` that receives an Idempotency-Key header runs at most once
+per key: before the view, the request claims the key with a single
+INSERT ... ON CONFLICT, and afterwards its response is stored with the
+key. A retry with the same key gets the stored response back, marked
+Idempotent-Replayed: true, without running the view or any domain query.
+
+- The same key sent with a different request body gets 422.
+- A retry that arrives while the first request is still running gets 409
+  with Retry-After.
+- Only 2xx responses and client errors that come from validating the
+  request are stored. Server errors, non-JSON responses and any response
+  to a request that hit a database error release the key, so the retry
+  runs the view again: the create routes turn every exception into a 400,
+  and a failed commit or a dropped connection must not be replayed for a
+  day.
+- Keys expire after IDEMPOTENCY_TTL_SECONDS (flask purge-deleted removes
+  them). A claim whose request never finished, for example because its
+  worker was killed, can be taken over after IDEMPOTENCY_LOCK_SECONDS.
+
+Claims and responses are written on their own connection and committed at
+once, so concurrent retries see them whatever the view does with its
+session.
+"""
+import os
+import hashlib
+import logging
+
+from flask import current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from models.db import db
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+TTL_SECONDS = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', '86400'))
+LOCK_SECONDS = int(os.getenv('IDEMPOTENCY_LOCK_SECONDS', '60'))
+
+# Inserts a new claim, or takes over an expired or abandoned one; returns a
+# row only when this request owns the key
+CLAIM = text("""
+    INSERT INTO idempotency_keys AS k (key, endpoint, request_hash, created_at)
+    VALUES (:key, :endpoint, :request_hash, now())
+    ON CONFLICT (key, endpoint) DO UPDATE
+        SET request_hash = EXCLUDED.request_hash, status_code = NULL, response_body = NULL, created_at = now()
+        WHERE k.created_at < now() - make_interval(secs => :ttl)
+           OR (k.status_code IS NULL AND k.created_at < now() - make_interval(secs => :lock))
+    RETURNING 1
+""")
+
+STORED = text("""
+    SELECT request_hash, status_code, response_body FROM idempotency_keys
+    WHERE key = :key AND endpoint = :endpoint
+""")
+
+STORE = text("""
+    UPDATE idempotency_keys SET status_code = :status_code, response_body = :body
+    WHERE key = :key AND endpoint = :endpoint
+""")
+
+RELEASE = text("DELETE FROM idempotency_keys WHERE key = :key AND endpoint = :endpoint AND status_code IS NULL")
+
+
+def idempotent(f):
+    """Mark a view as honouring the Idempotency-Key header"""
+    f.idempotent = True
+    return f
+
+
+def _request_hash():
+    digest = hashlib.sha256(request.path.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _claim():
+    view = current_app.view_functions.get(request.endpoint)
+    key = request.headers.get(HEADER)
+    if request.method != 'POST' or not key or not getattr(view, 'idempotent', False):
+        return None
+    if len(key) > MAX_KEY_LENGTH:
+        return jsonify({'error': f"{HEADER} must be at most {MAX_KEY_LENGTH} characters"}), 400
+
+    params = {'key': key, 'endpoint': request.endpoint, 'request_hash': _request_hash(),
+              'ttl': TTL_SECONDS, 'lock': LOCK_SECONDS}
+    with db.engine.begin() as connection:
+        claimed = connection.execute(CLAIM, params).first()
+        stored = None if claimed else connection.execute(STORED, params).first()
+
+    if claimed:
+        g.idempotency_key = params
+        return None
+    if stored is not None and stored.request_hash != params['request_hash']:
+        return jsonify({'error': f"{HEADER} was already used for a different request"}), 422
+    if stored is None or stored.status_code is None:
+        response = jsonify({'error': f"A request with this {HEADER} is still in progress"})
+        response.headers['Retry-After'] = '1'
+        return response, 409
+
+    logger.info("Replaying %s response for %s key %s", stored.status_code, request.endpoint, key)
+    response = current_app.response_class(stored.response_body, status=stored.status_code,
+                                          mimetype=current_app.json.mimetype)
+    response.headers[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def _release(params):
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(RELEASE, params)
+    except Exception as e:
+        logger.warning("Could not release %s %s: %s", HEADER, params['key'], e)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _note_database_error(context):
+    # Claims and stored responses use their own connections outside the view,
+    # so only the view's own queries get here while a key is held
+    if has_request_context() and 'idempotency_key' in g:
+        g.idempotency_database_error = True
+
+
+def _is_stored(response):
+    if not response.is_json or response.status_code >= 500:
+        return False
+    return response.status_code < 400 or not g.get('idempotency_database_error', False)
+
+
+def _store(response):
+    params = g.pop('idempotency_key', None)
+    if params is None:
+        return response
+    if not _is_stored(response):
+        _release(params)
+        return response
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(STORE, {**params, 'status_code': response.status_code, 'body': response.get_data()})
+    except Exception as e:
+        # The request itself succeeded; a retry will find the claim and wait for it to lapse
+        logger.warning("Could not store the response for %s %s: %s", HEADER, params['key'], e)
+    return response
+
+
+def _release_unfinished(exc):
+    params = g.pop('idempotency_key', None)
+    if params is not None:
+        _release(params)
+
+
+def init_app(app):
+    """Claim and replay Idempotency-Key requests to @idempotent views"""
+    app.before_request(_claim)
+    app.after_request(_store)
+    app.teardown_request(_release_unfinished)
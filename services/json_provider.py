@@ -0,0 +1,111 @@
+"""Flask JSON provider that encodes responses with orjson, and native JSON mode.
+
+Responses must stay byte-identical to Flask's default provider (compact
+separators, sorted keys, ASCII-escaped), so orjson is only used where its
+output is the same, and the stdlib encoder handles the rest:
+
+* output with non-ASCII characters or DEL, which the default provider
+  escapes as \\uXXXX and orjson writes as UTF-8;
+* floats the stdlib writes in exponent form (1e+16, 1e-05), which orjson
+  writes differently;
+* anything orjson cannot encode (integers over 64 bits, non-string keys),
+  including values Flask's default() rejects, so errors are unchanged;
+* indented output (debug mode) or any non-default dumps() options.
+
+Dates and dataclasses still go through Flask's default() (HTTP dates).
+NaN and Infinity floats encode as null with orjson, where the stdlib writes
+the non-standard NaN/Infinity tokens.
+
+Native JSON mode: views marked @native_json return JSON-valued fields
+(Task.submission, Form.schema, Quote.sow/tnm) as JSON values instead of
+strings holding JSON when the client sends "X-JSON-Mode: native" or
+?json=native. Large JSONB values arrive as models.serializers.RawJSON and
+are embedded with orjson.Fragment (orjson 3.9+) without being decoded;
+otherwise they are decoded and encoded like any other value.
+"""
+import re
+import json
+import logging
+
+from flask import current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+from models.serializers import RawJSON
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+_Fragment = getattr(orjson, 'Fragment', None)
+
+JSON_MODE_HEADER = 'X-JSON-Mode'
+
+_COMPACT = {'separators': (',', ':')}
+
+# A number in exponent form, or below 1e-4 (written as 0.0000... by orjson)
+_STDLIB_EXPONENT = re.compile(rb'[:,\[]-?(?:\d+(?:\.\d+)?[eE]|0\.0000)')
+
+
+def _orjson_default(o):
+    if isinstance(o, RawJSON):
+        return _Fragment(o.text) if _Fragment is not None else json.loads(o.text)
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    @staticmethod
+    def default(o):
+        if isinstance(o, RawJSON):
+            return json.loads(o.text)
+        return DefaultJSONProvider.default(o)
+
+    def _orjson_dumps(self, obj):
+        """obj encoded by orjson, or None when the stdlib output would differ"""
+        try:
+            encoded = orjson.dumps(
+                obj,
+                default=_orjson_default,
+                option=orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS
+            )
+        except (TypeError, ValueError):
+            return None
+        if not encoded.isascii() or b'\x7f' in encoded or _STDLIB_EXPONENT.search(encoded):
+            return None
+        return encoded.decode('ascii')
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and kwargs == _COMPACT and self.ensure_ascii and self.sort_keys:
+            encoded = self._orjson_dumps(obj)
+            if encoded is not None:
+                return encoded
+        return super().dumps(obj, **kwargs)
+
+
+def native_json(f):
+    """Mark a view as answering in native JSON mode when the client asks"""
+    f.native_json = True
+    return f
+
+
+def native_json_requested():
+    return (request.headers.get(JSON_MODE_HEADER, '').lower() == 'native'
+            or request.args.get('json', '').lower() == 'native')
+
+
+def _vary_on_json_mode(response):
+    view = current_app.view_functions.get(request.endpoint)
+    if getattr(view, 'native_json', False):
+        response.vary.add(JSON_MODE_HEADER)
+    return response
+
+
+def init_app(app):
+    """Encode JSON responses with orjson when it is installed"""
+    if orjson is None:
+        logger.info("orjson is not installed; using the standard JSON encoder")
+    app.json = FastJSONProvider(app)
+    app.after_request(_vary_on_json_mode)
@@ -0,0 +1,99 @@
+"""Set-based upserts for the four mapping tables.
+
+upsert() links any number of pairs in one statement:
+
+    INSERT INTO mapping_task_session (id, task_id, session_id, is_deleted) VALUES ...
+    ON CONFLICT (task_id, session_id) DO UPDATE SET is_deleted = false
+    RETURNING ...
+
+New pairs are inserted, soft-deleted ones restored, and live ones left
+linked, so concurrent or repeated calls converge on the same rows instead of
+racing a SELECT. The conflict targets are the primary keys of
+mapping_issue_task and mapping_quote_task and the unique indexes that
+migration 0011 adds to mapping_task_session and mapping_user_task. A
+user-task mapping's type only changes when the caller names one.
+"""
+import uuid
+
+from sqlalchemy.dialects.postgresql import insert
+
+from models import MappingIssueTask, MappingTaskSession, MappingQuoteTask, MappingUserTask
+from models.db import db
+from models.serializers import ISSUE_TASK, TASK_SESSION, QUOTE_TASK, USER_TASK
+
+MAX_PAIRS = 1000
+
+# kind: (model, key columns in conflict target order, serializer)
+MAPPING_KINDS = {
+    'issue-task': (MappingIssueTask, ('issue_id', 'task_id'), ISSUE_TASK),
+    'task-session': (MappingTaskSession, ('task_id', 'session_id'), TASK_SESSION),
+    'quote-task': (MappingQuoteTask, ('quote_id', 'task_id'), QUOTE_TASK),
+    'user-task': (MappingUserTask, ('task_id', 'user_id'), USER_TASK),
+}
+
+
+class MappingError(ValueError):
+    pass
+
+
+def parse_pairs(kind, items):
+    """Validated rows for upsert() from a list of {key: id} objects, duplicates dropped"""
+    if kind not in MAPPING_KINDS:
+        raise MappingError(f"Unknown mapping kind: {kind}")
+    if not isinstance(items, list) or not items:
+        raise MappingError("mappings must be a non-empty list")
+    if len(items) > MAX_PAIRS:
+        raise MappingError(f"At most {MAX_PAIRS} mappings per request")
+
+    model, keys, _ = MAPPING_KINDS[kind]
+    rows = {}
+    for item in items:
+        try:
+            key = tuple(uuid.UUID(str(item[name])) for name in keys)
+        except (KeyError, TypeError, ValueError):
+            raise MappingError(f"Every mapping needs {' and '.join(keys)} as ids")
+        row = dict(zip(keys, key))
+        if model is MappingUserTask and item.get('mapping_type'):
+            row['mapping_type'] = item['mapping_type']
+        # The same pair twice in one INSERT ... ON CONFLICT is an error; the last one wins
+        rows[key] = row
+    return list(rows.values())
+
+
+def upsert(kind, rows, returning=None):
+    """Insert or restore the given mappings; the RETURNING rows
+
+    The rows hold the serializer's columns of the kind unless other
+    columns are asked for. A user-task row without a mapping_type is
+    inserted as an assignee but keeps its type when it already exists;
+    rows that name one set it, in a second statement when the rows are
+    mixed.
+    """
+    model, keys, serializer = MAPPING_KINDS[kind]
+    columns = returning or serializer.columns
+    if model is not MappingUserTask:
+        return _upsert(model, keys, rows, columns, update_type=False)
+
+    typed = [row for row in rows if 'mapping_type' in row]
+    untyped = [{**row, 'mapping_type': 'assignee'} for row in rows if 'mapping_type' not in row]
+    result = []
+    for group, update_type in ((typed, True), (untyped, False)):
+        if group:
+            result += _upsert(model, keys, group, columns, update_type)
+    return result
+
+
+def _upsert(model, keys, rows, columns, update_type):
+    has_id = 'id' in model.__table__.c
+    values = [{**row, 'is_deleted': False, **({'id': uuid.uuid4()} if has_id else {})} for row in rows]
+    statement = insert(model).values(values)
+    update = {'is_deleted': False}
+    if update_type:
+        update['mapping_type'] = statement.excluded.mapping_type
+    statement = statement.on_conflict_do_update(index_elements=list(keys), set_=update)
+    return db.session.execute(statement.returning(*columns)).all()
+
+
+def link(kind, rows):
+    """upsert() the rows and serialize the linked mappings"""
+    return MAPPING_KINDS[kind][2].dump(upsert(kind, rows))
@@ -0,0 +1,101 @@
+"""Prometheus metrics for every route, exposed at /metrics.
+
+Per request we record latency, response size and status, plus how many SQL
+statements it ran and how long they took (SQLAlchemy cursor events). Labels
+use the Flask endpoint name, so cardinality stays bounded by the number of
+routes.
+
+Under gunicorn, set PROMETHEUS_MULTIPROC_DIR to an empty, writable directory
+so each worker writes its samples there and /metrics aggregates them all;
+gunicorn.conf.py clears it on start and marks exited workers dead.
+"""
+import os
+import time
+
+from flask import Response, g, has_request_context, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram,
+                               generate_latest, multiprocess)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+    # Also lets CLI commands and the dev server run with the variable set
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 20, 50, 100, 250)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency',
+    ['method', 'endpoint', 'status'], buckets=LATENCY_BUCKETS
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Response body size',
+    ['method', 'endpoint'], buckets=SIZE_BUCKETS
+)
+SQL_STATEMENTS = Histogram(
+    'http_request_sql_statements', 'SQL statements executed per request',
+    ['method', 'endpoint'], buckets=STATEMENT_BUCKETS
+)
+SQL_SECONDS = Histogram(
+    'http_request_sql_seconds', 'Time spent in SQL statements per request',
+    ['method', 'endpoint'], buckets=LATENCY_BUCKETS
+)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'metrics_started' in g:
+        g.sql_statements += 1
+        g.sql_seconds += time.perf_counter() - context._metrics_started
+
+
+def _endpoint_label():
+    return request.endpoint or 'unmatched'
+
+
+def _start_timer():
+    g.metrics_started = time.perf_counter()
+    g.sql_statements = 0
+    g.sql_seconds = 0.0
+
+
+def _record(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+
+    method = request.method
+    endpoint = _endpoint_label()
+    REQUEST_LATENCY.labels(method, endpoint, str(response.status_code)).observe(time.perf_counter() - started)
+    SQL_STATEMENTS.labels(method, endpoint).observe(g.sql_statements)
+    SQL_SECONDS.labels(method, endpoint).observe(g.sql_seconds)
+
+    size = response.content_length
+    if size is None and not response.is_streamed and not response.direct_passthrough:
+        size = len(response.get_data())
+    if size is not None:
+        RESPONSE_SIZE.labels(method, endpoint).observe(size)
+    return response
+
+
+def metrics_view():
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_app(app):
+    """Instrument every route of the app and add GET /metrics"""
+    app.before_request(_start_timer)
+    app.after_request(_record)
+    app.add_url_rule('/metrics', 'metrics', metrics_view, methods=['GET'])
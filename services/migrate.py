@@ -0,0 +1,177 @@
+"""Versioned schema migrations.
+
+Migrations are numbered modules in the top-level ``migrations`` package
+(``0001_baseline.py``, ``0002_hot_path_indexes.py``, ...). Each defines
+``upgrade(connection)`` and may set ``TRANSACTIONAL = False`` when it runs
+statements that cannot be used inside a transaction, such as
+``CREATE INDEX CONCURRENTLY``. Applied versions are recorded in
+``schema_migrations``; an advisory lock keeps two deploys from migrating at
+the same time.
+"""
+import re
+import logging
+import importlib
+import pkgutil
+from datetime import datetime, timezone
+
+import click
+from sqlalchemy import text
+
+from models.db import db
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_PACKAGE = 'migrations'
+MIGRATION_NAME = re.compile(r'^(\d{4})_(\w+)$')
+
+# Arbitrary, fixed key for pg_advisory_lock
+ADVISORY_LOCK_KEY = 727_001
+
+
+class Migration:
+    def __init__(self, version, name, module):
+        self.version = version
+        self.name = name
+        self.module = module
+
+    @property
+    def transactional(self):
+        return getattr(self.module, 'TRANSACTIONAL', True)
+
+    @property
+    def description(self):
+        doc = (self.module.__doc__ or '').strip()
+        return doc.splitlines()[0] if doc else ''
+
+
+def discover_migrations():
+    """Import every numbered migration module, ordered by version"""
+    package = importlib.import_module(MIGRATIONS_PACKAGE)
+    migrations = []
+    for info in pkgutil.iter_modules(package.__path__):
+        match = MIGRATION_NAME.match(info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{MIGRATIONS_PACKAGE}.{info.name}")
+        migrations.append(Migration(int(match.group(1)), match.group(2), module))
+
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {MIGRATIONS_PACKAGE}: {versions}")
+    return migrations
+
+
+def _ensure_version_table(connection):
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL
+        )
+    """))
+
+
+def applied_versions(connection):
+    _ensure_version_table(connection)
+    rows = connection.execute(text("SELECT version FROM schema_migrations"))
+    return {row.version for row in rows}
+
+
+def _record(connection, migration):
+    connection.execute(
+        text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+        {'version': migration.version, 'name': migration.name, 'applied_at': datetime.now(timezone.utc)}
+    )
+
+
+def upgrade(engine, target=None):
+    """Apply pending migrations up to target (default: all); returns the applied versions"""
+    migrations = discover_migrations()
+    applied = []
+
+    # Autocommit connection: holds the session-level lock and runs the
+    # non-transactional migrations; transactional ones open their own block
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {'key': ADVISORY_LOCK_KEY})
+        try:
+            done = applied_versions(connection)
+            for migration in migrations:
+                if migration.version in done or (target is not None and migration.version > target):
+                    continue
+
+                logger.info("Applying migration %04d_%s", migration.version, migration.name)
+                if migration.transactional:
+                    with engine.begin() as transaction:
+                        migration.module.upgrade(transaction)
+                        _record(transaction, migration)
+                else:
+                    # Idempotent by convention, so a failure half way can simply be re-run
+                    migration.module.upgrade(connection)
+                    _record(connection, migration)
+                applied.append(migration.version)
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': ADVISORY_LOCK_KEY})
+
+    return applied
+
+
+def status(engine):
+    """List every known migration with whether it has been applied"""
+    with engine.begin() as connection:
+        done = applied_versions(connection)
+    return [
+        {
+            'version': m.version,
+            'name': m.name,
+            'applied': m.version in done,
+            'transactional': m.transactional,
+            'description': m.description
+        }
+        for m in discover_migrations()
+    ]
+
+
+def create_index_concurrently(connection, name, table, columns, where=None, using=None, unique=False):
+    """Build an index without blocking writes; must run outside a transaction
+
+    A failed concurrent build leaves an INVALID index behind that IF NOT
+    EXISTS would otherwise skip, so such leftovers are dropped first.
+    """
+    invalid = connection.execute(text("""
+        SELECT 1 FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name AND NOT i.indisvalid
+    """), {'name': name}).first()
+    if invalid:
+        logger.warning("Dropping invalid index %s left by an earlier build", name)
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+    method = f" USING {using}" if using else ''
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+    statement = f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {name} ON {table}{method} ({', '.join(columns)})"
+    if where:
+        statement += f" WHERE {where}"
+    logger.info("%s", statement)
+    connection.execute(text(statement))
+
+
+def init_app(app):
+    """Register the schema migration CLI commands"""
+
+    @app.cli.command('schema-migrate')
+    @click.option('--to', 'target', type=int, default=None, help='Stop after this version.')
+    def schema_migrate_command(target):
+        """Apply pending schema migrations."""
+        applied = upgrade(db.engine, target=target)
+        if applied:
+            click.echo(f"Applied {', '.join(f'{v:04d}' for v in applied)}")
+        else:
+            click.echo("Schema is up to date")
+
+    @app.cli.command('schema-status')
+    def schema_status_command():
+        """Show applied and pending schema migrations."""
+        for migration in status(db.engine):
+            state = 'applied' if migration['applied'] else 'pending'
+            click.echo(f"{migration['version']:04d}  {state:8}  {migration['name']}  {migration['description']}")
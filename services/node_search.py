@@ -0,0 +1,110 @@
+"""Compile GET /nodes/search query parameters to filters on Node.core_attributes.
+
+core_attributes is a list of {"name": ..., "value": ...} objects. Each
+attr.<name>[__<op>]=<value> parameter becomes one condition; all of them
+must hold:
+
+    attr.voltage=480V          core_attributes @> '[{"name": "voltage", "value": "480V"}]'
+    attr.voltage=480           node_attribute_number(core_attributes, 'voltage') = 480
+    attr.rating__gt=200        node_attribute_number(core_attributes, 'rating') > 200
+                               (also __gte, __lt, __lte)
+    attr.serial__exists=true   core_attributes @> '[{"name": "serial"}]'
+
+Containment is answered by the GIN index on core_attributes.
+node_attribute_number() (migration 0003) is the leading number of an
+attribute's value, so "480V" compares as 480; the names in
+INDEXED_ATTRIBUTES have expression indexes on it, other names are checked
+row by row within the company's nodes.
+"""
+import math
+import operator
+from uuid import UUID
+
+from sqlalchemy import Float, func, not_
+
+from models import Node
+from services.pagination import PaginationError
+
+ATTRIBUTE_PREFIX = 'attr.'
+
+# Attributes with an expression index on node_attribute_number() (migration 0003)
+INDEXED_ATTRIBUTES = ('voltage', 'rating', 'amperage')
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+COMPARISONS = {
+    'eq': operator.eq,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+}
+
+
+class SearchError(ValueError):
+    pass
+
+
+def attribute_number(name):
+    return func.node_attribute_number(Node.core_attributes, name, type_=Float)
+
+
+def _number(value):
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def attribute_filter(name, op, value):
+    if op == 'exists':
+        present = Node.core_attributes.contains([{'name': name}])
+        if value.lower() in ('', 'true', '1'):
+            return present
+        return not_(func.coalesce(present, False))
+
+    if op not in COMPARISONS:
+        raise SearchError(f"Unknown operator '{op}' for attribute '{name}'")
+
+    number = _number(value)
+    if number is not None:
+        return COMPARISONS[op](attribute_number(name), number)
+    if op != 'eq':
+        raise SearchError(f"attr.{name}__{op} needs a number, got '{value}'")
+    return Node.core_attributes.contains([{'name': name, 'value': value}])
+
+
+def attribute_criteria(args):
+    """Conditions for every attr.* parameter in args (a MultiDict)"""
+    criteria = []
+    for key, value in args.items(multi=True):
+        if not key.startswith(ATTRIBUTE_PREFIX):
+            continue
+        name, _, op = key[len(ATTRIBUTE_PREFIX):].partition('__')
+        if not name:
+            raise SearchError(f"Missing attribute name in '{key}'")
+        criteria.append(attribute_filter(name, op or 'eq', value))
+    return criteria
+
+
+def page_limit(args):
+    try:
+        limit = int(args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be positive")
+    return min(limit, MAX_LIMIT)
+
+
+def page_cursor(args):
+    """The id to continue after, from a previous page's next_cursor"""
+    cursor = args.get('cursor')
+    if not cursor:
+        return None
+    try:
+        return UUID(cursor)
+    except ValueError:
+        raise PaginationError("cursor must be a next_cursor value from a previous page")
@@ -0,0 +1,210 @@
+"""Transactional outbox for side effects (AWS calls, follow-up writes).
+
+Routes call ``enqueue()`` before they commit, so the job row is written in
+the same transaction as the domain change. Workers claim pending jobs in
+batches with ``SELECT ... FOR UPDATE SKIP LOCKED``, so any number of worker
+threads or processes can run side by side without picking the same job.
+"""
+import os
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+import click
+from sqlalchemy import event, or_, select, update
+from sqlalchemy.orm import Session
+
+from models.db import db
+from models.OutboxJob import OutboxJob
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '20'))
+POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', '2.0'))
+LEASE_SECONDS = int(os.getenv('OUTBOX_LEASE_SECONDS', '300'))
+MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))
+
+_handlers = {}
+_failure_handlers = {}
+_wakeup = threading.Event()
+_worker_lock = threading.Lock()
+_worker_started = False
+
+
+def handler(kind):
+    """Register the function that performs jobs of the given kind"""
+    def decorator(f):
+        _handlers[kind] = f
+        return f
+    return decorator
+
+
+def on_failure(kind):
+    """Register the function called with (payload, error) once a job of the given kind gives up
+
+    It runs in the transaction that marks the job failed.
+    """
+    def decorator(f):
+        _failure_handlers[kind] = f
+        return f
+    return decorator
+
+
+def enqueue(kind, payload, delay_seconds=0):
+    """Add a job to the current session; it is persisted by the caller's commit"""
+    job = OutboxJob(
+        kind=kind,
+        payload=payload,
+        available_at=datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+    )
+    db.session.add(job)
+    db.session.info['outbox_enqueued'] = True
+    return job
+
+
+@event.listens_for(Session, 'after_commit')
+def _wake_worker_after_commit(session):
+    if session.info.pop('outbox_enqueued', False):
+        _wakeup.set()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_enqueued_on_rollback(session):
+    session.info.pop('outbox_enqueued', None)
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """Lease up to batch_size due jobs and return (id, kind, payload, attempts) rows"""
+    now = datetime.now(timezone.utc)
+    claimable = (
+        select(OutboxJob.id)
+        .where(or_(
+            (OutboxJob.status == 'pending') & (OutboxJob.available_at <= now),
+            # A worker died while holding the lease
+            (OutboxJob.status == 'running') & (OutboxJob.locked_until < now)
+        ))
+        .order_by(OutboxJob.available_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.session.execute(
+        update(OutboxJob)
+        .where(OutboxJob.id.in_(claimable.scalar_subquery()))
+        .values(
+            status='running',
+            attempts=OutboxJob.attempts + 1,
+            locked_until=now + timedelta(seconds=LEASE_SECONDS)
+        )
+        .returning(OutboxJob.id, OutboxJob.kind, OutboxJob.payload, OutboxJob.attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    return rows
+
+
+def _run_job(job_id, kind, payload, attempts):
+    job_handler = _handlers.get(kind)
+    try:
+        if job_handler is None:
+            raise LookupError(f"No outbox handler registered for '{kind}'")
+        result = job_handler(payload)
+
+        # Handler writes and the completion marker commit together
+        db.session.execute(
+            update(OutboxJob)
+            .where(OutboxJob.id == job_id)
+            .values(
+                status='done',
+                result=result,
+                locked_until=None,
+                completed_at=datetime.now(timezone.utc)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        logger.info("Outbox job %s (%s) done", job_id, kind)
+    except Exception as e:
+        db.session.rollback()
+        exhausted = attempts >= MAX_ATTEMPTS
+        backoff = min(2 ** attempts, 600)
+        logger.error("Outbox job %s (%s) attempt %d failed: %s", job_id, kind, attempts, e)
+        if exhausted and kind in _failure_handlers:
+            try:
+                _failure_handlers[kind](payload, e)
+            except Exception as failure_error:
+                db.session.rollback()
+                logger.error("Failure handler for outbox job %s (%s) failed: %s", job_id, kind, failure_error)
+        db.session.execute(
+            update(OutboxJob)
+            .where(OutboxJob.id == job_id)
+            .values(
+                status='failed' if exhausted else 'pending',
+                last_error=str(e),
+                locked_until=None,
+                available_at=datetime.now(timezone.utc) + timedelta(seconds=backoff)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+
+def process_batch(batch_size=BATCH_SIZE):
+    """Claim and run one batch of jobs; returns how many were claimed"""
+    rows = claim_batch(batch_size)
+    for job_id, kind, payload, attempts in rows:
+        _run_job(job_id, kind, payload, attempts)
+    return len(rows)
+
+
+def run_worker(app, batch_size=BATCH_SIZE, poll_interval=POLL_INTERVAL, stop_event=None):
+    """Process jobs until stop_event is set, sleeping while the queue is empty"""
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        _wakeup.clear()
+        with app.app_context():
+            try:
+                claimed = process_batch(batch_size)
+            except Exception as e:
+                db.session.rollback()
+                logger.error("Outbox worker error: %s", e)
+                claimed = 0
+        if claimed < batch_size:
+            _wakeup.wait(poll_interval)
+
+
+def start_worker_thread(app):
+    """Start the in-process worker thread once per process"""
+    global _worker_started
+    with _worker_lock:
+        if _worker_started:
+            return
+        _worker_started = True
+    thread = threading.Thread(
+        target=run_worker,
+        args=(app,),
+        name='outbox-worker',
+        daemon=True
+    )
+    thread.start()
+    logger.info("Started in-process outbox worker")
+
+
+def init_app(app):
+    """Register the worker CLI and, unless disabled, an in-process worker
+
+    The in-process worker starts on the first request so that it runs in the
+    serving process (after any fork) and never during CLI commands.
+    """
+    if os.getenv('OUTBOX_INPROCESS_WORKER', 'true').lower() == 'true':
+        @app.before_request
+        def _ensure_outbox_worker():
+            if not _worker_started:
+                start_worker_thread(app)
+
+    @app.cli.command('outbox-worker')
+    @click.option('--batch-size', default=BATCH_SIZE, show_default=True)
+    @click.option('--poll-interval', default=POLL_INTERVAL, show_default=True)
+    def outbox_worker_command(batch_size, poll_interval):
+        """Run a standalone outbox worker."""
+        logger.info("Outbox worker running (batch size %d)", batch_size)
+        run_worker(app, batch_size=batch_size, poll_interval=poll_interval)
@@ -0,0 +1,118 @@
+"""Keyset (cursor) pagination for list endpoints.
+
+Opt-in: a list endpoint pages only when the request has ?limit= or
+?cursor=, so existing clients keep getting every row. A paged response has
+the same body, holding at most limit rows ordered by the endpoint's key
+columns, and an X-Next-Cursor header unless it is the last page:
+
+    page = requested_page(request.args)
+    if page:
+        items, cursor = fetch_page(select(Item), [Item.timestamp, Item.id], page, scalars=True)
+        response = with_next_cursor(jsonify([i.to_dict() for i in items]), cursor)
+
+Each page continues with WHERE (keys) > (cursor) ORDER BY keys, so with an
+index on the key columns every page costs the same however deep it is.
+"""
+import json
+import uuid
+import base64
+import binascii
+from datetime import datetime
+
+from sqlalchemy import DateTime, literal, tuple_
+from sqlalchemy.dialects.postgresql import UUID
+
+from models.db import db
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value) if isinstance(value, uuid.UUID) else value
+
+
+def _decode_value(column, value):
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, UUID):
+        return uuid.UUID(value)
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_encode_value(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, keys):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+        # encode_cursor writes every key (a timestamp or a UUID) as a string
+        if not all(isinstance(value, str) for value in values):
+            raise ValueError(cursor)
+        return [_decode_value(key, value) for key, value in zip(keys, values)]
+    except (binascii.Error, ValueError, TypeError, AttributeError):
+        raise PaginationError("cursor must be an X-Next-Cursor value from a previous page")
+
+
+class Page:
+    def __init__(self, limit, cursor):
+        self.limit = limit
+        self.cursor = cursor
+
+    def split(self, rows, key):
+        """This page's rows and the next page's cursor (None on the last page)"""
+        if len(rows) <= self.limit:
+            return rows, None
+        rows = rows[:self.limit]
+        return rows, encode_cursor(key(rows[-1]))
+
+
+def requested_page(args, default_limit=DEFAULT_LIMIT, max_limit=MAX_LIMIT):
+    """The page asked for with ?limit=&cursor=, or None when the client wants every row"""
+    if 'limit' not in args and 'cursor' not in args:
+        return None
+    try:
+        limit = int(args.get('limit', default_limit))
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be positive")
+    return Page(min(limit, max_limit), args.get('cursor') or None)
+
+
+def paginate(statement, keys, page):
+    """statement narrowed to page: rows after its cursor in key order, plus one to detect more"""
+    if page.cursor:
+        values = decode_cursor(page.cursor, keys)
+        after = tuple_(*[literal(value, key.type) for key, value in zip(keys, values)])
+        statement = statement.where(tuple_(*keys) > after)
+    return statement.order_by(*keys).limit(page.limit + 1)
+
+
+def fetch_page(statement, keys, page, scalars=False):
+    """One page of statement's rows (or entities, with scalars) and the next cursor
+
+    The key values are read from each row by attribute name, so the
+    statement must select the key columns (or whole entities with scalars).
+    """
+    result = db.session.execute(paginate(statement, keys, page))
+    rows = result.scalars().all() if scalars else result.all()
+    return page.split(rows, lambda row: [getattr(row, key.key) for key in keys])
+
+
+def with_next_cursor(response, cursor):
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    return response
@@ -0,0 +1,200 @@
+"""Monthly range partitions of ir_photos and tasks.
+
+Both tables are partitioned by their creation time (migration 0009):
+
+    ir_photos   date_created
+    tasks       created_at
+
+Everything that existed before the migration lives in <table>_legacy, a
+partition bounded FROM (MINVALUE); newer rows go to one partition per month,
+<table>_pYYYYMM, and <table>_default catches rows beyond the last month
+created so an insert never fails for lack of a partition.
+
+Partitions are created ahead of time by ``flask ensure-partitions`` (run it
+daily from cron; PARTITION_MONTHS_AHEAD months are kept ready). A run
+catches up on the months missed since the last one. Reads that
+filter on the partition key, such as ?since= on the per-SLD lists, only
+scan the partitions of that window; old months stay untouched, so their
+pages stay frozen and vacuum skips them.
+
+Per-SLD reads without a window (/sld, and the lists without ?since=) are
+not pruned: they probe the (sld_id, id) index of every partition, one
+small probe per month. Hash subpartitions on sld_id would not change that,
+since every month would still hold one subpartition to probe, and they
+would multiply the number of tables by the bucket count. Pruning by SLD
+would need sld_id as the top-level key, which gives up the month pruning
+of windowed reads and the frozen old months.
+"""
+import os
+import re
+import logging
+from datetime import datetime, timezone
+
+import click
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import text
+
+from models.db import db
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = {
+    'ir_photos': 'date_created',
+    'tasks': 'created_at',
+}
+
+MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', '3'))
+LOCK_TIMEOUT_MS = int(os.getenv('PARTITION_LOCK_TIMEOUT_MS', '5000'))
+
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+class WindowError(ValueError):
+    pass
+
+
+def requested_since(args):
+    """?since= as a naive UTC datetime, or None when the request has none"""
+    value = args.get('since')
+    if not value:
+        return None
+    try:
+        since = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise WindowError("since must be an ISO 8601 date or timestamp")
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+
+def month_start(moment):
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y%m}"
+
+
+def is_partitioned(connection, table):
+    return connection.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"
+    ), {'table': table}).scalar() or False
+
+
+def leaf_partitions(connection, table):
+    """The partitions of table, or [table] itself when it is not partitioned"""
+    if not is_partitioned(connection, table):
+        return [table]
+    return [row[0] for row in connection.execute(text("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:table)
+        ORDER BY c.relname
+    """), {'table': table})]
+
+
+def covered_until(connection, table):
+    """The upper bound of the last range partition (the default partition aside)"""
+    bounds = connection.execute(text("""
+        SELECT pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:table)
+    """), {'table': table}).scalars()
+    uppers = [datetime.fromisoformat(match.group(1)) for bound in bounds
+              for match in [_UPPER_BOUND.search(bound or '')] if match]
+    return max(uppers) if uppers else None
+
+
+def ensure_partitions(connection, months_ahead=MONTHS_AHEAD, now=None):
+    """Create the missing monthly partitions up to months_ahead months from now; the names created
+
+    Months are created from the end of the last existing partition, so
+    runs that were missed are caught up. Rows that landed in the default
+    partition meanwhile are moved into their month's new partition.
+
+    connection must be in autocommit mode. Creating a partition briefly
+    locks its parent, so each waits at most PARTITION_LOCK_TIMEOUT_MS. The
+    columns hold naive UTC timestamps, so months are UTC months.
+    """
+    last = month_start(now or datetime.utcnow()) + relativedelta(months=months_ahead)
+    created = []
+    connection.execute(text(f"SET lock_timeout = {LOCK_TIMEOUT_MS}"))
+    try:
+        _create_months(connection, last, created)
+    finally:
+        connection.execute(text("RESET lock_timeout"))
+    return created
+
+
+def _create_months(connection, last, created):
+    for table, key in PARTITIONED_TABLES.items():
+        if not is_partitioned(connection, table):
+            logger.warning("%s is not partitioned yet (migration 0009); skipping", table)
+            continue
+        covered = covered_until(connection, table)
+        lower = month_start(covered) if covered else last
+        while lower <= last:
+            upper = lower + relativedelta(months=1)
+            name = partition_name(table, lower)
+            if _default_has_rows(connection, table, key, lower, upper):
+                _create_from_default(connection, table, key, name, lower, upper)
+            else:
+                connection.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{lower:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+                ))
+            created.append(name)
+            logger.info("Created partition %s", name)
+            lower = upper
+
+
+def _default_has_rows(connection, table, key, lower, upper):
+    if connection.execute(text("SELECT to_regclass(:name)"), {'name': f"{table}_default"}).scalar() is None:
+        return False
+    return connection.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {table}_default WHERE {key} >= :lower AND {key} < :upper)"
+    ), {'lower': lower, 'upper': upper}).scalar()
+
+
+def _create_from_default(connection, table, key, name, lower, upper):
+    """Create a month's partition out of the rows the default partition holds for it
+
+    A partition cannot be added while the default partition has rows in
+    its range. The month is built as a plain table, the rows are moved
+    into it and it is attached, all in one transaction: the attach finds
+    the default partition clear of the range, and no parent trigger fires
+    on the moved rows (deleted_at and the search vectors stay as they were).
+    """
+    columns = ', '.join(f'"{column}"' for column in connection.execute(text("""
+        SELECT attname FROM pg_attribute
+        WHERE attrelid = to_regclass(:table) AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum
+    """), {'table': table}).scalars())
+    in_month = f"{key} >= '{lower:%Y-%m-%d}' AND {key} < '{upper:%Y-%m-%d}'"
+
+    connection.execute(text("BEGIN"))
+    try:
+        connection.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+        moved = connection.execute(text(
+            f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {table}_default WHERE {in_month}"
+        )).rowcount
+        connection.execute(text(f"DELETE FROM {table}_default WHERE {in_month}"))
+        connection.execute(text(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{lower:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+        ))
+        connection.execute(text("COMMIT"))
+    except Exception:
+        connection.execute(text("ROLLBACK"))
+        raise
+    logger.info("Moved %d rows of %s from %s_default", moved, name, table)
+
+
+def init_app(app):
+    """Register the partition maintenance CLI command"""
+
+    @app.cli.command('ensure-partitions')
+    @click.option('--months-ahead', default=MONTHS_AHEAD, show_default=True)
+    def ensure_partitions_command(months_ahead):
+        """Create the upcoming monthly partitions of ir_photos and tasks."""
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            created = ensure_partitions(connection, months_ahead)
+        click.echo(f"Created {', '.join(created)}" if created else "Partitions are up to date")
@@ -0,0 +1,107 @@
+"""Flag sequential scans in the query plans behind GET /sld/<sld_id>.
+
+Each query the route runs is EXPLAINed against a real SLD. By default the
+planner is told to avoid sequential scans, so a Seq Scan that remains means
+no usable index exists; on small tables Postgres would otherwise legitimately
+prefer a Seq Scan and hide a missing index until the table grows.
+"""
+import json
+import logging
+
+import click
+from sqlalchemy import text
+
+from models.db import db
+
+logger = logging.getLogger(__name__)
+
+# Mirrors the per-SLD reads in app.get_sld
+SLD_QUERIES = {
+    'sld': "SELECT * FROM slds WHERE id = :sld_id",
+    'nodes': "SELECT * FROM nodes WHERE sld_id = :sld_id",
+    'edges': "SELECT * FROM edges WHERE sld_id = :sld_id",
+    'photos': "SELECT * FROM photos WHERE sld_id = :sld_id",
+    'ir_photos': "SELECT * FROM ir_photos WHERE sld_id = :sld_id",
+    'ir_sessions': "SELECT * FROM ir_sessions WHERE sld_id = :sld_id",
+    'issues': "SELECT * FROM issues WHERE sld_id = :sld_id",
+    'quotes': "SELECT * FROM quotes WHERE sld_id = :sld_id",
+    'tasks': "SELECT * FROM tasks WHERE sld_id = :sld_id",
+    'mapping_issue_task': (
+        "SELECT * FROM mapping_issue_task"
+        " WHERE issue_id = ANY(CAST(:issue_ids AS uuid[])) OR task_id = ANY(CAST(:task_ids AS uuid[]))"
+    ),
+    'mapping_task_session': (
+        "SELECT * FROM mapping_task_session"
+        " WHERE task_id = ANY(CAST(:task_ids AS uuid[])) OR session_id = ANY(CAST(:session_ids AS uuid[]))"
+    ),
+    'mapping_quote_task': (
+        "SELECT * FROM mapping_quote_task"
+        " WHERE quote_id = ANY(CAST(:quote_ids AS uuid[])) OR task_id = ANY(CAST(:task_ids AS uuid[]))"
+    ),
+    'mapping_user_task': "SELECT * FROM mapping_user_task WHERE task_id = ANY(CAST(:task_ids AS uuid[]))",
+}
+
+
+def _ids(connection, table, sld_id):
+    rows = connection.execute(text(f"SELECT id FROM {table} WHERE sld_id = :sld_id"), {'sld_id': str(sld_id)})
+    return [str(row.id) for row in rows]
+
+
+def _seq_scans(plan, found=None):
+    """Collect Seq Scan nodes from an EXPLAIN (FORMAT JSON) plan tree"""
+    found = [] if found is None else found
+    if plan.get('Node Type') == 'Seq Scan':
+        found.append({
+            'relation': plan.get('Relation Name'),
+            'filter': plan.get('Filter'),
+            'estimated_rows': plan.get('Plan Rows')
+        })
+    for child in plan.get('Plans', []):
+        _seq_scans(child, found)
+    return found
+
+
+def check_sld_plans(sld_id, force_index=True):
+    """EXPLAIN every /sld query for one SLD; returns {query: [seq scans]}"""
+    results = {}
+    with db.engine.connect() as connection:
+        with connection.begin() as transaction:
+            if force_index:
+                connection.execute(text("SET LOCAL enable_seqscan = off"))
+
+            params = {
+                'sld_id': str(sld_id),
+                'issue_ids': _ids(connection, 'issues', sld_id),
+                'quote_ids': _ids(connection, 'quotes', sld_id),
+                'task_ids': _ids(connection, 'tasks', sld_id),
+                'session_ids': _ids(connection, 'ir_sessions', sld_id)
+            }
+            for name, sql in SLD_QUERIES.items():
+                plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                results[name] = _seq_scans(plan[0]['Plan'])
+
+            transaction.rollback()
+    return results
+
+
+def init_app(app):
+    """Register the plan check CLI command"""
+
+    @app.cli.command('check-sld-plans')
+    @click.argument('sld_id')
+    @click.option('--planner-default', is_flag=True,
+                  help='Do not discourage sequential scans (shows what the planner picks today).')
+    def check_sld_plans_command(sld_id, planner_default):
+        """Report sequential scans in the GET /sld/<sld_id> queries."""
+        results = check_sld_plans(sld_id, force_index=not planner_default)
+        flagged = {name: scans for name, scans in results.items() if scans}
+        for name in results:
+            if name in flagged:
+                tables = ', '.join(scan['relation'] for scan in flagged[name])
+                click.echo(f"SEQ SCAN  {name}: {tables}")
+            else:
+                click.echo(f"ok        {name}")
+        if flagged:
+            raise SystemExit(1)
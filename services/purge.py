@@ -0,0 +1,244 @@
+"""Purge soft-deleted rows and archive closed IR sessions.
+
+Rows deleted (is_deleted) longer than PURGE_RETENTION_DAYS ago are removed
+from the entity and mapping tables; deleted_at is kept by a trigger
+(migration 0008). With --archive they are moved to <table>_archive instead
+of being dropped. IR sessions closed longer than IR_SESSION_ARCHIVE_DAYS ago
+are always archived, together with their IR photos.
+
+The job is meant to run during business hours next to live traffic:
+
+- each batch is one short transaction touching at most PURGE_BATCH_SIZE
+  rows, picked by ctid with FOR UPDATE SKIP LOCKED so rows the app is
+  writing are left for a later run; a ctid only identifies a row within
+  one relation, so partitioned tables (services.partitions) are purged one
+  partition at a time
+- lock_timeout bounds the wait for any other lock; a batch that hits it is
+  retried after a pause
+- between batches it sleeps PURGE_PAUSE_SECONDS and, while a read replica
+  lags more than PURGE_MAX_LAG_SECONDS behind, waits for it to catch up
+  (giving up after PURGE_MAX_LAG_WAIT_SECONDS)
+
+Expired Idempotency-Key records (services.idempotency) are removed the same
+way. Photo objects in S3 are not touched.
+"""
+import os
+import time
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+import click
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from models.db import db
+from services import replicas, idempotency
+from services.partitions import leaf_partitions
+
+logger = logging.getLogger(__name__)
+
+RETENTION_DAYS = int(os.getenv('PURGE_RETENTION_DAYS', '90'))
+IR_SESSION_ARCHIVE_DAYS = int(os.getenv('IR_SESSION_ARCHIVE_DAYS', '365'))
+BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', '1000'))
+PAUSE_SECONDS = float(os.getenv('PURGE_PAUSE_SECONDS', '0.2'))
+MAX_LAG_SECONDS = float(os.getenv('PURGE_MAX_LAG_SECONDS', '2'))
+MAX_LAG_WAIT_SECONDS = float(os.getenv('PURGE_MAX_LAG_WAIT_SECONDS', '300'))
+LOCK_TIMEOUT_MS = int(os.getenv('PURGE_LOCK_TIMEOUT_MS', '1000'))
+
+# Mappings first, so a purge that stops early never leaves a live mapping
+# pointing at an entity that is already gone
+PURGE_TABLES = (
+    'mapping_issue_task', 'mapping_task_session', 'mapping_quote_task', 'mapping_user_task',
+    'nodes', 'edges', 'photos', 'ir_photos', 'issues', 'tasks', 'quotes',
+)
+ARCHIVE_TABLES = PURGE_TABLES + ('ir_sessions',)
+
+LOCK_NOT_AVAILABLE = '55P03'
+
+_BATCH = "ctid = ANY(ARRAY(SELECT ctid FROM {source} WHERE {where} LIMIT :batch FOR UPDATE SKIP LOCKED))"
+
+DELETE = "DELETE FROM {source} WHERE " + _BATCH
+
+MOVE = """
+WITH moved AS (
+    DELETE FROM {source} WHERE """ + _BATCH + """
+    RETURNING {columns}
+)
+INSERT INTO {table}_archive ({columns}) SELECT {columns} FROM moved
+"""
+
+COUNT = "SELECT count(*) FROM {table} WHERE {where}"
+
+DELETED_BEFORE = "is_deleted IS TRUE AND deleted_at < :cutoff"
+
+EXPIRED_KEYS = "created_at < now() - make_interval(secs => :ttl)"
+
+CLOSED_SESSIONS = """
+SELECT id FROM ir_sessions
+WHERE date_closed < :cutoff
+ORDER BY date_closed
+LIMIT :batch
+"""
+
+
+class PurgeStopped(Exception):
+    """Replication lag did not recover within PURGE_MAX_LAG_WAIT_SECONDS"""
+
+
+def archive_columns(connection, table):
+    """Columns present in both table and its archive, in table order"""
+    rows = connection.execute(text("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = :table
+          AND column_name IN (
+              SELECT column_name FROM information_schema.columns
+              WHERE table_schema = current_schema() AND table_name = :archive
+          )
+        ORDER BY ordinal_position
+    """), {'table': table, 'archive': f"{table}_archive"})
+    return ', '.join(f'"{row[0]}"' for row in rows)
+
+
+def wait_for_replicas():
+    """Pause, then block while any replica lags more than MAX_LAG_SECONDS"""
+    time.sleep(PAUSE_SECONDS)
+    waited = 0.0
+    while True:
+        lag = max((replicas.replication_lag(bind) for bind in replicas.replica_binds()), default=0.0)
+        if lag <= MAX_LAG_SECONDS:
+            return
+        if waited >= MAX_LAG_WAIT_SECONDS:
+            raise PurgeStopped(f"replication lag {lag:.1f}s did not drop below {MAX_LAG_SECONDS}s")
+        logger.info("Replication lag %.1fs, pausing purge", lag)
+        interval = max(replicas.LAG_CHECK_INTERVAL, PAUSE_SECONDS)
+        time.sleep(interval)
+        waited += interval
+
+
+def run_batch(statement, params):
+    """Run one batch in its own short transaction; the affected row count, or None if it hit a lock"""
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(text(f"SET LOCAL lock_timeout = {LOCK_TIMEOUT_MS}"))
+            return connection.execute(text(statement), params).rowcount
+    except OperationalError as e:
+        if getattr(e.orig, 'pgcode', None) != LOCK_NOT_AVAILABLE:
+            raise
+        logger.info("Purge batch hit lock_timeout, retrying: %s", e.orig)
+        return None
+
+
+def drain(statement, params):
+    """Repeat a batch statement until it affects no rows; the total affected"""
+    total = 0
+    while True:
+        count = run_batch(statement, params)
+        if count == 0:
+            return total
+        total += count or 0
+        wait_for_replicas()
+
+
+def drain_partitions(statements, params):
+    return sum(drain(statement, params) for statement in statements)
+
+
+def batch_statements(table, where, archive):
+    """One batch statement per partition of table (just one if it is not partitioned)"""
+    with db.engine.connect() as connection:
+        sources = leaf_partitions(connection, table)
+        columns = archive_columns(connection, table) if archive else None
+    if not archive:
+        return [DELETE.format(source=source, where=where) for source in sources]
+    return [MOVE.format(source=source, table=table, where=where, columns=columns) for source in sources]
+
+
+def purge_deleted(tables=PURGE_TABLES, retention_days=RETENTION_DAYS, archive=False, dry_run=False,
+                  batch_size=BATCH_SIZE):
+    """Remove (or archive) rows soft-deleted more than retention_days ago; {table: rows}"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    params = {'cutoff': cutoff, 'batch': batch_size}
+    result = {}
+    for table in tables:
+        if dry_run:
+            with db.engine.connect() as connection:
+                result[table] = connection.execute(
+                    text(COUNT.format(table=table, where=DELETED_BEFORE)), params
+                ).scalar()
+            continue
+        result[table] = drain_partitions(batch_statements(table, DELETED_BEFORE, archive), params)
+        logger.info("%s %d deleted rows from %s", 'Archived' if archive else 'Purged', result[table], table)
+    return result
+
+
+def archive_ir_sessions(archive_days=IR_SESSION_ARCHIVE_DAYS, dry_run=False, batch_size=BATCH_SIZE):
+    """Move IR sessions closed more than archive_days ago, and their IR photos, to the archive"""
+    # date_closed is naive UTC
+    cutoff = datetime.utcnow() - timedelta(days=archive_days)
+    result = {'ir_sessions': 0, 'ir_photos': 0}
+    if dry_run:
+        with db.engine.connect() as connection:
+            result['ir_sessions'] = connection.execute(text(
+                "SELECT count(*) FROM ir_sessions WHERE date_closed < :cutoff"), {'cutoff': cutoff}).scalar()
+            result['ir_photos'] = connection.execute(text(
+                "SELECT count(*) FROM ir_photos WHERE ir_session_id IN "
+                "(SELECT id FROM ir_sessions WHERE date_closed < :cutoff)"), {'cutoff': cutoff}).scalar()
+        return result
+
+    move_photos = batch_statements('ir_photos', "ir_session_id = ANY(CAST(:session_ids AS uuid[]))", archive=True)
+    move_sessions = batch_statements('ir_sessions', "id = ANY(CAST(:session_ids AS uuid[]))", archive=True)
+    while True:
+        with db.engine.connect() as connection:
+            session_ids = [str(row[0]) for row in connection.execute(
+                text(CLOSED_SESSIONS), {'cutoff': cutoff, 'batch': batch_size})]
+        if not session_ids:
+            break
+        # Photos first: a run that stops in between leaves the session to be picked up again
+        params = {'session_ids': session_ids, 'batch': batch_size}
+        result['ir_photos'] += drain_partitions(move_photos, params)
+        moved = drain_partitions(move_sessions, params)
+        result['ir_sessions'] += moved
+        if not moved:
+            # Every session of the batch is locked by someone else; leave them for the next run
+            break
+    logger.info("Archived %d closed IR sessions with %d IR photos", result['ir_sessions'], result['ir_photos'])
+    return result
+
+
+def purge_idempotency_keys(batch_size=BATCH_SIZE):
+    """Remove Idempotency-Key records older than their TTL"""
+    statement = DELETE.format(source='idempotency_keys', where=EXPIRED_KEYS)
+    total = drain(statement, {'ttl': idempotency.TTL_SECONDS, 'batch': batch_size})
+    logger.info("Purged %d expired idempotency keys", total)
+    return total
+
+
+def init_app(app):
+    """Register the purge CLI command"""
+
+    @app.cli.command('purge-deleted')
+    @click.option('--retention-days', default=RETENTION_DAYS, show_default=True,
+                  help='Purge rows deleted longer ago than this.')
+    @click.option('--ir-session-days', default=IR_SESSION_ARCHIVE_DAYS, show_default=True,
+                  help='Archive IR sessions closed longer ago than this.')
+    @click.option('--table', 'tables', multiple=True, type=click.Choice(PURGE_TABLES),
+                  help='Only purge these tables (repeatable); skips the IR session archive.')
+    @click.option('--archive', is_flag=True, help='Move deleted rows to <table>_archive instead of dropping them.')
+    @click.option('--batch-size', default=BATCH_SIZE, show_default=True)
+    @click.option('--dry-run', is_flag=True, help='Only count the rows that would go.')
+    def purge_deleted_command(retention_days, ir_session_days, tables, archive, batch_size, dry_run):
+        """Purge old soft-deleted rows and archive closed IR sessions."""
+        result = {}
+        try:
+            result['deleted'] = purge_deleted(tables or PURGE_TABLES, retention_days, archive=archive,
+                                              dry_run=dry_run, batch_size=batch_size)
+            if not tables:
+                result['ir_sessions'] = archive_ir_sessions(ir_session_days, dry_run=dry_run,
+                                                            batch_size=batch_size)
+                if not dry_run:
+                    result['idempotency_keys'] = purge_idempotency_keys(batch_size)
+        except PurgeStopped as e:
+            logger.warning("Purge stopped: %s", e)
+            result['stopped'] = str(e)
+        click.echo(json.dumps(result, indent=2))
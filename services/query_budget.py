@@ -0,0 +1,147 @@
+"""Count SQL statements to catch N+1 queries before they ship.
+
+``count_queries()`` records every statement the current thread executes::
+
+    with count_queries(budget=13) as counter:
+        client.get(f'/sld/{sld_id}')
+    # raises QueryBudgetExceeded if more than 13 statements ran
+
+Views declare their budget with ``@max_queries(n)``. In development
+(FLASK_DEBUG or QUERY_BUDGET_WARN=true) each request is counted and a
+warning lists the repeated statement patterns when a view goes over its
+budget, or over QUERY_BUDGET_DEFAULT when it declares none. The pytest side
+lives in services.query_budget_pytest.
+"""
+import os
+import re
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET = int(os.getenv('QUERY_BUDGET_DEFAULT', '20'))
+
+_active = threading.local()
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%\(\w+\)s|%s|(?<![:\w]):\w+|\$\d+|\?'), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def normalize_statement(statement):
+    """Reduce a statement to its shape, so repeated lookups group together"""
+    for pattern, replacement in _LITERALS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def patterns(self):
+        """(count, normalized statement) pairs, most repeated first"""
+        counts = Counter(normalize_statement(s) for s in self.statements)
+        return [(n, pattern) for pattern, n in counts.most_common()]
+
+    def report(self, limit=5):
+        return '\n'.join(f"  {n} x {pattern[:300]}" for n, pattern in self.patterns()[:limit])
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    for counter in getattr(_active, 'counters', ()):
+        counter.statements.append(statement)
+
+
+def _push(counter):
+    if not hasattr(_active, 'counters'):
+        _active.counters = []
+    _active.counters.append(counter)
+
+
+def _pop(counter):
+    _active.counters.remove(counter)
+
+
+@contextmanager
+def count_queries(budget=None):
+    """Count statements run by this thread; fail when budget is exceeded"""
+    counter = QueryCounter()
+    _push(counter)
+    try:
+        yield counter
+    finally:
+        _pop(counter)
+    if budget is not None and counter.count > budget:
+        raise QueryBudgetExceeded(
+            f"{counter.count} SQL statements, budget is {budget}:\n{counter.report()}"
+        )
+
+
+def max_queries(limit):
+    """Declare the most SQL statements a view may run, however large the data"""
+    def decorator(f):
+        f.query_budget = limit
+        return f
+    return decorator
+
+
+def budget_for(endpoint):
+    view = current_app.view_functions.get(endpoint)
+    return getattr(view, 'query_budget', DEFAULT_BUDGET)
+
+
+def _enabled():
+    return current_app.debug or os.getenv('QUERY_BUDGET_WARN', 'false').lower() == 'true'
+
+
+def _start_request_counter():
+    if _enabled():
+        g.query_counter = QueryCounter()
+        _push(g.query_counter)
+
+
+def _check_request_budget(response):
+    counter = g.get('query_counter')
+    if counter is None:
+        return response
+
+    budget = budget_for(request.endpoint)
+    if counter.count > budget:
+        logger.warning(
+            "%s %s ran %d SQL statements (budget %d):\n%s",
+            request.method, request.path, counter.count, budget, counter.report()
+        )
+    return response
+
+
+def _stop_request_counter(exc):
+    counter = g.pop('query_counter', None)
+    if counter is not None:
+        _pop(counter)
+
+
+def init_app(app):
+    """Warn about requests over their query budget in development"""
+    app.before_request(_start_request_counter)
+    app.after_request(_check_request_budget)
+    app.teardown_request(_stop_request_counter)
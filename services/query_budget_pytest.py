@@ -0,0 +1,40 @@
+"""pytest plugin for SQL query budgets.
+
+Enable it from a conftest.py with ``pytest_plugins = ['services.query_budget_pytest']``.
+
+    @pytest.mark.query_budget(13)
+    def test_sld_query_count(client, sld_with_many_tasks):
+        client.get(f'/sld/{sld_with_many_tasks.id}')
+
+    def test_node_lookup(client, query_counter, node):
+        client.get(f'/api/graph/nodes/{node.id}')
+        assert query_counter.count <= 5, query_counter.report()
+
+The marker only counts the test body, not fixture setup. Flask's test client
+runs requests in the test's thread, so their statements are included.
+"""
+import pytest
+
+from services.query_budget import count_queries
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'query_budget(limit): fail when the test body runs more than limit SQL statements'
+    )
+
+
+@pytest.fixture
+def query_counter():
+    """A QueryCounter recording the statements run during the test"""
+    with count_queries() as counter:
+        yield counter
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker('query_budget')
+    if marker is None:
+        return (yield)
+    with count_queries(budget=marker.args[0]):
+        return (yield)
@@ -0,0 +1,276 @@
+"""Reconcile photo rows against what actually arrived in S3.
+
+Photo and IR photo keys are streamed from the database in key order (the
+key derived in SQL the same way photo_key() derives it) and grouped into
+chunks that share a key prefix. Each chunk is checked against
+one ListObjectsV2 walk over that prefix instead of a HEAD per object, so
+memory stays bounded by the chunk size however many keys a company has.
+"""
+import os
+import json
+import uuid
+import logging
+import posixpath
+from urllib.parse import urlparse, unquote
+
+import click
+from sqlalchemy import select, update, case, func
+
+from models import Photo, IRPhoto, SLD
+from models.db import db
+from services.s3 import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+PHOTO_BUCKET = os.getenv('PHOTO_BUCKET')
+IR_PHOTO_BUCKET = os.getenv('IR_PHOTO_BUCKET') or PHOTO_BUCKET
+
+CHUNK_SIZE = 1000
+STREAM_BATCH_SIZE = 5000
+MISSING_SAMPLE_SIZE = 100
+
+# Larger reconciles are left to `flask reconcile-uploads`
+HTTP_MAX_KEYS = int(os.getenv('RECONCILE_HTTP_MAX_KEYS', '20000'))
+
+
+def photo_key(url, filename=None):
+    """Derive the S3 object key from a stored photo URL or key"""
+    value = url or filename
+    if not value:
+        return None
+    if value.startswith('s3://'):
+        _, _, key = value[len('s3://'):].partition('/')
+        return key or None
+    if value.startswith(('http://', 'https://')):
+        parsed = urlparse(value)
+        path = unquote(parsed.path.lstrip('/'))
+        # Path-style URLs carry the bucket as the first path segment
+        if parsed.netloc.startswith(('s3.', 's3-')):
+            _, _, path = path.partition('/')
+        return path or None
+    return value.lstrip('/')
+
+
+def photo_key_sql(url, filename=None):
+    """photo_key() as a SQL expression, collated "C" like S3 listings
+
+    Rows are ordered by it so that they arrive grouped the way _chunks()
+    groups them. Percent-escapes in http(s) URLs stay encoded here; such a
+    key can only land in an extra chunk of its prefix, never be misreported.
+    """
+    value = func.coalesce(func.nullif(url, ''), filename) if filename is not None else url
+    key = case(
+        (value.like('s3://%'), func.regexp_replace(value, '^s3://[^/]*/?', '')),
+        # Path-style URLs carry the bucket as the first path segment
+        (value.op('~')('^https?://s3[.-]'),
+         func.regexp_replace(value, '^https?://[^/?#]*/*[^/?#]*/?([^?#]*).*$', '\\1')),
+        (value.op('~')('^https?://'), func.regexp_replace(value, '^https?://[^/?#]*/*([^?#]*).*$', '\\1')),
+        else_=func.ltrim(value, '/')
+    )
+    return key.collate('C')
+
+
+def _stream_rows(statement):
+    """Yield rows from a server-side cursor on its own connection"""
+    with db.engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True,
+            yield_per=STREAM_BATCH_SIZE
+        ).execute(statement)
+        for row in result:
+            yield row
+
+
+def _chunks(entries):
+    """Group (key, payload) entries into chunks sharing a key directory"""
+    chunk = []
+    prefix = None
+    for key, payload in entries:
+        key_prefix = posixpath.dirname(key)
+        if chunk and (key_prefix != prefix or len(chunk) >= CHUNK_SIZE):
+            yield prefix, chunk
+            chunk = []
+        prefix = key_prefix
+        chunk.append((key, payload))
+    if chunk:
+        yield prefix, chunk
+
+
+def _present_keys(s3_client, bucket, prefix, keys, stats):
+    """Return which of keys exist, listing only the range they span"""
+    wanted = set(keys)
+    first, last = min(wanted), max(wanted)
+    params = {
+        'Bucket': bucket,
+        'Prefix': f"{prefix}/" if prefix else ''
+    }
+    if len(first) > 1:
+        # Any proper prefix of `first` sorts before it, so the walk starts right there
+        params['StartAfter'] = first[:-1]
+
+    present = set()
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(**params):
+        stats['list_requests'] += 1
+        for obj in page.get('Contents', []):
+            if obj['Key'] > last:
+                return present
+            if obj['Key'] in wanted:
+                present.add(obj['Key'])
+    return present
+
+
+def _scope_filter(model, sld_id, company_id):
+    if sld_id:
+        return model.sld_id == sld_id
+    company_slds = select(SLD.id).where(SLD.company_id == company_id)
+    return model.sld_id.in_(company_slds)
+
+
+def _record_missing(summary, table, row_id, key):
+    summary['missing'] += 1
+    if len(summary['missing_sample']) < MISSING_SAMPLE_SIZE:
+        summary['missing_sample'].append({'table': table, 'id': str(row_id), 'key': key})
+
+
+def reconcile_photos(s3_client, sld_id, company_id, dry_run, stats):
+    """Check Photo rows and flip upload_needed to match S3"""
+    summary = {'checked': 0, 'no_key': 0, 'missing': 0, 'missing_sample': [],
+               'marked_uploaded': 0, 'marked_upload_needed': 0}
+
+    statement = (
+        select(Photo.id, Photo.url, Photo.filename, Photo.upload_needed)
+        .where(_scope_filter(Photo, sld_id, company_id), Photo.is_deleted.isnot(True))
+        .order_by(photo_key_sql(Photo.url, Photo.filename))
+    )
+
+    def entries():
+        for row_id, url, filename, upload_needed in _stream_rows(statement):
+            key = photo_key(url, filename)
+            if key is None:
+                summary['no_key'] += 1
+                continue
+            yield key, (row_id, upload_needed)
+
+    for prefix, chunk in _chunks(entries()):
+        present = _present_keys(s3_client, PHOTO_BUCKET, prefix, [key for key, _ in chunk], stats)
+        uploaded_ids = []
+        needed_ids = []
+        for key, (row_id, upload_needed) in chunk:
+            summary['checked'] += 1
+            if key in present:
+                if upload_needed is not False:
+                    uploaded_ids.append(row_id)
+            else:
+                _record_missing(summary, 'photos', row_id, key)
+                if upload_needed is not True:
+                    needed_ids.append(row_id)
+
+        summary['marked_uploaded'] += len(uploaded_ids)
+        summary['marked_upload_needed'] += len(needed_ids)
+        if dry_run:
+            continue
+        if uploaded_ids:
+            db.session.execute(
+                update(Photo).where(Photo.id.in_(uploaded_ids)).values(upload_needed=False)
+                .execution_options(synchronize_session=False)
+            )
+        if needed_ids:
+            db.session.execute(
+                update(Photo).where(Photo.id.in_(needed_ids)).values(upload_needed=True)
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+
+    return summary
+
+
+def reconcile_ir_photos(s3_client, sld_id, company_id, stats):
+    """Report IR photo pairs whose visual or IR image never arrived"""
+    summary = {'checked': 0, 'missing': 0, 'missing_sample': []}
+
+    # One entry per stored key; both images of a pair are checked
+    keys = (
+        select(IRPhoto.id, IRPhoto.visual_photo_key.label('key'))
+        .where(_scope_filter(IRPhoto, sld_id, company_id), IRPhoto.is_deleted.isnot(True),
+               IRPhoto.visual_photo_key.isnot(None))
+        .union_all(
+            select(IRPhoto.id, IRPhoto.ir_photo_key.label('key'))
+            .where(_scope_filter(IRPhoto, sld_id, company_id), IRPhoto.is_deleted.isnot(True),
+                   IRPhoto.ir_photo_key.isnot(None))
+        )
+        .subquery()
+    )
+    statement = select(keys.c.id, keys.c.key).order_by(photo_key_sql(keys.c.key))
+
+    def entries():
+        for row_id, key in _stream_rows(statement):
+            key = photo_key(key)
+            if key:
+                yield key, row_id
+
+    for prefix, chunk in _chunks(entries()):
+        present = _present_keys(s3_client, IR_PHOTO_BUCKET, prefix, [key for key, _ in chunk], stats)
+        for key, row_id in chunk:
+            summary['checked'] += 1
+            if key not in present:
+                _record_missing(summary, 'ir_photos', row_id, key)
+
+    return summary
+
+
+def count_keys(sld_id=None, company_id=None):
+    """How many photo and IR photo keys a reconcile of this scope would check"""
+    photos = (
+        select(func.count()).select_from(Photo)
+        .where(_scope_filter(Photo, sld_id, company_id), Photo.is_deleted.isnot(True))
+    )
+    ir_keys = select(
+        func.coalesce(func.sum(
+            case((IRPhoto.visual_photo_key.isnot(None), 1), else_=0)
+            + case((IRPhoto.ir_photo_key.isnot(None), 1), else_=0)
+        ), 0)
+    ).where(_scope_filter(IRPhoto, sld_id, company_id), IRPhoto.is_deleted.isnot(True))
+    return db.session.execute(photos).scalar() + db.session.execute(ir_keys).scalar()
+
+
+def reconcile_uploads(sld_id=None, company_id=None, dry_run=False):
+    """Reconcile an SLD's or a company's photos with S3 and return a summary"""
+    if not sld_id and not company_id:
+        raise ValueError('Either sld_id or company_id is required')
+    if not PHOTO_BUCKET:
+        raise ValueError('PHOTO_BUCKET is not configured')
+
+    s3_client = get_s3_client()
+    stats = {'list_requests': 0}
+    result = {
+        'sld_id': str(sld_id) if sld_id else None,
+        'company_id': str(company_id) if company_id else None,
+        'dry_run': dry_run,
+        'photos': reconcile_photos(s3_client, sld_id, company_id, dry_run, stats),
+        'ir_photos': reconcile_ir_photos(s3_client, sld_id, company_id, stats)
+    }
+    result.update(stats)
+    logger.info(
+        "Reconciled uploads for %s: %d photos (%d missing), %d IR keys (%d missing), %d list requests",
+        sld_id or company_id, result['photos']['checked'], result['photos']['missing'],
+        result['ir_photos']['checked'], result['ir_photos']['missing'], stats['list_requests']
+    )
+    return result
+
+
+def init_app(app):
+    """Register the reconciliation CLI command"""
+
+    @app.cli.command('reconcile-uploads')
+    @click.option('--sld-id', default=None)
+    @click.option('--company-id', default=None)
+    @click.option('--dry-run', is_flag=True, help='Report without updating upload_needed.')
+    def reconcile_uploads_command(sld_id, company_id, dry_run):
+        """Compare photo keys for an SLD or company with S3."""
+        result = reconcile_uploads(
+            sld_id=uuid.UUID(sld_id) if sld_id else None,
+            company_id=uuid.UUID(company_id) if company_id else None,
+            dry_run=dry_run
+        )
+        click.echo(json.dumps(result, indent=2))
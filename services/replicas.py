@@ -0,0 +1,161 @@
+"""Route read-only requests to read replicas.
+
+Replica URLs come from DATABASE_REPLICA_URLS (comma separated) and become
+the SQLAlchemy binds ``replica_0``, ``replica_1``, ... Views opt in with
+``@replica_read``; everything else, and every flush, uses the primary.
+
+A replica is skipped while its replication lag exceeds
+REPLICA_MAX_LAG_SECONDS. After a client writes, its reads stay on the
+primary for REPLICA_STICKY_SECONDS so it sees its own changes; clients can
+also ask for that explicitly with ``X-Consistency: strong``.
+
+Stickiness is tracked in a cookie and, for clients that drop cookies, in a
+per-process map keyed by the Authorization header (or remote address).
+"""
+import os
+import time
+import random
+import hashlib
+import logging
+import threading
+
+from flask import current_app, request, g
+from sqlalchemy import text
+
+from models.db import db
+from services.db_pool import engine_options
+
+logger = logging.getLogger(__name__)
+
+REPLICA_URLS = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', '5'))
+STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', '10'))
+LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', '2'))
+
+STICKY_COOKIE = 'read_primary_until'
+
+# Zero when the standby has replayed everything it received, so an idle
+# primary does not make the replica look stale
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+_lag = {}
+_lag_lock = threading.Lock()
+_recent_writers = {}
+_writers_lock = threading.Lock()
+
+
+def replica_read(f):
+    """Mark a view as safe to serve from a read replica"""
+    f.replica_read = True
+    return f
+
+
+def replica_binds():
+    return [f"replica_{index}" for index in range(len(REPLICA_URLS))]
+
+
+def _measure_lag(bind_key):
+    engine = db.engines[bind_key]
+    if engine.dialect.name != 'postgresql':
+        # SQLite and other stand-ins have no replication to lag behind
+        return 0.0
+    with engine.connect() as connection:
+        return float(connection.execute(LAG_QUERY).scalar() or 0)
+
+
+def replication_lag(bind_key):
+    """Replication lag in seconds, re-measured at most every LAG_CHECK_INTERVAL"""
+    now = time.monotonic()
+    checked_at, lag = _lag.get(bind_key, (None, None))
+    if checked_at is not None and now - checked_at < LAG_CHECK_INTERVAL:
+        return lag
+
+    # One thread re-measures; the others keep using the previous value
+    if not _lag_lock.acquire(blocking=checked_at is None):
+        return lag
+    try:
+        try:
+            lag = _measure_lag(bind_key)
+        except Exception as e:
+            logger.warning("Replica %s unavailable: %s", bind_key, e)
+            lag = float('inf')
+        _lag[bind_key] = (time.monotonic(), lag)
+        return lag
+    finally:
+        _lag_lock.release()
+
+
+def _client_identity():
+    token = request.headers.get('Authorization')
+    if token:
+        return hashlib.sha256(token.encode()).hexdigest()
+    return request.remote_addr
+
+
+def _is_sticky():
+    try:
+        if float(request.cookies.get(STICKY_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    with _writers_lock:
+        expires = _recent_writers.get(_client_identity())
+    return expires is not None and expires > time.monotonic()
+
+
+def _remember_writer():
+    now = time.monotonic()
+    with _writers_lock:
+        if len(_recent_writers) > 10000:
+            for identity in [i for i, expires in _recent_writers.items() if expires <= now]:
+                del _recent_writers[identity]
+        _recent_writers[_client_identity()] = now + STICKY_SECONDS
+
+
+def choose_replica():
+    """A replica within the lag threshold, or None to use the primary"""
+    healthy = [key for key in replica_binds() if replication_lag(key) <= MAX_LAG_SECONDS]
+    return random.choice(healthy) if healthy else None
+
+
+def _route_request():
+    view = current_app.view_functions.get(request.endpoint)
+    if (request.method not in ('GET', 'HEAD')
+            or not getattr(view, 'replica_read', False)
+            or request.headers.get('X-Consistency', '').lower() == 'strong'
+            or _is_sticky()):
+        return
+
+    replica = choose_replica()
+    if replica:
+        db.session.info['replica_bind'] = replica
+        g.db_route = replica
+
+
+def _after_request(response):
+    if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+        _remember_writer()
+        response.set_cookie(STICKY_COOKIE, str(time.time() + STICKY_SECONDS),
+                             max_age=int(STICKY_SECONDS) + 1, httponly=True)
+    response.headers['X-DB-Route'] = g.get('db_route', 'primary')
+    return response
+
+
+def init_app(app):
+    """Register replica binds and request routing; call before db.init_app"""
+    if not REPLICA_URLS:
+        return
+
+    binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+    for bind_key, url in zip(replica_binds(), REPLICA_URLS):
+        binds[bind_key] = {'url': url, **engine_options(url)}
+
+    app.before_request(_route_request)
+    app.after_request(_after_request)
+    logger.info("Routing read-only requests across %d replica(s)", len(REPLICA_URLS))
@@ -0,0 +1,73 @@
+"""Pluggable report generation backends.
+
+REPORT_BACKEND selects where new reports run: 'stepfunctions' (the external
+pgz-reporting Step Function, default) or 'local' (matplotlib in a process
+pool, no AWS required). Existing jobs are always refreshed by the backend
+that started them.
+"""
+import os
+import time
+import uuid
+import logging
+
+import click
+
+from .stepfunctions import StepFunctionsBackend
+from .local import LocalBackend, gather_report_data, get_render_pool
+from .render import render_report_pdf
+from .store import get_report_store
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (StepFunctionsBackend(), LocalBackend())
+}
+
+
+def get_report_backend(name=None):
+    """Return the backend that should run new reports"""
+    return BACKENDS[name or os.getenv('REPORT_BACKEND', 'stepfunctions')]
+
+
+def backend_for_job(job):
+    """Return the backend that started this job, or None if it never started"""
+    for backend in BACKENDS.values():
+        if backend.owns(job):
+            return backend
+    return None
+
+
+def init_app(app):
+    """Register the report CLI commands"""
+
+    @app.cli.command('render-report')
+    @click.argument('ir_session_ids', nargs=-1, required=True)
+    @click.option('--type', 'report_type', default='session', show_default=True)
+    @click.option('--store/--no-store', default=False, help='Write the PDFs to the report store.')
+    def render_report_command(ir_session_ids, report_type, store):
+        """Render reports locally for one or more IR sessions and print timings."""
+        started = time.perf_counter()
+        futures = {}
+        for ir_session_id in ir_session_ids:
+            gather_started = time.perf_counter()
+            data = gather_report_data(uuid.UUID(ir_session_id), report_type)
+            if data is None:
+                click.echo(f"{ir_session_id}: IR session not found")
+                continue
+            click.echo(f"{ir_session_id}: gathered {len(data['ir_photos'])} photos, "
+                       f"{len(data['issues'])} issues in {time.perf_counter() - gather_started:.3f}s")
+            futures[ir_session_id] = get_render_pool().submit(render_report_pdf, data)
+
+        for ir_session_id, future in futures.items():
+            rendered = future.result()
+            line = (f"{ir_session_id}: {rendered['pages']} pages, {len(rendered['pdf'])} bytes, "
+                    f"rendered in {rendered['render_seconds']:.3f}s")
+            if store:
+                key = f"reports/{ir_session_id}/{report_type}-cli.pdf"
+                line += f" -> {get_report_store().put(key, rendered['pdf'], 'application/pdf')['location']}"
+            click.echo(line)
+
+        elapsed = time.perf_counter() - started
+        click.echo(f"{len(futures)} reports in {elapsed:.3f}s "
+                   f"({len(futures) / elapsed if elapsed else 0:.2f} reports/s)")
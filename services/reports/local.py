@@ -0,0 +1,184 @@
+"""Report backend that renders reports in-process with matplotlib.
+
+Data for a session is gathered with a handful of batched queries in the
+calling process; rendering happens in a spawned process pool so several
+sessions render in parallel without holding the GIL or a DB connection.
+"""
+import os
+import uuid
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+
+from models import IRSession, IRPhoto, Issue, Node, ReportJob
+from models.db import db
+from services import outbox
+from .render import render_report_pdf
+from .store import get_report_store
+from .notify import add_device_endpoints, notify_pending
+
+logger = logging.getLogger(__name__)
+
+RENDER_PROCESSES = int(os.getenv('REPORT_RENDER_PROCESSES', str(os.cpu_count() or 2)))
+
+# Jobs still running after this long are treated as lost (e.g. the process restarted)
+RENDER_TIMEOUT = timedelta(seconds=int(os.getenv('REPORT_RENDER_TIMEOUT', '900')))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    """Create the render process pool on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=RENDER_PROCESSES,
+                # spawn: forking a multi-threaded server process is not safe
+                mp_context=multiprocessing.get_context('spawn')
+            )
+    return _pool
+
+
+def gather_report_data(ir_session_id, report_type):
+    """Load everything the renderer needs for one session in four queries"""
+    session = IRSession.query.get(ir_session_id)
+    if not session:
+        return None
+
+    ir_photos = (
+        IRPhoto.query
+        .filter(IRPhoto.ir_session_id == ir_session_id, IRPhoto.is_deleted.isnot(True))
+        .order_by(IRPhoto.date_created)
+        .all()
+    )
+    issues = (
+        Issue.query
+        .filter(Issue.session_id == ir_session_id, Issue.is_deleted.isnot(True))
+        .all()
+    )
+    node_ids = {p.node_id for p in ir_photos if p.node_id} | {i.node_id for i in issues if i.node_id}
+    nodes = Node.query.filter(Node.id.in_(node_ids)).all() if node_ids else []
+
+    return {
+        'report_type': report_type,
+        'session': session.to_dict(),
+        'ir_photos': [p.to_dict() for p in ir_photos],
+        'issues': [i.to_dict() for i in issues],
+        'nodes': [n.to_dict() for n in nodes]
+    }
+
+
+def report_key(job):
+    return f"reports/{job.ir_session_id}/{job.report_type}-{job.content_version[:16]}.pdf"
+
+
+def _finish_render(app, job_id, key, future):
+    """Store the rendered PDF and record the outcome on the report job"""
+    with app.app_context():
+        # Upload first so the row lock below is only held for the update
+        error = output = None
+        try:
+            rendered = future.result()
+            output = get_report_store().put(key, rendered['pdf'], 'application/pdf')
+            output.update(pages=rendered['pages'], bytes=len(rendered['pdf']),
+                          render_seconds=rendered['render_seconds'])
+        except Exception as e:
+            logger.exception("Local report render failed for job %s", job_id)
+            error = str(e)
+
+        try:
+            # Locked like request_report, so a concurrent join's device
+            # endpoints are either notified here or see the finished job
+            job = db.session.get(ReportJob, job_id, with_for_update=True)
+            if job is None or job.status not in ('queued', 'running'):
+                db.session.rollback()
+                return
+            if error is not None:
+                job.status = 'failed'
+                job.error = error
+            else:
+                job.status = 'succeeded'
+                job.output = output
+                notify_pending(job)
+                logger.info("Rendered report %s (%d pages) to %s", job_id, output['pages'], output['location'])
+            job.completed_at = datetime.now(timezone.utc)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Failed to record report result for job %s: %s", job_id, e)
+
+
+@outbox.handler('report.render_local')
+def start_local_render(payload):
+    """Gather the session and hand rendering to the process pool"""
+    job = ReportJob.query.get(uuid.UUID(payload['report_job_id']))
+    if job is None or job.status not in ('queued', 'running'):
+        return None
+
+    data = gather_report_data(job.ir_session_id, job.report_type)
+    if data is None:
+        job.status = 'failed'
+        job.error = 'IR session not found'
+        job.completed_at = datetime.now(timezone.utc)
+        return None
+
+    if 'device_endpoints' in payload:
+        # Queued before the devices were recorded on the job
+        add_device_endpoints(job, payload['device_endpoints'])
+
+    # Committed before submitting so a fast render's result cannot be overwritten
+    job.status = 'running'
+    job_id = job.id
+    key = report_key(job)
+    db.session.commit()
+
+    future = get_render_pool().submit(render_report_pdf, data)
+    app = current_app._get_current_object()
+    future.add_done_callback(
+        lambda f: _finish_render(app, job_id, key, f)
+    )
+    return {'report_job_id': str(job_id)}
+
+
+@outbox.on_failure('report.render_local')
+def fail_local_render(payload, error):
+    """The render could not be queued; fail the job so the next request starts a new one"""
+    ReportJob.query.filter(
+        ReportJob.id == uuid.UUID(payload['report_job_id']),
+        ReportJob.status.in_(('queued', 'running'))
+    ).update({
+        'status': 'failed',
+        'error': f"Render could not be started: {error}",
+        'completed_at': datetime.now(timezone.utc)
+    }, synchronize_session=False)
+
+
+class LocalBackend:
+    name = 'local'
+
+    def owns(self, job):
+        return bool(job.execution_arn) and job.execution_arn.startswith('local:')
+
+    def start(self, job, device_endpoints):
+        """Queue the render on the outbox; the job row tracks its progress"""
+        job.execution_arn = f"local:{job.id}"
+        add_device_endpoints(job, device_endpoints)
+        outbox.enqueue('report.render_local', {'report_job_id': str(job.id)})
+
+    def join(self, job, device_endpoints):
+        """Notify these devices too when the render finishes"""
+        add_device_endpoints(job, device_endpoints)
+
+    def refresh(self, job):
+        """Fail renders that were lost, so the next request starts a new one"""
+        started = job.started_at or job.created_at
+        if started and datetime.now(timezone.utc) - started > RENDER_TIMEOUT:
+            job.status = 'failed'
+            job.error = 'Local render timed out'
+            job.completed_at = datetime.now(timezone.utc)
@@ -0,0 +1,67 @@
+"""Push notifications for finished reports.
+
+report_jobs.device_endpoints lists every device that asked for the current
+run of a job, first the one that started it and then the ones that joined.
+An entry is marked notified once its push is queued, or up front when the
+backend notifies that device itself (the Step Function does so for the
+devices in its input).
+"""
+import json
+
+from services import outbox
+
+
+def add_device_endpoints(job, device_endpoints, notified=False):
+    """Record the devices to tell when the job succeeds; the number that were new"""
+    entries = list(job.device_endpoints or [])
+    known = {entry['endpoint_arn'] for entry in entries}
+    added = 0
+    for endpoint in device_endpoints:
+        if endpoint['endpoint_arn'] in known:
+            continue
+        entries.append({**endpoint, 'notified': notified})
+        known.add(endpoint['endpoint_arn'])
+        added += 1
+    # Reassigned rather than mutated so the JSONB change is flushed
+    job.device_endpoints = entries
+    return added
+
+
+def pending_device_endpoints(job):
+    return [entry for entry in job.device_endpoints or [] if not entry.get('notified')]
+
+
+def notify_pending(job):
+    """Queue a push to every device of the job not notified yet"""
+    entries = []
+    for entry in job.device_endpoints or []:
+        if not entry.get('notified'):
+            notify_report_ready(job, entry)
+            entry = {**entry, 'notified': True}
+        entries.append(entry)
+    job.device_endpoints = entries
+
+
+def notify_report_ready(job, endpoint):
+    """Queue a push notification telling a device its report is ready"""
+    apns_message = json.dumps({
+        "aps": {
+            "alert": {
+                "title": "Report ready",
+                "body": "Your IR session report has been generated"
+            },
+            "sound": "default"
+        },
+        "customData": {
+            "report_job_id": str(job.id),
+            "ir_session_id": str(job.ir_session_id)
+        }
+    })
+    outbox.enqueue('sns.publish', {
+        'endpoint_arn': endpoint['endpoint_arn'],
+        'message': {
+            "default": "Your report is ready",
+            "APNS": apns_message,
+            "APNS_SANDBOX": apns_message
+        }
+    })
@@ -0,0 +1,114 @@
+"""PDF rendering for locally generated reports.
+
+Runs inside worker processes of the local backend's process pool, so it only
+depends on matplotlib and takes/returns plain, picklable data.
+"""
+import io
+import time
+from collections import Counter, defaultdict
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+
+PAGE_SIZE = (8.5, 11)
+ROWS_PER_PAGE = 32
+
+
+def _title_page(pdf, data):
+    session = data['session']
+    issues = data['issues']
+    photos = data['ir_photos']
+
+    fig = plt.figure(figsize=PAGE_SIZE)
+    fig.text(0.08, 0.94, session['name'], fontsize=20, weight='bold')
+    fig.text(0.08, 0.91, f"{data['report_type'].title()} report", fontsize=12)
+    fig.text(0.08, 0.88, (
+        f"Created {session['date_created'] or '-'}   "
+        f"Closed {session['date_closed'] or '-'}   "
+        f"{len(photos)} IR photos   {len(issues)} issues"
+    ), fontsize=9)
+
+    by_status = Counter(issue['status'] or 'unspecified' for issue in issues)
+    ax = fig.add_axes([0.1, 0.5, 0.8, 0.32])
+    ax.bar(list(by_status.keys()), list(by_status.values()), color='#c0392b')
+    ax.set_title('Issues by status')
+    ax.set_ylabel('Issues')
+
+    by_node = Counter(photo['node_id'] for photo in photos)
+    labels = {node['id']: node['label'] or node['id'][:8] for node in data['nodes']}
+    top = by_node.most_common(15)
+    ax = fig.add_axes([0.3, 0.08, 0.6, 0.34])
+    ax.barh([labels.get(node_id, 'unassigned') for node_id, _ in top],
+            [count for _, count in top], color='#2c3e50')
+    ax.invert_yaxis()
+    ax.set_title('IR photos per equipment (top 15)')
+
+    pdf.savefig(fig)
+    plt.close(fig)
+
+
+def _table_pages(pdf, title, columns, rows):
+    for start in range(0, len(rows), ROWS_PER_PAGE):
+        chunk = rows[start:start + ROWS_PER_PAGE]
+        fig = plt.figure(figsize=PAGE_SIZE)
+        fig.text(0.08, 0.95, title, fontsize=14, weight='bold')
+        ax = fig.add_axes([0.05, 0.05, 0.9, 0.86])
+        ax.axis('off')
+        table = ax.table(cellText=chunk, colLabels=columns, loc='upper center', cellLoc='left')
+        table.auto_set_font_size(False)
+        table.set_fontsize(7)
+        table.scale(1, 1.3)
+        pdf.savefig(fig)
+        plt.close(fig)
+
+
+def render_report_pdf(data):
+    """Render the report for one IR session
+
+    data holds the serialized 'session', 'ir_photos', 'issues' and 'nodes'
+    plus 'report_type'. Returns a dict with the PDF bytes, page count and
+    render time.
+    """
+    started = time.perf_counter()
+    labels = {node['id']: node['label'] or '' for node in data['nodes']}
+    locations = {node['id']: node['location'] or '' for node in data['nodes']}
+
+    issues_by_node = defaultdict(list)
+    for issue in data['issues']:
+        issues_by_node[issue['node_id']].append(issue)
+
+    buffer = io.BytesIO()
+    with PdfPages(buffer) as pdf:
+        _title_page(pdf, data)
+
+        _table_pages(pdf, 'Issues', ['Equipment', 'Location', 'Title', 'Type', 'Status'], [
+            [
+                labels.get(issue['node_id'], ''),
+                locations.get(issue['node_id'], ''),
+                (issue['title'] or '')[:40],
+                issue['issue_type'] or '',
+                issue['status'] or ''
+            ]
+            for issue in sorted(data['issues'], key=lambda i: labels.get(i['node_id'], ''))
+        ])
+
+        _table_pages(pdf, 'IR photos', ['Equipment', 'Taken', 'Visual key', 'IR key', 'Issues'], [
+            [
+                labels.get(photo['node_id'], ''),
+                photo['date_created'],
+                (photo['visual_photo_key'] or '')[-32:],
+                (photo['ir_photo_key'] or '')[-32:],
+                str(len(issues_by_node.get(photo['node_id'], [])))
+            ]
+            for photo in data['ir_photos']
+        ])
+
+        page_count = pdf.get_pagecount()
+
+    return {
+        'pdf': buffer.getvalue(),
+        'pages': page_count,
+        'render_seconds': round(time.perf_counter() - started, 3)
+    }
@@ -0,0 +1,179 @@
+"""Report backend that runs the external pgz-reporting Step Function."""
+import os
+import uuid
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+from botocore.exceptions import ClientError
+
+from models import ReportJob
+from services import outbox
+from services.aws import get_client
+from .notify import add_device_endpoints, pending_device_endpoints, notify_pending
+
+logger = logging.getLogger(__name__)
+
+# Step Function ARN
+STEP_FUNCTION_ARN = "arn:aws:states:us-east-2:637423518604:stateMachine:pgz-reporting-step-function"
+
+# Minimum gap between DescribeExecution calls for the same report job
+STATUS_POLL_INTERVAL = timedelta(seconds=5)
+
+# How often a job with joined devices is checked until it finishes
+JOINER_POLL_INTERVAL = 15
+
+# A job whose execution still does not exist after this long was never started
+# (the outbox gave up, or the start job was lost) and is failed
+START_TIMEOUT = timedelta(seconds=int(os.getenv('REPORT_START_TIMEOUT', '900')))
+
+STEP_FUNCTION_STATUSES = {
+    'RUNNING': 'running',
+    'SUCCEEDED': 'succeeded',
+    'FAILED': 'failed',
+    'TIMED_OUT': 'failed',
+    'ABORTED': 'failed'
+}
+
+
+def get_stepfunctions_client():
+    """Get or create Step Functions client - lazy initialization to avoid debug mode issues"""
+    return get_client('stepfunctions', region_name='us-east-2')
+
+
+def queue_report_execution(step_function_input, report_job_id=None):
+    """Queue a Step Function start on the outbox and return its execution ARN
+
+    The execution name is chosen up front, so the ARN is known before the
+    worker actually starts it and a retried start cannot run the report twice.
+    """
+    execution_name = str(uuid.uuid4())
+    outbox.enqueue('stepfunctions.start_execution', {
+        'execution_name': execution_name,
+        'input': step_function_input,
+        'report_job_id': str(report_job_id) if report_job_id else None
+    })
+    return STEP_FUNCTION_ARN.replace(':stateMachine:', ':execution:') + ':' + execution_name
+
+
+@outbox.handler('stepfunctions.start_execution')
+def start_report_execution(payload):
+    """Start a queued Step Function execution"""
+    try:
+        response = get_stepfunctions_client().start_execution(
+            stateMachineArn=STEP_FUNCTION_ARN,
+            name=payload['execution_name'],
+            input=json.dumps(payload['input'])
+        )
+    except ClientError as e:
+        # A previous attempt started it before the worker could record success
+        if e.response['Error']['Code'] != 'ExecutionAlreadyExists':
+            raise
+        logger.info(f"Step Function execution {payload['execution_name']} already started")
+        response = None
+
+    if payload.get('report_job_id'):
+        ReportJob.query.filter_by(
+            id=uuid.UUID(payload['report_job_id']),
+            status='queued'
+        ).update({'status': 'running'})
+
+    if response is None:
+        return None
+    logger.info(f"Started Step Function execution: {response['executionArn']}")
+    return {'execution_arn': response['executionArn']}
+
+
+@outbox.on_failure('stepfunctions.start_execution')
+def fail_report_execution(payload, error):
+    """The execution could not be started; fail the job so the next request starts a new one"""
+    if not payload.get('report_job_id'):
+        return
+    ReportJob.query.filter(
+        ReportJob.id == uuid.UUID(payload['report_job_id']),
+        ReportJob.execution_arn.endswith(':' + payload['execution_name']),
+        ReportJob.status.in_(('queued', 'running'))
+    ).update({
+        'status': 'failed',
+        'error': f"Step Function execution could not be started: {error}",
+        'completed_at': datetime.now(timezone.utc)
+    }, synchronize_session=False)
+
+
+@outbox.handler('stepfunctions.notify_joiners')
+def notify_joiners(payload):
+    """Poll a job until it finishes, then notify the devices that joined it
+
+    The Step Function only notifies the devices of its input, that is the
+    one that started it.
+    """
+    job = ReportJob.query.filter_by(id=uuid.UUID(payload['report_job_id'])).with_for_update().first()
+    # Restarted since: the new run's joiners get their own watch
+    if job is None or job.execution_arn != payload['execution_arn']:
+        return None
+
+    if job.status in ('queued', 'running'):
+        StepFunctionsBackend().refresh(job)
+    if job.status in ('queued', 'running'):
+        outbox.enqueue('stepfunctions.notify_joiners', payload, delay_seconds=JOINER_POLL_INTERVAL)
+        return {'status': job.status}
+
+    if job.status == 'succeeded':
+        notify_pending(job)
+    return {'status': job.status}
+
+
+class StepFunctionsBackend:
+    name = 'stepfunctions'
+
+    def owns(self, job):
+        return bool(job.execution_arn) and job.execution_arn.startswith('arn:aws:states:')
+
+    def start(self, job, device_endpoints):
+        """Queue the execution; the Step Function notifies device_endpoints itself"""
+        job.execution_arn = queue_report_execution({
+            "ir_session_id": str(job.ir_session_id),
+            "type": job.report_type,
+            "device_endpoints": device_endpoints
+        }, report_job_id=job.id)
+        add_device_endpoints(job, device_endpoints, notified=True)
+
+    def join(self, job, device_endpoints):
+        """Notify these devices too once the execution succeeds"""
+        # One watch per job: only the first device waiting for it queues one
+        watching = bool(pending_device_endpoints(job))
+        if add_device_endpoints(job, device_endpoints) and not watching:
+            outbox.enqueue('stepfunctions.notify_joiners', {
+                'report_job_id': str(job.id),
+                'execution_arn': job.execution_arn
+            }, delay_seconds=JOINER_POLL_INTERVAL)
+
+    def refresh(self, job):
+        """Pull the execution state from Step Functions, at most every few seconds"""
+        now = datetime.now(timezone.utc)
+        if job.last_polled_at and now - job.last_polled_at < STATUS_POLL_INTERVAL:
+            return
+        job.last_polled_at = now
+
+        try:
+            response = get_stepfunctions_client().describe_execution(
+                executionArn=job.execution_arn
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ExecutionDoesNotExist':
+                raise
+            # Not started yet - the outbox worker has not picked it up
+            started = job.started_at or job.created_at
+            if started and now - started > START_TIMEOUT:
+                job.status = 'failed'
+                job.error = 'Step Function execution was never started'
+                job.completed_at = now
+            return
+
+        job.status = STEP_FUNCTION_STATUSES.get(response['status'], job.status)
+        if job.status == 'succeeded':
+            job.output = json.loads(response['output']) if response.get('output') else None
+            job.completed_at = response.get('stopDate') or now
+        elif job.status == 'failed':
+            job.error = response.get('cause') or response.get('error') or response['status']
+            job.completed_at = response.get('stopDate') or now
@@ -0,0 +1,37 @@
+"""Output stores for locally generated reports."""
+import os
+
+from services.s3 import get_s3_client
+
+
+class LocalReportStore:
+    """Write reports under a directory on local disk"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def put(self, key, data, content_type):
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return {'store': 'local', 'key': key, 'location': os.path.abspath(path)}
+
+
+class S3ReportStore:
+    """Write reports to S3 or any S3-compatible service (MinIO, LocalStack)"""
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.client = get_s3_client()
+
+    def put(self, key, data, content_type):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType=content_type)
+        return {'store': 's3', 'bucket': self.bucket, 'key': key, 'location': f"s3://{self.bucket}/{key}"}
+
+
+def get_report_store():
+    """Build the store configured by REPORT_STORE ('local' or 's3')"""
+    if os.getenv('REPORT_STORE', 'local') == 's3':
+        return S3ReportStore(bucket=os.environ['REPORT_BUCKET'])
+    return LocalReportStore(os.getenv('REPORT_OUTPUT_DIR', 'report_output'))
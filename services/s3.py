@@ -0,0 +1,26 @@
+"""Process-wide S3 client.
+
+Building a boto3 client resolves credentials and endpoints, which costs far
+more than signing a URL, so every caller shares one client. S3_ENDPOINT_URL
+points it at an S3-compatible stand-in (MinIO, LocalStack, moto server).
+"""
+import os
+
+from botocore.config import Config
+
+from services.aws import get_client
+
+
+def get_s3_client():
+    """Return the shared S3 client, creating it on first use"""
+    endpoint_url = os.getenv('S3_ENDPOINT_URL') or None
+    return get_client(
+        's3',
+        region_name=os.getenv('AWS_REGION', 'us-east-2'),
+        endpoint_url=endpoint_url,
+        config=Config(
+            signature_version='s3v4',
+            # Local stand-ins generally don't serve virtual-hosted buckets
+            s3={'addressing_style': 'path' if endpoint_url else 'auto'}
+        )
+    )
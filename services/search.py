@@ -0,0 +1,162 @@
+"""Company-wide full-text search over nodes, issues, tasks and quotes.
+
+Each searchable table has a search_vector tsvector column kept up to date by
+a trigger (migration 0004) and a GIN index on it:
+
+    nodes    label (A), qr_code (A), location (B)      'simple' configuration
+    issues   title (A), description (B)                'english'
+    tasks    title (A), task_description (B)           'english'
+    quotes   title (A)                                 'english'
+
+Node labels and QR codes also match partially (ILIKE '%term%', trigram
+indexes) once the term is at least MIN_PARTIAL_LENGTH characters long.
+
+search() runs one branch per kind, each scoped to the company's live SLDs,
+ranked with ts_rank_cd (or trigram similarity for partial matches) and cut
+to the page size before the branches are merged. Pages continue from an
+opaque cursor holding the last hit's (rank, kind, id), so deeper pages cost
+the same as the first.
+"""
+import json
+import base64
+import binascii
+from uuid import UUID
+
+from sqlalchemy import text
+
+from models.db import db
+from services.pagination import PaginationError
+
+KINDS = ('node', 'issue', 'task', 'quote')
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MIN_PARTIAL_LENGTH = 3
+
+# search_vector expressions; {r} is the row prefix ('NEW.' in the triggers)
+SEARCH_VECTORS = {
+    'nodes': (
+        "setweight(to_tsvector('simple', coalesce({r}label, '') || ' ' || coalesce({r}qr_code, '')), 'A')"
+        " || setweight(to_tsvector('simple', coalesce({r}location, '')), 'B')"
+    ),
+    'issues': (
+        "setweight(to_tsvector('english', coalesce({r}title, '')), 'A')"
+        " || setweight(to_tsvector('english', coalesce({r}description, '')), 'B')"
+    ),
+    'tasks': (
+        "setweight(to_tsvector('english', coalesce({r}title, '')), 'A')"
+        " || setweight(to_tsvector('english', coalesce({r}task_description, '')), 'B')"
+    ),
+    'quotes': "setweight(to_tsvector('english', coalesce({r}title, '')), 'A')",
+}
+
+# Columns whose updates refresh search_vector
+SEARCH_COLUMNS = {
+    'nodes': ['label', 'qr_code', 'location'],
+    'issues': ['title', 'description'],
+    'tasks': ['title', 'task_description'],
+    'quotes': ['title'],
+}
+
+_LIVE_SLDS = "s.company_id = :company_id AND s.is_deleted IS NOT TRUE"
+
+_BRANCHES = {
+    'node': """
+        SELECT 'node' AS kind, n.id, n.sld_id, n.label AS title, n.location AS detail,
+               GREATEST(ts_rank_cd(n.search_vector, websearch_to_tsquery('simple', :term)){similarity})
+                   ::double precision AS rank
+        FROM nodes n JOIN slds s ON s.id = n.sld_id
+        WHERE {live_slds} AND n.is_deleted IS NOT TRUE
+          AND (n.search_vector @@ websearch_to_tsquery('simple', :term){partial})
+    """,
+    'issue': """
+        SELECT 'issue' AS kind, i.id, i.sld_id, i.title, left(i.description, 200) AS detail,
+               ts_rank_cd(i.search_vector, websearch_to_tsquery('english', :term))::double precision AS rank
+        FROM issues i JOIN slds s ON s.id = i.sld_id
+        WHERE {live_slds} AND i.is_deleted IS NOT TRUE
+          AND i.search_vector @@ websearch_to_tsquery('english', :term)
+    """,
+    'task': """
+        SELECT 'task' AS kind, t.id, t.sld_id, t.title, left(t.task_description, 200) AS detail,
+               ts_rank_cd(t.search_vector, websearch_to_tsquery('english', :term))::double precision AS rank
+        FROM tasks t JOIN slds s ON s.id = t.sld_id
+        WHERE {live_slds} AND t.is_deleted IS NOT TRUE
+          AND t.search_vector @@ websearch_to_tsquery('english', :term)
+    """,
+    'quote': """
+        SELECT 'quote' AS kind, q.id, q.sld_id, q.title, left(q.description, 200) AS detail,
+               ts_rank_cd(q.search_vector, websearch_to_tsquery('english', :term))::double precision AS rank
+        FROM quotes q JOIN slds s ON s.id = q.sld_id
+        WHERE {live_slds} AND q.is_deleted IS NOT TRUE
+          AND q.search_vector @@ websearch_to_tsquery('english', :term)
+    """,
+}
+
+_NODE_SIMILARITY = ", similarity(n.label, :term), similarity(coalesce(n.qr_code, ''), :term)"
+_NODE_PARTIAL = " OR n.label ILIKE :pattern OR n.qr_code ILIKE :pattern"
+
+_AFTER_CURSOR = "WHERE (rank, kind, id) < (:cursor_rank, :cursor_kind, CAST(:cursor_id AS uuid))"
+
+
+class SearchError(ValueError):
+    pass
+
+
+def encode_cursor(hit):
+    raw = json.dumps([hit['rank'], hit['kind'], hit['id']]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        rank, kind, hit_id = json.loads(raw)
+        if isinstance(rank, bool) or not isinstance(rank, (int, float)) or not isinstance(kind, str):
+            raise ValueError(cursor)
+        return float(rank), kind, str(UUID(hit_id))
+    except (binascii.Error, ValueError, TypeError, AttributeError):
+        raise PaginationError("cursor must be a next_cursor value from a previous page")
+
+
+def _like_pattern(term):
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+def _branch_sql(kind, partial, after_cursor):
+    sql = _BRANCHES[kind].format(
+        live_slds=_LIVE_SLDS,
+        similarity=_NODE_SIMILARITY if partial else '',
+        partial=_NODE_PARTIAL if partial else ''
+    )
+    return (
+        f"SELECT * FROM ({sql}) AS hits "
+        f"{_AFTER_CURSOR if after_cursor else ''} "
+        f"ORDER BY rank DESC, kind DESC, id DESC LIMIT :page"
+    )
+
+
+def search(company_id, term, kinds=KINDS, limit=DEFAULT_LIMIT, cursor=None):
+    """One page of hits, best first, and the cursor of the next page (or None)"""
+    term = term.strip()
+    if not term:
+        raise SearchError("q must not be empty")
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        raise SearchError(f"Unknown types: {', '.join(sorted(unknown))}")
+
+    partial = len(term) >= MIN_PARTIAL_LENGTH
+    params = {'company_id': company_id, 'term': term, 'pattern': _like_pattern(term), 'page': limit + 1}
+    if cursor:
+        params['cursor_rank'], params['cursor_kind'], params['cursor_id'] = decode_cursor(cursor)
+
+    branches = ' UNION ALL '.join(f"({_branch_sql(kind, partial, bool(cursor))})" for kind in kinds)
+    statement = text(f"{branches} ORDER BY rank DESC, kind DESC, id DESC LIMIT :page")
+    rows = db.session.execute(statement, params).mappings().all()
+
+    hits = [
+        {'kind': row['kind'], 'id': str(row['id']), 'sld_id': str(row['sld_id']) if row['sld_id'] else None,
+         'title': row['title'], 'detail': row['detail'], 'rank': row['rank']}
+        for row in rows[:limit]
+    ]
+    return hits, encode_cursor(hits[-1]) if len(rows) > limit else None
@@ -0,0 +1,105 @@
+"""Soft-delete visibility: which rows the reads of a request see.
+
+Rows with is_deleted = true are tombstones. GET requests see only live rows
+unless they ask for more with ?include_deleted=:
+
+    false (default)   live rows only
+    true              live and deleted rows
+    ids               live rows, plus the ids of deleted ones where a view
+                      supports it (GET /sld adds a "tombstones" section)
+
+The filter is applied in one place: a do_orm_execute hook adds
+with_loader_criteria(is_deleted IS NOT TRUE) to every ORM SELECT of a model
+that has an is_deleted column, whether it comes from Model.query, select()
+or a column serializer. Text SQL is not rewritten. Writes never filter, so
+updates still find (and can restore) deleted rows. A single statement opts
+out with .execution_options(include_deleted=True), a block of code with
+including_deleted().
+
+The predicate matches the partial live indexes (migration 0007), so live
+reads never touch dead index entries.
+"""
+import logging
+from contextlib import contextmanager
+
+from flask import has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.orm import with_loader_criteria
+
+from models.db import db, RoutingSession
+
+logger = logging.getLogger(__name__)
+
+LIVE = 'live'
+ALL = 'all'
+IDS = 'ids'
+
+MODES = {'false': LIVE, 'true': ALL, 'ids': IDS}
+
+_live_criteria = None
+
+
+def soft_deleted_models():
+    """Mapped classes that have an is_deleted column"""
+    return [mapper.class_ for mapper in db.Model.registry.mappers if 'is_deleted' in mapper.columns]
+
+
+def _live_options():
+    global _live_criteria
+    if _live_criteria is None:
+        _live_criteria = tuple(
+            with_loader_criteria(model, lambda cls: cls.is_deleted.isnot(True), include_aliases=True)
+            for model in soft_deleted_models()
+        )
+    return _live_criteria
+
+
+def current_mode():
+    """The visibility of the current session's reads; ALL outside GET requests"""
+    return db.session.info.get('visibility', ALL) if has_request_context() else ALL
+
+
+@contextmanager
+def including_deleted():
+    """Reads inside the block see deleted rows too"""
+    info = db.session.info
+    previous = info.get('visibility')
+    info['visibility'] = ALL
+    try:
+        yield
+    finally:
+        if previous is None:
+            info.pop('visibility', None)
+        else:
+            info['visibility'] = previous
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _hide_deleted(state):
+    if (state.is_select
+            and not state.is_column_load
+            and not state.is_relationship_load
+            and state.session.info.get('visibility', ALL) != ALL
+            and not state.execution_options.get('include_deleted', False)):
+        state.statement = state.statement.options(*_live_options())
+
+
+def _set_visibility():
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    value = request.args.get('include_deleted', 'false').lower()
+    if value not in MODES:
+        return jsonify({'error': "include_deleted must be one of true, false or ids"}), 400
+    db.session.info['visibility'] = MODES[value]
+    return None
+
+
+def _clear_visibility(exc):
+    db.session.info.pop('visibility', None)
+
+
+def init_app(app):
+    """Filter deleted rows out of GET requests; call after db.init_app"""
+    app.before_request(_set_visibility)
+    app.teardown_request(_clear_visibility)
+    logger.info("Hiding soft-deleted rows of %d models from reads", len(soft_deleted_models()))
@@ -0,0 +1,37 @@
+"""Shared test setup.
+
+Tests that need the full app run against the PostgreSQL database named by
+TEST_DATABASE_URL (a scratch database: migrations are applied to it) and
+are skipped when it is not set.
+"""
+import os
+
+import pytest
+
+pytest_plugins = ['services.query_budget_pytest']
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+
+@pytest.fixture(scope='session')
+def pg_app():
+    """The app on the test database, migrated to the latest schema"""
+    if not TEST_DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL is not set')
+    # app.py builds a module-level app from the environment on import
+    os.environ['DATABASE_URL'] = TEST_DATABASE_URL
+    os.environ['OUTBOX_INPROCESS_WORKER'] = 'false'
+
+    from app import create_app
+    from models import db
+    from services import migrate
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': TEST_DATABASE_URL, 'TESTING': True})
+    with app.app_context():
+        migrate.upgrade(db.engine)
+    return app
+
+
+@pytest.fixture
+def pg_client(pg_app):
+    return pg_app.test_client()
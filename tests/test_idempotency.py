@@ -0,0 +1,71 @@
+"""Idempotency-Key replays, conflicts and released keys on the create routes."""
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from models import db
+from services import idempotency
+
+
+@pytest.fixture
+def key(pg_app):
+    key = str(uuid.uuid4())
+    yield key
+    with pg_app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(text("DELETE FROM idempotency_keys WHERE key = :key"), {'key': key})
+
+
+def create_issue(client, key, body):
+    return client.post('/issue/create', json=body, headers={idempotency.HEADER: key})
+
+
+def test_a_retry_replays_the_stored_response(pg_client, key):
+    first = create_issue(pg_client, key, {'title': 'Replace breaker'})
+    retry = create_issue(pg_client, key, {'title': 'Replace breaker'})
+
+    assert first.status_code == 201
+    assert retry.status_code == 201
+    assert retry.headers[idempotency.REPLAYED_HEADER] == 'true'
+    assert retry.get_json() == first.get_json()
+
+
+def test_a_key_reused_for_another_body_gets_422(pg_client, key):
+    assert create_issue(pg_client, key, {'title': 'Replace breaker'}).status_code == 201
+
+    response = create_issue(pg_client, key, {'title': 'Replace fuse'})
+
+    assert response.status_code == 422
+    assert idempotency.REPLAYED_HEADER not in response.headers
+
+
+def test_a_retry_while_the_first_request_runs_gets_409(pg_app, pg_client, key):
+    body = {'title': 'Replace breaker'}
+    # An unfinished claim, as the first request leaves it while its view runs
+    with pg_app.test_request_context('/issue/create', method='POST', json=body):
+        request_hash = idempotency._request_hash()
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO idempotency_keys (key, endpoint, request_hash, created_at) "
+                "VALUES (:key, 'core.create_issue', :request_hash, now())"
+            ), {'key': key, 'request_hash': request_hash})
+
+    response = create_issue(pg_client, key, body)
+
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_a_400_from_a_database_error_is_not_replayed(pg_client, key):
+    issue_id = str(uuid.uuid4())
+    assert pg_client.post('/issue/create', json={'id': issue_id, 'title': 'First'}).status_code == 201
+
+    # The duplicate id fails at commit, which the view reports as a 400
+    body = {'id': issue_id, 'title': 'Duplicate'}
+    first = create_issue(pg_client, key, body)
+    retry = create_issue(pg_client, key, body)
+
+    assert first.status_code == 400
+    assert retry.status_code == 400
+    assert idempotency.REPLAYED_HEADER not in retry.headers
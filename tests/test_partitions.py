@@ -0,0 +1,40 @@
+"""flask ensure-partitions after missed runs."""
+import uuid
+
+import pytest
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import text
+
+from models import db
+from services import partitions
+
+
+@pytest.fixture
+def connection(pg_app):
+    with pg_app.app_context():
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            yield connection
+
+
+def test_a_lapsed_cron_catches_up_and_moves_rows_out_of_default(connection):
+    covered = partitions.covered_until(connection, 'tasks')
+    # Two months past the last partition: no run created it, so the row lands in tasks_default
+    month = covered + relativedelta(months=2)
+    task_id = uuid.uuid4()
+    connection.execute(text(
+        "INSERT INTO tasks (id, title, is_deleted, created_at, submitted_at, due_date) "
+        "VALUES (:id, 'Lapsed cron', false, :created_at, :created_at, :created_at)"
+    ), {'id': task_id, 'created_at': month + relativedelta(days=9)})
+    assert connection.execute(text("SELECT count(*) FROM tasks_default WHERE id = :id"), {'id': task_id}).scalar() == 1
+
+    try:
+        created = partitions.ensure_partitions(connection, months_ahead=0, now=month + relativedelta(days=14))
+
+        expected = [partitions.partition_name('tasks', covered + relativedelta(months=offset)) for offset in range(3)]
+        assert [name for name in created if name.startswith('tasks_')] == expected
+        assert partitions.covered_until(connection, 'tasks') == month + relativedelta(months=1)
+        where = connection.execute(text("SELECT tableoid::regclass::text FROM tasks WHERE id = :id"),
+                                   {'id': task_id}).scalar()
+        assert where == partitions.partition_name('tasks', month)
+    finally:
+        connection.execute(text("DELETE FROM tasks WHERE id = :id"), {'id': task_id})
@@ -0,0 +1,64 @@
+"""The per-route @max_queries budgets hold however many rows a route returns."""
+import uuid
+
+import pytest
+
+from models import db, Company, SLD, Task, MappingUserTask
+from services.query_budget import QueryBudgetExceeded, count_queries
+
+# Well above the /sld budget, so a per-task query would blow it
+TASKS = 40
+
+
+@pytest.fixture
+def sld_with_many_tasks(pg_app):
+    with pg_app.app_context():
+        company = Company(id=uuid.uuid4(), name=f"Query budget test {uuid.uuid4().hex[:8]}")
+        sld = SLD(id=uuid.uuid4(), name='Query budget test', company_id=company.id)
+        tasks = [Task(id=uuid.uuid4(), sld_id=sld.id, title=f"Task {i}", is_deleted=False)
+                 for i in range(TASKS)]
+        mappings = [MappingUserTask(id=uuid.uuid4(), user_id=uuid.uuid4(), task_id=task.id,
+                                    mapping_type='assignee', is_deleted=False)
+                    for task in tasks]
+        db.session.add(company)
+        db.session.flush()
+        db.session.add(sld)
+        db.session.flush()
+        db.session.add_all(tasks + mappings)
+        db.session.commit()
+        sld_id, company_id, task_ids = sld.id, company.id, [task.id for task in tasks]
+
+    yield sld_id
+
+    with pg_app.app_context():
+        MappingUserTask.query.filter(MappingUserTask.task_id.in_(task_ids)).delete(synchronize_session=False)
+        Task.query.filter(Task.sld_id == sld_id).delete(synchronize_session=False)
+        SLD.query.filter(SLD.id == sld_id).delete(synchronize_session=False)
+        Company.query.filter(Company.id == company_id).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def budget_of(app, endpoint):
+    return app.view_functions[endpoint].query_budget
+
+
+def test_sld_stays_within_its_declared_budget(pg_app, pg_client, sld_with_many_tasks, query_counter):
+    response = pg_client.get(f'/sld/{sld_with_many_tasks}')
+
+    assert response.status_code == 200
+    assert len(response.json['tasks']) == TASKS
+    assert len(response.json['mappings']['user_task']) == TASKS
+    assert query_counter.count <= budget_of(pg_app, 'core.get_sld'), query_counter.report()
+
+
+@pytest.mark.query_budget(14)
+def test_sld_budget_marker(pg_client, sld_with_many_tasks):
+    assert pg_client.get(f'/sld/{sld_with_many_tasks}').status_code == 200
+
+
+def test_budget_catches_a_query_per_task(pg_app, sld_with_many_tasks):
+    with pg_app.app_context():
+        with pytest.raises(QueryBudgetExceeded):
+            with count_queries(budget=budget_of(pg_app, 'core.get_sld')):
+                for task in Task.query.filter(Task.sld_id == sld_with_many_tasks).all():
+                    MappingUserTask.query.filter(MappingUserTask.task_id == task.id).all()
@@ -0,0 +1,86 @@
+"""Read routing between a primary and a replica, with two SQLite files standing in."""
+import pytest
+
+pytest.importorskip('flask_sqlalchemy')
+
+from flask import Flask, jsonify
+from sqlalchemy import text
+
+from models.db import db
+from services import db_pool, replicas
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(replicas, 'REPLICA_URLS', [f"sqlite:///{tmp_path / 'replica.db'}"])
+    monkeypatch.setattr(replicas, '_recent_writers', {})
+    monkeypatch.setattr(replicas, '_lag', {})
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'primary.db'}"
+    db_pool.init_app(app)
+    replicas.init_app(app)
+    db.init_app(app)
+
+    # Each database names itself, so a response shows where its read went
+    with app.app_context():
+        for bind_key, name in ((None, 'primary'), ('replica_0', 'replica')):
+            with db.engines[bind_key].begin() as connection:
+                connection.execute(text("CREATE TABLE whoami (name TEXT)"))
+                connection.execute(text("INSERT INTO whoami (name) VALUES (:name)"), {'name': name})
+
+    @app.route('/read')
+    @replicas.replica_read
+    def read():
+        return jsonify(db.session.execute(text("SELECT name FROM whoami")).scalar())
+
+    @app.route('/read-primary')
+    def read_primary():
+        return jsonify(db.session.execute(text("SELECT name FROM whoami")).scalar())
+
+    @app.route('/write', methods=['POST'])
+    def write():
+        return jsonify('ok')
+
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_marked_views_read_from_the_replica(client):
+    response = client.get('/read')
+    assert response.json == 'replica'
+    assert response.headers['X-DB-Route'] == 'replica_0'
+
+
+def test_unmarked_views_read_from_the_primary(client):
+    response = client.get('/read-primary')
+    assert response.json == 'primary'
+    assert response.headers['X-DB-Route'] == 'primary'
+
+
+def test_strong_consistency_reads_from_the_primary(client):
+    assert client.get('/read', headers={'X-Consistency': 'strong'}).json == 'primary'
+
+
+def test_reads_stick_to_the_primary_after_a_write(client):
+    client.post('/write')
+    assert client.get('/read').json == 'primary'
+
+
+def test_stickiness_expires(client, monkeypatch):
+    monkeypatch.setattr(replicas, 'STICKY_SECONDS', 0)
+    client.post('/write')
+    assert client.get('/read').json == 'replica'
+
+
+def test_a_lagging_replica_is_skipped(client, monkeypatch):
+    monkeypatch.setattr(replicas, 'replication_lag', lambda bind_key: replicas.MAX_LAG_SECONDS + 1)
+    assert client.get('/read').json == 'primary'
+
+
+def test_in_memory_sqlite_boots_with_its_own_pool():
+    assert db_pool.engine_options('sqlite://') == {}